@@ -2,6 +2,8 @@
 ASGI config for student_management project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with ``uvicorn student_management.asgi:application`` (see Procfile);
+the async read views under /api/async/ then run without a thread per request.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -12,5 +14,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_management.settings')
+# Under ASGI a database connection belongs to its request's context and is
+# never picked up by a later request, so persistent ones would only pile up.
+os.environ.setdefault('CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
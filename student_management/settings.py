@@ -1,5 +1,9 @@
 from pathlib import Path
 import os
+import tempfile
+
+import django
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -42,10 +46,20 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_PAGINATION_CLASS': 'students.pagination.StableCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 50)),
 }
 
+# Upper bound for the ?page_size= query parameter
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+# Upper bound for the chunk_size of a bulk import; a chunk is validated and held in memory at once
+MAX_IMPORT_CHUNK_SIZE = int(os.environ.get('MAX_IMPORT_CHUNK_SIZE', 5000))
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Make sure this is first
+    'students.metrics.MetricsMiddleware',  # Per-route counters and latency histograms for /metrics
+    'students.instrumentation.RequestTimingMiddleware',  # Times everything below it
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,6 +70,54 @@ MIDDLEWARE = [
     
 ]
 
+# Request timing (RequestTimingMiddleware above): query count, SQL time, the
+# slowest statement, serializer and render time of a sample of requests, as
+# Server-Timing headers and JSON lines on the "students.performance" logger.
+# Remove the middleware to switch it off entirely.
+REQUEST_TIMING_SAMPLE_RATE = float(os.environ.get('REQUEST_TIMING_SAMPLE_RATE', 0.01))
+# Server-Timing reveals query counts and timings to clients: off unless
+# switched on (e.g. for a profiling session); the log lines are written either way.
+REQUEST_TIMING_HEADERS = os.environ.get('REQUEST_TIMING_HEADERS', 'false').lower() in ('1', 'true', 'yes', 'on')
+
+# Shared by every worker process on the machine: each one writes its metrics
+# to a memory-mapped file here and GET /metrics sums them. Empty it before
+# the server starts to reset the counters. /metrics has no authentication;
+# keep it off the public internet at the proxy.
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'student-management-metrics'))
+
+# Statements slower than this go to SLOW_QUERY_LOG_FILE; "off" switches the log off
+SLOW_QUERY_THRESHOLD_MS = os.environ.get('SLOW_QUERY_THRESHOLD_MS', '200')
+SLOW_QUERY_THRESHOLD_MS = None if SLOW_QUERY_THRESHOLD_MS == 'off' else float(SLOW_QUERY_THRESHOLD_MS)
+SLOW_QUERY_LOG_FILE = os.environ.get('SLOW_QUERY_LOG_FILE', os.path.join(BASE_DIR, 'slow_queries.log'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+        # Each worker process rotates on its own; with several, give each its own file or ship the lines
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'maxBytes': int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024)),
+            'backupCount': int(os.environ.get('SLOW_QUERY_LOG_BACKUPS', 5)),
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'students.performance': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_TIMING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'students.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 ROOT_URLCONF = 'student_management.urls'
 
 TEMPLATES = [
@@ -76,13 +138,74 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'student_management.wsgi.application'
 
-# Database configuration
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Database configuration, picked with DATABASE_PROFILE ('sqlite' or 'postgres').
+# Connections are kept open between requests for CONN_MAX_AGE seconds and
+# checked before reuse, so a worker doesn't reconnect on every request.
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'sqlite')
+CONN_MAX_AGE = int(os.environ.get('CONN_MAX_AGE', 60))
+
+if DATABASE_PROFILE == 'postgres':
+    # Needs psycopg (or psycopg2). With Django 5.1+ each worker process keeps
+    # a psycopg_pool pool; on older versions persistent connections are the
+    # pool, optionally behind PgBouncer in transaction mode (DATABASE_POOLER=pgbouncer).
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'student_management'),
+            'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('DATABASE_POOLER') == 'pgbouncer':
+        # Server-side cursors don't survive PgBouncer handing the connection to another client
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+    elif django.VERSION >= (5, 1):
+        # Django's pool replaces persistent connections
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DATABASE_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DATABASE_POOL_MAX_SIZE', 10)),
+        }
+elif DATABASE_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            # Django's SQLite backend plus SQLITE_PRAGMAS and SQLITE_TRANSACTION_MODE below
+            'ENGINE': 'students.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
     }
+else:
+    raise ImproperlyConfigured(f"Unknown DATABASE_PROFILE {DATABASE_PROFILE!r}; use 'sqlite' or 'postgres'.")
+
+# Applied to every new SQLite connection (students/backends/sqlite3). WAL
+# lets readers run alongside the single writer, and busy_timeout makes a
+# writer wait for the lock instead of failing with "database is locked".
+# The journal mode is stored in the database file itself: a deployment's
+# database (SQLITE_PATH) is switched to WAL, the checked-in development
+# db.sqlite3 keeps its rollback journal unless SQLITE_JOURNAL_MODE says
+# otherwise. synchronous=normal is only safe under WAL (in the other journal
+# modes a power loss can corrupt the database), so it defaults to full there.
+SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'wal' if os.environ.get('SQLITE_PATH') else '')
+SQLITE_PRAGMAS = {
+    'journal_mode': SQLITE_JOURNAL_MODE or None,
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'normal' if SQLITE_JOURNAL_MODE.lower() == 'wal' else 'full'),
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),  # milliseconds
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),  # bytes
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_KB', 64 * 1024)),  # negative: KiB per connection
+    'temp_store': 'memory',
 }
+# How write blocks (students.database.write_atomic) begin: IMMEDIATE takes
+# the write lock up front, so a writer waits out busy_timeout instead of
+# failing when its read snapshot went stale under WAL. Other transactions,
+# read-only ones included, stay DEFERRED. Empty for DEFERRED everywhere.
+SQLITE_TRANSACTION_MODE = os.environ.get('SQLITE_TRANSACTION_MODE', 'IMMEDIATE')
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -116,3 +239,40 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Media files (uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Worker processes per web server. gunicorn reads it itself; the Procfile
+# passes it to uvicorn.
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# The reference-data and carousel versions and the /api/cache-stats/ counters
+# live in the cache, so every process that serves or writes data has to see
+# the same one: set CACHE_BACKEND/CACHE_LOCATION to Redis, Memcached, the
+# database or a file cache. The local-memory default suits a single process
+# (runserver); a write from another process, seed_institution included, is
+# not seen by it until the entries expire.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'student-management'),
+    }
+}
+if WEB_CONCURRENCY > 1 and CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+    raise ImproperlyConfigured(
+        f"WEB_CONCURRENCY={WEB_CONCURRENCY} needs a cache shared by the worker processes; set CACHE_BACKEND."
+    )
+
+# Lifetime of cached reference-data and active-carousel payloads. Writes
+# invalidate them through versioned keys, so this only bounds how long
+# superseded entries linger.
+REFERENCE_CACHE_TIMEOUT = int(os.environ.get('REFERENCE_CACHE_TIMEOUT', 24 * 60 * 60))
+
+# Browser/CDN lifetime of GET /api/carousel/active/ (revalidated cheaply with its ETag)
+CAROUSEL_CACHE_MAX_AGE = int(os.environ.get('CAROUSEL_CACHE_MAX_AGE', 3600))
+
+# Background jobs (students/jobs.py), run by `manage.py run_workers`
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))  # Processes per run_workers command
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1))
+# Seconds before a failed job runs again, doubled after every further failure
+JOB_RETRY_DELAY = int(os.environ.get('JOB_RETRY_DELAY', 30))
+# A running job without a heartbeat for this long lost its worker and is requeued
+JOB_STALE_AFTER = int(os.environ.get('JOB_STALE_AFTER', 300))
@@ -18,7 +18,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from students.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('students.urls')),
+    path('metrics', metrics_view, name='metrics'),  # Prometheus scrape target
 ]
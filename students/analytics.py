@@ -0,0 +1,155 @@
+from collections import Counter
+
+from django.db import models
+from django.utils import timezone
+
+from .database import write_atomic
+from .models import AssignmentSummary, Student, StudentSummary, Submission
+
+
+def rebuild_summaries():
+    """
+    Recomputes both summary tables from Student and Submission.
+
+    For a restored dump, a migration of existing data or a check that the
+    incremental counts have not drifted; returns the number of rows written.
+    """
+    with write_atomic():
+        StudentSummary.objects.all().delete()
+        headcounts = StudentSummary.objects.bulk_create(StudentSummary.rows_for(Student.objects.all()), batch_size=1000)
+        AssignmentSummary.objects.all().delete()
+        submissions = AssignmentSummary.objects.bulk_create(
+            AssignmentSummary.rows_for(Submission.objects.all()), batch_size=1000,
+        )
+    return len(headcounts), len(submissions)
+
+
+def overview():
+    """
+    Headcounts by department, degree, batch and year of study, gender split and graduation counts.
+
+    One query over StudentSummary (joined to the small reference tables);
+    the grouping happens over summary rows, never over students.
+    """
+    rows = StudentSummary.objects.filter(count__gt=0).values(
+        'count', 'gender', 'is_graduated', 'enrollment_year', 'degree_id', 'degree__name',
+        'degree__department_id', 'degree__department__name', 'class_group__current_year',
+    )
+
+    def bucket():
+        return {'active': 0, 'graduated': 0}
+
+    totals = bucket()
+    genders = Counter()
+    departments, degrees, batches, years = {}, {}, {}, {}
+    for row in rows:
+        status = 'graduated' if row['is_graduated'] else 'active'
+        count = row['count']
+        totals[status] += count
+        genders[row['gender']] += count
+        departments.setdefault(
+            row['degree__department_id'],
+            {'id': row['degree__department_id'], 'name': row['degree__department__name'], **bucket()},
+        )[status] += count
+        degrees.setdefault(
+            row['degree_id'],
+            {
+                'id': row['degree_id'], 'name': row['degree__name'], 'department': row['degree__department_id'],
+                **bucket(),
+            },
+        )[status] += count
+        batches.setdefault(
+            (row['degree_id'], row['enrollment_year']),
+            {'degree': row['degree_id'], 'enrollment_year': row['enrollment_year'], **bucket()},
+        )[status] += count
+        if not row['is_graduated']:
+            year = row['class_group__current_year']
+            years[year] = years.get(year, 0) + count
+
+    total = totals['active'] + totals['graduated']
+    return {
+        'students': {'total': total, **totals},
+        'gender': {
+            gender: {'count': count, 'share': round(count / total, 4)} for gender, count in sorted(genders.items())
+        },
+        'departments': sorted(departments.values(), key=lambda item: item['id']),
+        'degrees': sorted(degrees.values(), key=lambda item: item['id']),
+        'batches': sorted(batches.values(), key=lambda item: (item['degree'], item['enrollment_year'])),
+        'years': [{'current_year': year, 'active': count} for year, count in sorted(years.items())],
+    }
+
+
+def class_sizes(class_groups):
+    """``{class group id: headcount}`` from StudentSummary."""
+    return dict(
+        StudentSummary.objects.filter(class_group__in=class_groups)
+        .values_list('class_group_id').annotate(total=models.Sum('count')).order_by()
+    )
+
+
+def completion(submitted, late, class_size):
+    """Submitted, on-time, late and missing counts of an assignment, and its submission rate."""
+    return {
+        'class_size': class_size,
+        'submitted': submitted,
+        'on_time': submitted - late,
+        'late': late,
+        'missing': max(class_size - submitted, 0),
+        'submission_rate': round(submitted / class_size, 4) if class_size else None,
+    }
+
+
+def assignment_rates(assignments):
+    """
+    Adds the ``completion()`` counts to assignment ``values()`` rows.
+
+    The rows need ``class_group_id``, ``summary__submitted`` and ``summary__late``;
+    ``class_size`` is the class group's headcount from StudentSummary, the
+    students AssignmentSummary counts submissions of.
+    """
+    sizes = class_sizes({row['class_group_id'] for row in assignments})
+    for row in assignments:
+        row.update(completion(
+            row.pop('summary__submitted') or 0, row.pop('summary__late') or 0, sizes.get(row['class_group_id'], 0),
+        ))
+    return assignments
+
+
+BOARD_STATUSES = ('submitted', 'on_time', 'late', 'missing')
+
+
+def submission_board(assignment, status=None):
+    """
+    Every student of the assignment's class group with their submission, if any, as ``values()`` rows.
+
+    The submissions are LEFT JOINed on the (student, assignment) unique index,
+    so ``status='missing'`` is an anti-join: one query, however large the
+    class group, instead of fetching both lists and matching them up.
+    """
+    rows = Student.objects.filter(class_group=assignment.class_group_id).annotate(
+        submission=models.FilteredRelation('submissions', condition=models.Q(submissions__assignment=assignment.pk)),
+    )
+    if status == 'missing':
+        rows = rows.filter(submission__isnull=True)
+    elif status == 'submitted':
+        rows = rows.filter(submission__isnull=False)
+    elif status == 'late':
+        rows = rows.filter(submission__submitted_at__date__gt=assignment.due_date)
+    elif status == 'on_time':
+        rows = rows.filter(submission__submitted_at__date__lte=assignment.due_date)
+    return rows.values(
+        'pk', 'student_id', 'first_name', 'last_name', 'is_graduated', 'submission__id', 'submission__submitted_at',
+    )
+
+
+def board_entry(row, due_date):
+    submitted_at = row['submission__submitted_at']
+    if submitted_at is None:
+        status = 'missing'
+    else:
+        status = 'late' if timezone.localdate(submitted_at) > due_date else 'on_time'
+    return {
+        'id': row['pk'], 'student_id': row['student_id'], 'name': f"{row['first_name']} {row['last_name']}",
+        'is_graduated': row['is_graduated'], 'status': status,
+        'submission': row['submission__id'], 'submitted_at': submitted_at,
+    }
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class StudentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'students'
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import instrumentation, signals  # noqa: F401
+
+        if settings.SLOW_QUERY_THRESHOLD_MS is not None or any(
+            path in settings.MIDDLEWARE for path in instrumentation.MIDDLEWARE_PATHS
+        ):
+            instrumentation.install()
@@ -0,0 +1,178 @@
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.pagination import Cursor
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import metrics
+from .caching import make_etag
+from .fieldsets import ValuesPlan, requested_fields, restrict_fields
+from .filters import AssignmentFilter, StudentFilter, SubmissionFilter
+from .models import Assignment, CarouselImage, ClassGroup, Student, Submission, TableVersion
+from .pagination import StableCursorPagination
+from .serializers import (
+    AssignmentSerializer, CarouselImageSerializer, ClassGroupSerializer, StudentSerializer, SubmissionSerializer,
+)
+
+
+class AsyncReadOnlyView(View):
+    """
+    ``list`` and ``retrieve`` of a viewset, served with the async ORM.
+
+    Under ASGI a request waiting on the database doesn't hold a worker
+    thread. The output matches the sync endpoint: the same serializer
+    (through ValuesPlan where it applies), ``?fields=``, the FilterSet, cursor
+    pagination over the primary key and ETag/Last-Modified validation.
+    Anything the serializer reads must be selected or prefetched by
+    ``queryset``, since lazy loading isn't allowed in async code.
+    """
+    http_method_names = ['get', 'head', 'options']
+    queryset = None
+    serializer_class = None
+    filterset_class = None
+
+    async def get(self, request, pk=None):
+        request = Request(request)
+        try:
+            if pk is None:
+                return await self.list(request)
+            return await self.retrieve(request, pk)
+        except APIException as exc:
+            return self.json(exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail},
+                             status=exc.status_code)
+
+    @staticmethod
+    def json(data, status=200):
+        return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+    def plan(self, request):
+        """ValuesPlan for the requested fields, or None when the serializer has to render model instances."""
+        names = requested_fields(request)
+        if names is not None:
+            restrict_fields(self.serializer_class(), names)  # 400 for unknown fields, like the sync views
+        return ValuesPlan.for_serializer_class(self.serializer_class, names, request, extra_columns=['pk'])
+
+    def render(self, request, instances):
+        serializer = self.serializer_class(instances, many=True, context={'request': request})
+        names = requested_fields(request)
+        if names is not None:
+            restrict_fields(serializer, names)
+        return serializer.data
+
+    async def fetch(self, request, queryset, plan):
+        """``[(pk, rendered row)]`` for every row of ``queryset``."""
+        if plan is not None:
+            rows = [row async for row in queryset.prefetch_related(None).values(*plan.columns)]
+            return list(zip((row['pk'] for row in rows), plan.render(rows)))
+        instances = [instance async for instance in queryset]
+        return list(zip((instance.pk for instance in instances), self.render(request, instances)))
+
+    def conditional(self, request, etag, last_modified):
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        metrics.record_cache_lookup('conditional_get', self.queryset.model._meta.model_name, not_modified is not None)
+        return not_modified, last_modified
+
+    def validated(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    async def list(self, request):
+        model = self.queryset.model
+        version, changed_at = await TableVersion.acurrent(model)
+        etag = make_etag(request, model._meta.label_lower, version)
+        not_modified, last_modified = self.conditional(request, etag, changed_at)
+        if not_modified is not None:
+            return not_modified
+
+        queryset = self.queryset.all()
+        if self.filterset_class is not None:
+            filterset = self.filterset_class(request.query_params, queryset=queryset, request=request)
+            if not filterset.is_valid():
+                raise ValidationError(filterset.errors)
+            queryset = filterset.qs
+        plan = self.plan(request)
+
+        # StableCursorPagination, with the page fetched by the async ORM
+        paginator = StableCursorPagination()
+        paginator.base_url = request.build_absolute_uri()
+        page_size = paginator.get_page_size(request)
+        cursor = paginator.decode_cursor(request)
+        reverse = bool(cursor and cursor.reverse)
+        position = cursor.position if cursor else None
+        if position is not None:
+            queryset = queryset.filter(**{'pk__lt' if reverse else 'pk__gt': position})
+        rows = await self.fetch(request, queryset.order_by('-pk' if reverse else 'pk')[:page_size + 1], plan)
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # A reverse cursor always comes from a later page; a forward one from an earlier page
+        has_next = reverse or has_more
+        has_previous = has_more if reverse else position is not None
+        next_link = previous_link = None
+        if rows and has_next:
+            next_link = paginator.encode_cursor(Cursor(offset=0, reverse=False, position=str(rows[-1][0])))
+        if rows and has_previous:
+            previous_link = paginator.encode_cursor(Cursor(offset=0, reverse=True, position=str(rows[0][0])))
+        response = self.json({'next': next_link, 'previous': previous_link, 'results': [row for _, row in rows]})
+        return self.validated(response, etag, last_modified)
+
+    async def retrieve(self, request, pk):
+        rows = self.queryset.filter(pk=pk)
+        updated_at = await rows.values_list('updated_at', flat=True).afirst()
+        if updated_at is None:
+            return self.json({'detail': 'Not found.'}, status=404)
+        etag = make_etag(request, self.queryset.model._meta.label_lower, pk, updated_at.isoformat())
+        not_modified, last_modified = self.conditional(request, etag, updated_at)
+        if not_modified is not None:
+            return not_modified
+
+        found = await self.fetch(request, rows, self.plan(request))
+        if not found:
+            return self.json({'detail': 'Not found.'}, status=404)
+        return self.validated(self.json(found[0][1]), etag, last_modified)
+
+
+class AsyncStudentView(AsyncReadOnlyView):
+    queryset = Student.objects.all()
+    serializer_class = StudentSerializer
+    filterset_class = StudentFilter
+
+
+class AsyncClassGroupView(AsyncReadOnlyView):
+    queryset = ClassGroup.objects.with_related()
+    serializer_class = ClassGroupSerializer
+
+
+class AsyncAssignmentView(AsyncReadOnlyView):
+    queryset = Assignment.objects.all()
+    serializer_class = AssignmentSerializer
+    filterset_class = AssignmentFilter
+
+
+class AsyncSubmissionView(AsyncReadOnlyView):
+    queryset = Submission.objects.all()
+    serializer_class = SubmissionSerializer
+    filterset_class = SubmissionFilter
+
+
+class AsyncCarouselImageView(AsyncReadOnlyView):
+    queryset = CarouselImage.objects.all()
+    serializer_class = CarouselImageSerializer
+
+
+# URL prefix under /api/async/ -> view
+ASYNC_VIEWS = {
+    'students': AsyncStudentView,
+    'class-groups': AsyncClassGroupView,
+    'assignments': AsyncAssignmentView,
+    'submissions': AsyncSubmissionView,
+    'carousel': AsyncCarouselImageView,
+}
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+from students.database import sqlite_pragma_statements
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Django's SQLite backend with SQLITE_PRAGMAS applied to every new connection.
+
+    With persistent connections (CONN_MAX_AGE) that is once per worker
+    thread, not once per request. ``write_atomic()`` sets ``begin_mode`` for
+    the outermost block it opens; every other transaction starts DEFERRED.
+    """
+    begin_mode = None
+
+    def init_connection_state(self):
+        super().init_connection_state()
+        for statement in sqlite_pragma_statements(getattr(settings, 'SQLITE_PRAGMAS', {})):
+            self.connection.execute(statement)
+
+    def _start_transaction_under_autocommit(self):
+        if self.begin_mode:
+            self.cursor().execute(f"BEGIN {self.begin_mode}")
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,266 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.response import Response
+
+from . import metrics
+
+CAROUSEL_MODEL = 'students.CarouselImage'
+
+
+def active_carousel():
+    """
+    Returns ``(body, etag)`` for the active carousel, rendering it only on a cache miss.
+
+    The entry is keyed by CarouselImage's version, which signals bump on every
+    change like the reference data's below, and expires after
+    REFERENCE_CACHE_TIMEOUT, so a render that raced a write is never served
+    for long.
+    """
+    key = f"carousel:active:{model_versions([CAROUSEL_MODEL])[0]}"
+    cached = cache.get(key)
+    metrics.record_cache_lookup('carousel', 'active', cached is not None)
+    if cached is None:
+        from .models import CarouselImage
+        from .serializers import CarouselImageSerializer
+
+        images = CarouselImage.objects.filter(is_active=True).order_by('pk')
+        body = JSONRenderer().render(CarouselImageSerializer(images, many=True).data)
+        cached = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        cache.set(key, cached, reference_cache_timeout())
+    return cached
+
+
+def carousel_cache_control():
+    return f"public, max-age={getattr(settings, 'CAROUSEL_CACHE_MAX_AGE', 3600)}"
+
+
+# Reference data: departments, degrees, courses, department-courses and roles.
+#
+# Cached payloads are keyed by the version of every model they are built from.
+# record_changes() bumps a model's version on each write, so stale entries are
+# never read again and simply age out; nothing has to find and delete them.
+
+REFERENCE_MODELS = (
+    'students.Department', 'students.Degree', 'students.Course', 'students.DepartmentCourse', 'students.Role',
+)
+REFERENCE_CACHE_PREFIX = 'refcache'
+
+
+def reference_cache_timeout():
+    return getattr(settings, 'REFERENCE_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+def _incr(key, delta=1):
+    """``cache.incr`` that creates the counter on first use, on any backend."""
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        if cache.add(key, delta, None):
+            return delta
+        return cache.incr(key, delta)
+
+
+def _version_key(label):
+    return f"{REFERENCE_CACHE_PREFIX}:version:{label.lower()}"
+
+
+def model_versions(labels):
+    """
+    Returns the current version of each model label, in order.
+
+    A missing version starts from the clock rather than from 1, so a version
+    evicted from the cache can never come back as one that is still in use.
+    """
+    keys = [_version_key(label) for label in labels]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_model_version(label):
+    key = _version_key(label)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def record_cache_lookup(namespace, hit):
+    _incr(f"{REFERENCE_CACHE_PREFIX}:{'hits' if hit else 'misses'}:{namespace}")
+    metrics.record_cache_lookup('reference', namespace, hit)
+
+
+def reference_cache_stats(namespaces):
+    """Returns ``{namespace: {'hits': n, 'misses': n}}``, as seen by the configured cache backend."""
+    keys = {
+        (namespace, counter): f"{REFERENCE_CACHE_PREFIX}:{counter}:{namespace}"
+        for namespace in namespaces
+        for counter in ('hits', 'misses')
+    }
+    values = cache.get_many(keys.values())
+    stats = {}
+    for (namespace, counter), key in keys.items():
+        stats.setdefault(namespace, {})[counter] = values.get(key, 0)
+    return stats
+
+
+def payload_key(namespace, labels, url, renderer_format=''):
+    versions = '.'.join(str(version) for version in model_versions(labels))
+    digest = hashlib.sha256(f"{url}|{renderer_format}".encode()).hexdigest()[:32]
+    return f"{REFERENCE_CACHE_PREFIX}:{namespace}:{versions}:{digest}"
+
+
+class ReferenceCacheMixin:
+    """
+    Read-through cache for ``list`` and ``retrieve`` on a ModelViewSet.
+
+    The serialized payload is cached per absolute URL (so pagination cursors
+    and query parameters get their own entries) and negotiated format, under
+    the versions of ``cache_models``, which default to the viewset's own model.
+
+    Listed before ConditionalGetMixin, the validators it sets are cached with
+    the payload, so a hit answers conditional requests without a query too.
+    """
+
+    cache_models = None
+
+    def get_cache_models(self):
+        return self.cache_models or (self.queryset.model._meta.label,)
+
+    def cached_response(self, request, render):
+        namespace = self.queryset.model._meta.model_name
+        key = payload_key(
+            namespace, self.get_cache_models(), request.build_absolute_uri(), request.accepted_renderer.format,
+        )
+        cached = cache.get(key)
+        record_cache_lookup(namespace, cached is not None)
+        if cached is not None:
+            data, headers = cached
+            response = get_conditional_response(
+                request, etag=headers.get('ETag'), last_modified=parse_http_date_safe(headers.get('Last-Modified')),
+            ) or Response(data)
+            for name, value in headers.items():
+                response[name] = value
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = render()
+        if response.status_code == 200:
+            headers = {name: response[name] for name in ('ETag', 'Last-Modified') if response.has_header(name)}
+            cache.set(key, (response.data, headers), reference_cache_timeout())
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(ReferenceCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(ReferenceCacheMixin, self).retrieve(request, *args, **kwargs))
+
+
+# Conditional GET: every model served by the API carries ``updated_at`` and a
+# TableVersion counter, which are all a list or detail validator needs.
+
+VERSIONED_MODELS = (
+    'students.Department', 'students.Degree', 'students.Course', 'students.ClassGroup',
+    'students.DepartmentCourse', 'students.Student', 'students.Teacher', 'students.HOD',
+    'students.CarouselImage', 'students.Assignment', 'students.Submission', 'students.Role',
+    'students.RoleAssignment',
+)
+CACHED_MODELS = (*REFERENCE_MODELS, CAROUSEL_MODEL)
+
+
+def record_changes(labels):
+    """
+    Announces a write to the models in ``labels``, e.g. after a ``bulk_create``.
+
+    Bumps their TableVersion, which the ETags are built from, and the cache
+    version of those in CACHED_MODELS. The cache version is bumped now for
+    readers in the same transaction, and again on commit so a payload cached
+    from the pre-commit rows by another request is dropped too.
+    """
+    from .models import TableVersion
+
+    labels = list(labels)
+    TableVersion.bump(*labels)
+    cached = [label for label in labels if label in CACHED_MODELS]
+    for label in cached:
+        bump_model_version(label)
+    if cached:
+        transaction.on_commit(lambda: [bump_model_version(label) for label in cached])
+
+
+def make_etag(request, *parts):
+    """Strong ETag over ``parts``, the URL and the negotiated format (JSON and the browsable API differ)."""
+    renderer = getattr(request, 'accepted_renderer', None)
+    key = '|'.join(str(part) for part in (*parts, request.build_absolute_uri(), getattr(renderer, 'format', '')))
+    return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+
+class ConditionalGetMixin:
+    """
+    Answers ``If-None-Match``/``If-Modified-Since`` on ``list`` and ``retrieve`` with 304.
+
+    Lists are validated by their table's change counter, detail routes by the
+    row's ``updated_at``; either costs one indexed query, and on a match the
+    main query and the serializer never run.
+    """
+
+    def list_validators(self):
+        from .models import TableVersion
+
+        model = self.queryset.model
+        version, changed_at = TableVersion.current(model)
+        return make_etag(self.request, model._meta.label_lower, version), changed_at
+
+    def detail_validators(self):
+        model = self.queryset.model
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        try:
+            updated_at = model._default_manager.filter(**{self.lookup_field: lookup}).values_list(
+                'updated_at', flat=True
+            ).first()
+        except (TypeError, ValueError):
+            updated_at = None
+        if updated_at is None:
+            # Unknown row: let the view produce its 404.
+            return None, None
+        return make_etag(self.request, model._meta.label_lower, lookup, updated_at.isoformat()), updated_at
+
+    def conditional_response(self, request, validators, render):
+        etag, last_modified = validators()
+        if etag is None:
+            return render()
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        metrics.record_cache_lookup('conditional_get', self.queryset.model._meta.model_name, not_modified is not None)
+        if not_modified is not None:
+            return not_modified
+
+        response = render()
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, self.list_validators, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, self.detail_validators,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
@@ -0,0 +1,74 @@
+import contextlib
+import re
+
+from django.conf import settings
+from django.db import transaction
+
+PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE = re.compile(r'^-?\w+$')
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+def sqlite_pragma_statements(pragmas):
+    """
+    ``PRAGMA name = value`` statements for SQLITE_PRAGMAS; names and values are validated, not quoted.
+
+    Pragmas set to None or '' are left alone.
+    """
+    statements = []
+    for name, value in pragmas.items():
+        if value is None or value == '':
+            continue
+        value = str(value)
+        if not PRAGMA_NAME.match(name) or not PRAGMA_VALUE.match(value):
+            raise ValueError(f"Invalid SQLite pragma {name!r} = {value!r}.")
+        statements.append(f"PRAGMA {name} = {value}")
+    return statements
+
+
+def sqlite_transaction_mode():
+    """SQLITE_TRANSACTION_MODE in upper case, or None for SQLite's default (DEFERRED)."""
+    mode = getattr(settings, 'SQLITE_TRANSACTION_MODE', None)
+    if not mode:
+        return None
+    if mode.upper() not in TRANSACTION_MODES:
+        raise ValueError(f"Invalid SQLite transaction mode {mode!r}.")
+    return mode.upper()
+
+
+@contextlib.contextmanager
+def write_atomic(using=None, savepoint=True):
+    """
+    ``transaction.atomic()`` for a block that writes.
+
+    On the students SQLite backend the outermost block starts with ``BEGIN
+    <SQLITE_TRANSACTION_MODE>``, so it takes the write lock up front and waits
+    out busy_timeout instead of failing when its read snapshot went stale.
+    Read-only blocks keep using ``atomic()`` and never hold the write lock.
+    Nested in another block, or on other backends, it is plain ``atomic()``.
+    """
+    connection = transaction.get_connection(using)
+    outermost = hasattr(connection, 'begin_mode') and not connection.in_atomic_block
+    if outermost:
+        connection.begin_mode = sqlite_transaction_mode()
+    try:
+        with transaction.atomic(using=using, savepoint=savepoint):
+            if outermost:
+                connection.begin_mode = None
+            yield
+    finally:
+        if outermost:
+            connection.begin_mode = None
+
+
+def sqlite_pragma_values(connection, names):
+    """Current values of the given pragmas on ``connection``, e.g. to check that the profile applied."""
+    values = {}
+    with connection.cursor() as cursor:
+        for name in names:
+            if not PRAGMA_NAME.match(name):
+                raise ValueError(f"Invalid SQLite pragma {name!r}.")
+            cursor.execute(f"PRAGMA {name}")
+            row = cursor.fetchone()
+            values[name] = row[0] if row else None
+    return values
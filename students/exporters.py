@@ -0,0 +1,50 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+EXPORT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class _Echo:
+    """File-like object whose write() just returns the line, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_columns(model):
+    """Returns ``(header, column)`` pairs for a model's concrete fields, FKs as their ids."""
+    return [(field.name, field.attname) for field in model._meta.concrete_fields]
+
+
+def iter_export(queryset, fmt, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields a CSV or NDJSON export of ``queryset`` line by line.
+
+    Rows are read as tuples through a server-side iterator, so only
+    ``chunk_size`` rows are held in memory at a time.
+    """
+    headers, columns = zip(*export_columns(queryset.model))
+    rows = queryset.order_by('pk').values_list(*columns).iterator(chunk_size=chunk_size)
+
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        encoder = DjangoJSONEncoder()
+        for row in rows:
+            yield encoder.encode(dict(zip(headers, row))) + '\n'
+
+
+def streaming_export_response(queryset, fmt, filename):
+    response = StreamingHttpResponse(iter_export(queryset, fmt), content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
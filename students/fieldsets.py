@@ -0,0 +1,207 @@
+import functools
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from .instrumentation import timed
+
+FIELDS_QUERY_PARAM = 'fields'
+
+# Field types whose database value already is their JSON representation
+PASS_THROUGH_FIELDS = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.ChoiceField,
+    serializers.JSONField, serializers.PrimaryKeyRelatedField,
+)
+# Field types that only need ``to_representation`` on the database value
+CONVERTED_FIELDS = (serializers.DateTimeField, serializers.DateField, serializers.TimeField)
+
+
+def requested_fields(request):
+    """Returns the names listed in ``?fields=a,b,c``, or None when every field is wanted (also for ``?fields=``)."""
+    value = request.query_params.get(FIELDS_QUERY_PARAM)
+    if value is None:
+        return None
+    return [name for name in (part.strip() for part in value.split(',')) if name] or None
+
+
+def restrict_fields(serializer, names):
+    """Drops every field of ``serializer`` (or its list child) that is not in ``names``."""
+    serializer = getattr(serializer, 'child', serializer)
+    unknown = [name for name in names if name not in serializer.fields]
+    if unknown:
+        raise ValidationError({FIELDS_QUERY_PARAM: [f"Unknown field(s): {', '.join(unknown)}."]})
+    for name in list(serializer.fields):
+        if name not in names:
+            serializer.fields.pop(name)
+
+
+class ValuesPlan:
+    """
+    Renders a ModelSerializer's output straight from ``QuerySet.values()`` rows.
+
+    Built from the serializer's (possibly sparse) fields, it selects only the
+    columns those fields read and skips model instances and the per-field
+    serializer machinery. ``for_serializer_class`` returns None for anything
+    it can't reproduce exactly (method fields, many-to-many fields, dotted
+    sources, custom ``to_representation``), so callers fall back to the
+    serializer.
+    """
+
+    def __init__(self, columns, fields):
+        self.columns = columns
+        self.fields = fields  # [(output name, column, converter or None)]
+
+    @classmethod
+    def for_serializer_class(cls, serializer_class, names=None, request=None, extra_columns=()):
+        compiled = compile_values_plan(serializer_class, None if names is None else tuple(names))
+        if compiled is None:
+            return None
+        columns, specs = compiled
+        fields = []
+        for name, column, field, model_field in specs:
+            if isinstance(field, serializers.FileField):
+                converter = cls.file_converter(field, model_field, request)
+            elif isinstance(field, CONVERTED_FIELDS):
+                converter = cls.temporal_converter(field)
+            else:
+                converter = None
+            fields.append((name, column, converter))
+        return cls(list(dict.fromkeys([*extra_columns, *columns])), fields)
+
+    @staticmethod
+    def temporal_converter(field):
+        """``field.to_representation`` minus its per-value format and timezone lookups, for ISO 8601 output."""
+        if isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        elif isinstance(field, serializers.DateField):
+            output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+        else:
+            output_format = getattr(field, 'format', api_settings.TIME_FORMAT)
+        if output_format is None or output_format.lower() != ISO_8601:
+            return field.to_representation
+        if not isinstance(field, serializers.DateTimeField):
+            return lambda value: value.isoformat()
+
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if field_timezone is None:
+            return field.to_representation
+
+        def converter(value):
+            value = value.astimezone(field_timezone).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return converter
+
+    @staticmethod
+    def file_converter(field, model_field, request):
+        if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+            return lambda name: name or None
+        storage = model_field.storage
+
+        def converter(name):
+            if not name:
+                return None
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+        return converter
+
+    def render(self, rows):
+        rendered = []
+        with timed('serialize'):
+            for row in rows:
+                item = {}
+                for name, column, converter in self.fields:
+                    value = row[column]
+                    item[name] = value if converter is None or value is None else converter(value)
+                rendered.append(item)
+        return rendered
+
+
+@functools.lru_cache(maxsize=256)
+def compile_values_plan(serializer_class, names):
+    """
+    The request-independent part of a ValuesPlan: ``(columns, [(name, column, field, model_field)])``.
+
+    Building a ModelSerializer's fields costs more than rendering a small
+    page, so it happens once per serializer class and fieldset.
+    """
+    serializer = serializer_class()
+    if type(serializer).to_representation is not serializers.Serializer.to_representation:
+        return None
+    if names is not None:
+        restrict_fields(serializer, names)
+
+    model = serializer.Meta.model
+    columns = []
+    specs = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if not isinstance(field, (serializers.FileField, *CONVERTED_FIELDS, *PASS_THROUGH_FIELDS)):
+            return None
+        if field.source == 'pk':
+            model_field = model._meta.pk
+        else:
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete or model_field.many_to_many:
+                return None
+        column = 'pk' if model_field.primary_key else model_field.attname
+        columns.append(column)
+        specs.append((name, column, field, model_field))
+    return columns, specs
+
+
+class SparseFieldsetMixin:
+    """
+    ``?fields=a,b`` on every read, and a ``values()`` fast path for ``list``.
+
+    Reads only: a write always returns the full representation. Reads render
+    through ``serialized()``, the ``serialize`` span of a measured request.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        names = requested_fields(self.request) if self.request.method in ('GET', 'HEAD') else None
+        if names is not None:
+            restrict_fields(serializer, names)
+        return serializer
+
+    def serialized(self, serializer):
+        with timed('serialize'):
+            return serializer.data
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        response = self.list_values(queryset)
+        if response is not None:
+            return response
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.serialized(self.get_serializer(page, many=True)))
+        return Response(self.serialized(self.get_serializer(queryset, many=True)))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self.serialized(self.get_serializer(self.get_object())))
+
+    def list_values(self, queryset):
+        """Paginated list response rendered through ValuesPlan, or None if the serializer needs the slow path."""
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        names = requested_fields(self.request) if self.request.method in ('GET', 'HEAD') else None
+        plan = ValuesPlan.for_serializer_class(
+            self.get_serializer_class(), names, self.request, extra_columns=[field.lstrip('-') for field in ordering],
+        )
+        if plan is None:
+            return None
+
+        rows = queryset.prefetch_related(None).values(*plan.columns)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.render(page))
+        return Response(plan.render(rows))
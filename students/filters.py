@@ -0,0 +1,50 @@
+from django_filters import rest_framework as filters
+
+from .models import Assignment, Student, Submission, Teacher
+
+# Foreign keys are filtered by id with NumberFilter rather than the default
+# ModelChoiceFilter, which would run an extra query to load the related row.
+# Every filter is backed by an index leading with its column; see the
+# models' Meta.indexes and QueryPlanTests.
+
+
+class StudentFilter(filters.FilterSet):
+    degree = filters.NumberFilter()
+    class_group = filters.NumberFilter()
+    is_graduated = filters.BooleanFilter(method='filter_is_graduated')
+
+    class Meta:
+        model = Student
+        fields = ['degree', 'class_group', 'enrollment_year', 'is_graduated', 'gender', 'state']
+
+    def filter_is_graduated(self, queryset, name, value):
+        # ``is_graduated=True`` compiles to a bare ``WHERE is_graduated``, which
+        # SQLite can't match against student_graduated_idx; ``IN`` can.
+        return queryset.filter(is_graduated__in=[value])
+
+
+class TeacherFilter(filters.FilterSet):
+    department = filters.NumberFilter()
+
+    class Meta:
+        model = Teacher
+        fields = ['department', 'designation']
+
+
+class AssignmentFilter(filters.FilterSet):
+    class_group = filters.NumberFilter()
+    due_date = filters.DateFromToRangeFilter()  # ?due_date_after=&due_date_before=
+
+    class Meta:
+        model = Assignment
+        fields = ['class_group', 'due_date']
+
+
+class SubmissionFilter(filters.FilterSet):
+    assignment = filters.NumberFilter()
+    student = filters.NumberFilter()
+    submitted_at = filters.IsoDateTimeFromToRangeFilter()  # ?submitted_at_after=&submitted_at_before=
+
+    class Meta:
+        model = Submission
+        fields = ['assignment', 'student', 'submitted_at']
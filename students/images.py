@@ -0,0 +1,60 @@
+import functools
+import io
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+VARIANT_WIDTHS = (480, 960, 1600)
+QUALITY = {'avif': 60, 'webp': 80, 'jpeg': 82}
+EXTENSIONS = {'avif': '.avif', 'webp': '.webp', 'jpeg': '.jpg'}
+
+
+def _encodes(fmt):
+    # features.check() warns about names a Pillow version doesn't know (AVIF before 11.2)
+    if fmt in features.modules:
+        return features.check_module(fmt)
+    if fmt in features.codecs:
+        return features.check_codec(fmt)
+    return False
+
+
+@functools.lru_cache(maxsize=None)
+def variant_formats():
+    """Modern formats this Pillow build can encode, always followed by a JPEG fallback; checked once."""
+    return tuple(fmt for fmt in ('avif', 'webp') if _encodes(fmt)) + ('jpeg',)
+
+
+def build_variants(field_file, widths=VARIANT_WIDTHS):
+    """
+    Renders resized copies of an uploaded image once, in every supported format.
+
+    Returns ``(width, height, variants)`` where ``variants`` maps a format to
+    ``{width: storage name}``. Images are never upscaled: widths larger than
+    the original collapse into one variant at the original width.
+    """
+    field_file.open('rb')
+    try:
+        with Image.open(field_file) as original:
+            original = ImageOps.exif_transpose(original)
+            if original.mode not in ('RGB', 'RGBA'):
+                original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+            width, height = original.size
+
+            sizes = sorted({min(target, width) for target in widths})
+            variants = {}
+            for fmt in variant_formats():
+                variants[fmt] = {}
+                for target in sizes:
+                    resized = original.resize((target, max(round(height * target / width), 1)), Image.LANCZOS)
+                    if fmt == 'jpeg' and resized.mode != 'RGB':
+                        resized = resized.convert('RGB')
+                    buffer = io.BytesIO()
+                    options = {'optimize': True, 'progressive': True} if fmt == 'jpeg' else {}
+                    resized.save(buffer, format=fmt.upper(), quality=QUALITY[fmt], **options)
+                    name = field_file.storage.save(
+                        f"variant_{target}{EXTENSIONS[fmt]}", ContentFile(buffer.getvalue()),
+                    )
+                    variants[fmt][str(target)] = name
+    finally:
+        field_file.close()
+    return width, height, variants
@@ -0,0 +1,155 @@
+import csv
+import io
+import itertools
+import json
+import os
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+
+from .database import write_atomic
+from .models import ClassGroup, Degree, Student, StudentSummary, TableVersion
+from .serializers import StudentImportSerializer
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000  # Keeps the report bounded when a whole file is rejected
+
+FORMATS = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+
+def detect_format(filename, fmt=None):
+    """Returns 'csv' or 'ndjson' from an explicit format or the file extension."""
+    if fmt:
+        fmt = fmt.lower()
+        if fmt not in ('csv', 'ndjson'):
+            raise ValueError(f"Unsupported format '{fmt}'. Use 'csv' or 'ndjson'.")
+        return fmt
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension not in FORMATS:
+        raise ValueError("Could not detect the file format. Pass format=csv or format=ndjson.")
+    return FORMATS[extension]
+
+
+def iter_records(stream, fmt):
+    """
+    Yields ``(row_number, record)`` pairs from a binary stream, one line at a time.
+
+    ``record`` is a dict of field values, or a string describing why the line
+    could not be parsed. Empty CSV cells are dropped so model defaults apply.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        if fmt == 'csv':
+            for row_number, row in enumerate(csv.DictReader(text), start=1):
+                yield row_number, {key: value for key, value in row.items() if key and value not in (None, '')}
+        else:
+            row_number = 0
+            for line in text:
+                if not line.strip():
+                    continue
+                row_number += 1
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    yield row_number, f"Invalid JSON: {exc}"
+                    continue
+                if not isinstance(record, dict):
+                    yield row_number, "Each line must be a JSON object."
+                    continue
+                yield row_number, record
+    finally:
+        # Leave the underlying upload/file open for its owner to close.
+        text.detach()
+
+
+def _prefetch_related(records):
+    """Loads every Degree and ClassGroup referenced by a chunk in two queries."""
+    prefetched = {}
+    for model, field in ((Degree, 'degree'), (ClassGroup, 'class_group')):
+        pks = set()
+        for record in records:
+            try:
+                pks.add(model._meta.pk.to_python(record.get(field)))
+            except ValidationError:
+                continue
+        pks.discard(None)
+        prefetched[model] = model.objects.in_bulk(pks)
+    return prefetched
+
+
+def _insert(rows):
+    """Writes a validated chunk, retrying row by row if the batch hits a constraint."""
+    students = [student for _, student in rows]
+    try:
+        with write_atomic():
+            Student.assign_student_ids(students)
+            Student.objects.bulk_create(students)
+            TableVersion.bump(Student)
+            StudentSummary.add(students)
+        return len(students), []
+    except IntegrityError:
+        for student in students:
+            student.student_id = ''
+
+    created = 0
+    errors = []
+    for row_number, student in rows:
+        try:
+            with write_atomic():
+                student.save()
+            created += 1
+        except IntegrityError as exc:
+            errors.append({'row': row_number, 'errors': {'non_field_errors': [str(exc)]}})
+    return created, errors
+
+
+def import_students(stream, fmt, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Streams students from a CSV or NDJSON binary stream into the database.
+
+    Rows are validated with StudentSerializer's rules and written with
+    ``bulk_create`` one chunk at a time, so memory use depends on the chunk
+    size rather than the file size. Invalid rows are reported and skipped.
+    ``progress(rows_read, report)`` is called after every chunk.
+    """
+    report = {'created': 0, 'failed': 0, 'errors': []}
+
+    def record_error(row_number, errors):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'row': row_number, 'errors': errors})
+
+    records = iter_records(stream, fmt)
+    rows_read = 0
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            break
+
+        context = {'prefetched': _prefetch_related([record for _, record in chunk if isinstance(record, dict)])}
+        valid = []
+        for row_number, record in chunk:
+            if not isinstance(record, dict):
+                record_error(row_number, {'non_field_errors': [record]})
+                continue
+            serializer = StudentImportSerializer(data=record, context=context)
+            if serializer.is_valid():
+                valid.append((row_number, Student(**serializer.validated_data)))
+            else:
+                record_error(row_number, serializer.errors)
+
+        if valid:
+            created, errors = _insert(valid)
+            report['created'] += created
+            for error in errors:
+                record_error(error['row'], error['errors'])
+
+        rows_read += len(chunk)
+        if progress is not None:
+            progress(rows_read, report)
+
+    return report
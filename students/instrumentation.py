@@ -0,0 +1,224 @@
+import contextvars
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('students.performance')
+slow_query_logger = logging.getLogger('students.slow_queries')
+
+MIDDLEWARE_PATHS = ('students.instrumentation.RequestTimingMiddleware', 'students.metrics.MetricsMiddleware')
+SLOWEST_SQL_LOG_LENGTH = 500
+SLOW_QUERY_LOG_LENGTH = 4000
+
+# Measurements of the request being served, None when it isn't sampled. A
+# context variable rather than a thread local, so the ORM calls an async
+# view makes through sync_to_async are counted too.
+_current = contextvars.ContextVar('request_timing', default=None)
+# The request being served, sampled or not, for the slow-query log
+_request = contextvars.ContextVar('request', default=None)
+
+
+class RequestTiming:
+    """Query count, SQL time, the slowest statement and named spans of one request."""
+
+    def __init__(self, request=None):
+        self.request = request
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.slowest_sql_time = 0.0
+        self.slowest_sql = ''
+        self.spans = {}
+        self.open_spans = set()
+        self.render_started = None
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.sql_time += duration
+        if duration > self.slowest_sql_time:
+            self.slowest_sql_time = duration
+            self.slowest_sql = sql
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def add_span(self, name, duration):
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+
+    def rendered(self, response):
+        # Post-render callback of a DRF/template response
+        if self.render_started is not None:
+            self.add_span('render', time.perf_counter() - self.render_started)
+        return None
+
+
+def sampled():
+    rate = settings.REQUEST_TIMING_SAMPLE_RATE
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def start(request):
+    """
+    Starts serving ``request``; returns its RequestTiming, None unless it is sampled, and a token for ``stop()``.
+
+    REQUEST_TIMING_SAMPLE_RATE decides the share of requests measured; the
+    others only pay for a random number. Both middlewares share one decision:
+    the inner one gets the outer one's RequestTiming and a None token.
+    """
+    if _request.get() is request:
+        return _current.get(), None
+    timing = RequestTiming(request) if sampled() else None
+    return timing, (_request.set(request), _current.set(timing))
+
+
+def stop(token):
+    if token is not None:
+        request_token, timing_token = token
+        _current.reset(timing_token)
+        _request.reset(request_token)
+
+
+@contextmanager
+def timed(name):
+    """
+    Adds the time spent in the block to span ``name`` of the current request, if it is sampled.
+
+    Nested blocks of the same span (a serializer rendering another one) are
+    counted once.
+    """
+    timing = _current.get()
+    if timing is None or name in timing.open_spans:
+        yield
+        return
+    timing.open_spans.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.open_spans.discard(name)
+        timing.add_span(name, time.perf_counter() - started)
+
+
+def record_sql(execute, sql, params, many, context):
+    """Database execute wrapper: times statements for the sampled request and the slow-query log."""
+    timing = _current.get()
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if timing is None and threshold is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        if timing is not None:
+            timing.add_query(sql, duration)
+        if threshold is not None and duration * 1000 >= threshold:
+            log_slow_query(sql, duration, _request.get(), context['connection'])
+
+
+def log_slow_query(sql, duration, request, connection):
+    """One JSON line on the ``students.slow_queries`` logger; parameters are left out, they may be personal data."""
+    match = request.resolver_match if request is not None else None
+    slow_query_logger.warning(json.dumps({
+        'duration_ms': round(duration * 1000, 2),
+        'database': connection.alias,
+        'method': request.method if request is not None else None,
+        'path': request.path if request is not None else None,
+        'view': match.view_name if match else None,
+        'sql': sql[:SLOW_QUERY_LOG_LENGTH],
+    }))
+
+
+def instrument_connection(sender, connection, **kwargs):
+    """``connection_created`` receiver: adds ``record_sql`` to the connection's execute wrappers."""
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_sql)
+
+
+def install():
+    """
+    Hooks SQL timing into new database connections.
+
+    Called from ``StudentsConfig.ready()`` when one of the middlewares or the
+    slow-query log is enabled. The ``serialize`` span is timed by
+    SparseFieldsetMixin and ValuesPlan.render.
+    """
+    connection_created.connect(instrument_connection, dispatch_uid='students.instrument_connection')
+
+
+class RequestTimingMiddleware:
+    """
+    Measures a sample of requests (see ``start()``): queries, SQL time, serialization and rendering.
+
+    The numbers of a measured request
+    are sent as ``Server-Timing`` response headers (shown by the browser's
+    network panel) and logged as a JSON line on the ``students.performance``
+    logger. Spans overlap: queries the serializer triggers count in both
+    ``db`` and ``serialize``. ``db`` times statement execution; fetching
+    the rows (where SQLite does much of its work) falls in the surrounding
+    span. Streaming responses are measured until their first byte.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timing, token = start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            stop(token)
+        return response if timing is None else self.finish(request, response, timing)
+
+    async def __acall__(self, request):
+        timing, token = start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop(token)
+        return response if timing is None else self.finish(request, response, timing)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after every view and middleware hook ran
+        timing = _current.get()
+        if timing is not None:
+            timing.render_started = time.perf_counter()
+            response.add_post_render_callback(timing.rendered)
+        return response
+
+    def finish(self, request, response, timing):
+        total = timing.elapsed()
+        if settings.REQUEST_TIMING_HEADERS:
+            metrics = [f'db;dur={timing.sql_time * 1000:.1f};desc="{timing.queries} queries"']
+            if timing.queries:
+                metrics.append(f'db-slowest;dur={timing.slowest_sql_time * 1000:.1f}')
+            metrics += [f'{name};dur={duration * 1000:.1f}' for name, duration in sorted(timing.spans.items())]
+            metrics.append(f'total;dur={total * 1000:.1f}')
+            response['Server-Timing'] = ', '.join(metrics)
+
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'queries': timing.queries,
+            'sql_ms': round(timing.sql_time * 1000, 2),
+            'slowest_sql_ms': round(timing.slowest_sql_time * 1000, 2),
+            'slowest_sql': timing.slowest_sql[:SLOWEST_SQL_LOG_LENGTH],
+            **{f'{name}_ms': round(duration * 1000, 2) for name, duration in sorted(timing.spans.items())},
+        }))
+        return response
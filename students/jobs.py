@@ -0,0 +1,273 @@
+import os
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, close_old_connections, models
+from django.utils import timezone
+
+from .analytics import rebuild_summaries
+from .database import write_atomic
+from .importers import DEFAULT_CHUNK_SIZE, import_students
+from .models import Job, graduate_students, promote_students
+from .search import rebuild_search_index
+
+# Job kind -> task function
+TASKS = {}
+CLAIM_BATCH_SIZE = 10
+
+
+def task(name, max_attempts=3, standalone=False):
+    """
+    Registers a function as the job kind ``name``.
+
+    It is called as ``function(context, **job.params)`` and its return value
+    (anything JSON-serializable) becomes ``job.result``. Tasks that aren't safe
+    to run twice should set ``max_attempts=1``, or call
+    ``context.mark_committed()`` with the work that can't be repeated;
+    ``standalone`` kinds take no parameters and may be queued directly with
+    ``POST /api/jobs/``.
+    """
+    def register(function):
+        function.max_attempts = max_attempts
+        function.standalone = standalone
+        TASKS[name] = function
+        return function
+    return register
+
+
+class JobCancelled(Exception):
+    """Raised by ``JobContext.progress()`` once the job has been cancelled."""
+
+
+class JobContext:
+    """What a task gets to report progress with; also where it notices a cancellation."""
+
+    def __init__(self, job):
+        self.job = job
+
+    def progress(self, done, total=None, message='', cancellable=True):
+        """
+        Records ``done`` out of ``total`` units (``total=None`` when unknown) in one UPDATE.
+
+        Raises JobCancelled if cancellation was requested meanwhile, so call it
+        between units of work: whatever the task committed so far stays. Once
+        the last unit is committed, report with ``cancellable=False`` so the
+        job still finishes as succeeded.
+        """
+        jobs = Job.objects.filter(pk=self.job.pk)
+        if cancellable:
+            jobs = jobs.filter(cancel_requested=False)
+        updated = jobs.update(
+            progress_done=done, progress_total=total, message=message[:255], updated_at=timezone.now(),
+        )
+        if cancellable and not updated:
+            raise JobCancelled()
+
+    def mark_committed(self):
+        """
+        Records that the task committed work that must not run again.
+
+        Call it inside the transaction that commits the work: from then on the
+        job is never retried, automatically, as stale or with ``retry()``.
+        """
+        Job.objects.filter(pk=self.job.pk).update(work_committed=True)
+
+
+def enqueue(kind, params=None):
+    """Queues a job of a registered kind and returns it."""
+    if kind not in TASKS:
+        raise ValueError(f"Unknown job kind '{kind}'.")
+    return Job.objects.create(kind=kind, params=params or {}, max_attempts=TASKS[kind].max_attempts)
+
+
+def enqueue_import(upload, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Saves an uploaded file under ``imports/`` and queues its import."""
+    name = default_storage.save(f"imports/{os.path.basename(upload.name or 'students')}", upload)
+    return enqueue('import_students', {'name': name, 'fmt': fmt, 'chunk_size': chunk_size})
+
+
+def claim(worker):
+    """
+    Marks the next due job as running for ``worker`` and returns its id, or None if nothing is due.
+
+    The claim is a conditional UPDATE on the status, so when several workers
+    race for the same row exactly one of them gets it.
+    """
+    now = timezone.now()
+    due = (
+        Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+        .order_by('run_after', 'pk').values_list('pk', flat=True)[:CLAIM_BATCH_SIZE]
+    )
+    for pk in due:
+        if Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, attempts=models.F('attempts') + 1, started_at=now, updated_at=now,
+        ):
+            return pk
+    return None
+
+
+def _finish(job, status, **fields):
+    now = timezone.now()
+    Job.objects.filter(pk=job.pk, status=Job.RUNNING).update(status=status, finished_at=now, updated_at=now, **fields)
+    return status
+
+
+def run_job(job_id):
+    """
+    Runs a claimed job and records the outcome; returns the job's new status.
+
+    A failure is retried after ``JOB_RETRY_DELAY`` seconds, doubled on every
+    further attempt, until ``max_attempts`` is used up.
+    """
+    job = Job.objects.get(pk=job_id)
+    function = TASKS.get(job.kind)
+    try:
+        if function is None:
+            raise LookupError(f"Unknown job kind '{job.kind}'.")
+        result = function(JobContext(job), **job.params)
+    except JobCancelled:
+        return _finish(job, Job.CANCELLED, message='Cancelled.')
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            now = timezone.now()
+            delay = timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+            retriable = Job.objects.filter(pk=job.pk, status=Job.RUNNING, cancel_requested=False, work_committed=False)
+            if retriable.update(status=Job.QUEUED, error=error, worker='', run_after=now + delay, updated_at=now):
+                return Job.QUEUED
+        return _finish(job, Job.FAILED, error=error)
+    return _finish(job, Job.SUCCEEDED, result=result, error='')
+
+
+def run_in_worker(job_id):
+    """``run_job`` for a pool process, which keeps its database connection between jobs."""
+    close_old_connections()
+    try:
+        return run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def cancel(job):
+    """
+    Cancels a queued job at once; a running one stops at its next progress report.
+
+    Returns False if the job had already finished.
+    """
+    now = timezone.now()
+    if Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+        status=Job.CANCELLED, cancel_requested=True, message='Cancelled.', finished_at=now, updated_at=now,
+    ):
+        return True
+    return bool(Job.objects.filter(pk=job.pk, status=Job.RUNNING).update(cancel_requested=True, updated_at=now))
+
+
+def retry(job):
+    """
+    Queues a failed or cancelled job again with a fresh set of attempts.
+
+    Returns False for any other status, and for a job that committed work
+    which must not run twice.
+    """
+    now = timezone.now()
+    retriable = Job.objects.filter(pk=job.pk, status__in=(Job.FAILED, Job.CANCELLED), work_committed=False)
+    return bool(retriable.update(
+        status=Job.QUEUED, attempts=0, cancel_requested=False, progress_done=0, progress_total=None, message='',
+        result=None, error='', worker='', run_after=now, started_at=None, finished_at=None, updated_at=now,
+    ))
+
+
+def heartbeat(job_ids):
+    """Refreshes ``updated_at`` of the jobs a worker is running, so they aren't taken for stale."""
+    try:
+        Job.objects.filter(pk__in=list(job_ids), status=Job.RUNNING).update(updated_at=timezone.now())
+    except DatabaseError:
+        # SQLite: a job holds the write lock; the next poll tries again.
+        pass
+
+
+def requeue_stale(exclude=()):
+    """
+    Recovers running jobs whose worker stopped sending heartbeats (killed, machine restarted).
+
+    They are queued again while attempts remain and no work that must not
+    run twice was committed, otherwise failed, or cancelled if that was
+    requested. ``exclude`` takes the ids of the caller's own running jobs,
+    which are alive whatever their heartbeat says. Returns the number of jobs
+    recovered.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, updated_at__lt=now - timedelta(seconds=settings.JOB_STALE_AFTER))
+    exclude = list(exclude)
+    if exclude:
+        stale = stale.exclude(pk__in=exclude)
+    lost = 'The worker running this job stopped responding.'
+    recovered = stale.filter(cancel_requested=True).update(
+        status=Job.CANCELLED, message='Cancelled.', finished_at=now, updated_at=now,
+    )
+    recovered += stale.filter(attempts__lt=models.F('max_attempts'), work_committed=False).update(
+        status=Job.QUEUED, error=lost, worker='', run_after=now, updated_at=now,
+    )
+    recovered += stale.update(status=Job.FAILED, error=lost, finished_at=now, updated_at=now)
+    return recovered
+
+
+@task('promote_students')
+def promote_students_task(context, class_groups=None, dry_run=False):
+    # One transaction: a failed attempt leaves nothing behind to retry on top
+    # of, and a committed one is never run again.
+    context.progress(0, 1, 'Promoting students.')
+    with write_atomic():
+        plan = promote_students(class_groups, dry_run=dry_run)
+        if not dry_run:
+            context.mark_committed()
+    context.progress(1, 1, 'Promotion planned.' if dry_run else 'Students promoted.', cancellable=False)
+    return plan
+
+
+@task('graduate_students')
+def graduate_students_task(context, class_group=None, degree=None, enrollment_year=None):
+    context.progress(0, 1, 'Graduating students.')
+    report = graduate_students(class_group=class_group, degree=degree, enrollment_year=enrollment_year)
+    # Committed: too late to cancel (graduating again would change nothing anyway)
+    context.progress(1, 1, f"{report['graduated']} students graduated.", cancellable=False)
+    return report
+
+
+@task('import_students', max_attempts=1)
+def import_students_task(context, name, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Imports an upload saved by ``enqueue_import``; progress is counted in bytes of the file.
+
+    Every chunk commits on its own, so this is never retried automatically:
+    a second run would import the rows of the first again. The file is kept
+    until the import succeeds, for a manual retry.
+    """
+    size = default_storage.size(name)
+    with default_storage.open(name, 'rb') as stream:
+        def report_progress(rows_read, report):
+            if report['created']:
+                context.mark_committed()
+            context.progress(
+                min(stream.tell(), size), size,
+                f"{rows_read} rows read: {report['created']} created, {report['failed']} failed.",
+            )
+
+        report = import_students(stream, fmt, chunk_size=chunk_size, progress=report_progress)
+    default_storage.delete(name)
+    return report
+
+
+@task('rebuild_analytics', standalone=True)
+def rebuild_analytics_task(context):
+    headcounts, assignments = rebuild_summaries()
+    return {'headcount_rows': headcounts, 'assignment_rows': assignments}
+
+
+@task('rebuild_search_index', standalone=True)
+def rebuild_search_index_task(context):
+    if not rebuild_search_index():
+        raise RuntimeError("This database has no FTS5 search index; /api/search/ uses the ORM fallback.")
+    return {'rebuilt': True}
@@ -0,0 +1,115 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connection
+
+from students.database import sqlite_pragma_values, write_atomic
+from students.models import Student, TableVersion
+
+# What the SQLite profile replaces: Python's sqlite3 defaults
+UNTUNED_SQLITE_PRAGMAS = {'journal_mode': 'delete', 'synchronous': 'full', 'mmap_size': 0, 'cache_size': -2000}
+REPORTED_PRAGMAS = ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size')
+
+
+class Command(BaseCommand):
+    help = (
+        "Mixed read/write throughput of the configured database profile: worker threads run "
+        "request-sized reads (a page of a class group) and writes (a student update in a "
+        "transaction), closing their connection between requests as Django does. "
+        "Run it against a seeded database, once per profile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--write-share', type=float, default=0.2, help="Share of requests that write.")
+        parser.add_argument('--conn-max-age', type=int, default=None,
+                            help="Overrides CONN_MAX_AGE for the run (0 reconnects on every request).")
+        parser.add_argument('--untuned', action='store_true',
+                            help="SQLite only: run with rollback journal and default pragmas, for comparison.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if not 0 <= options['write_share'] <= 1:
+            raise CommandError("--write-share must be between 0 and 1.")
+        if options['untuned']:
+            if connection.vendor != 'sqlite':
+                raise CommandError("--untuned only applies to SQLite.")
+            settings.SQLITE_PRAGMAS = UNTUNED_SQLITE_PRAGMAS
+            settings.SQLITE_TRANSACTION_MODE = ''
+            connection.close()  # The next connection switches the journal mode back
+        if options['conn_max_age'] is not None:
+            # Shared by the connections every thread opens from now on
+            connection.settings_dict['CONN_MAX_AGE'] = options['conn_max_age']
+
+        students = list(Student.objects.values_list('pk', 'class_group_id'))
+        if not students:
+            raise CommandError("No students found; run seed_institution first.")
+        class_groups = sorted({class_group for _, class_group in students})
+        student_ids = [pk for pk, _ in students]
+
+        profile = f"{connection.vendor}, CONN_MAX_AGE={connection.settings_dict['CONN_MAX_AGE']}"
+        if connection.vendor == 'sqlite':
+            pragmas = sqlite_pragma_values(connection, REPORTED_PRAGMAS)
+            profile += ', ' + ', '.join(f"{name}={value}" for name, value in pragmas.items())
+            profile += f", transactions={settings.SQLITE_TRANSACTION_MODE or 'DEFERRED'}"
+        connection.close()
+        self.stdout.write(f"{profile}\n{options['threads']} threads, {options['seconds']}s, "
+                          f"{options['write_share']:.0%} writes:")
+
+        results = []
+        deadline = time.perf_counter() + options['seconds']
+        threads = [
+            threading.Thread(target=self.worker, args=(
+                random.Random(options['seed'] + i), deadline, options['write_share'], class_groups, student_ids,
+                results,
+            ))
+            for i in range(options['threads'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        for kind in ('read', 'write'):
+            latencies = sorted(latency for result_kind, latency, error in results if result_kind == kind and not error)
+            errors = sum(1 for result_kind, _, error in results if result_kind == kind and error)
+            if not latencies:
+                self.stdout.write(f"  {kind}s: none completed, {errors} errors")
+                continue
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+            self.stdout.write(
+                f"  {kind}s: {len(latencies) / elapsed:.0f}/s, p50 {p50:.1f}ms, p99 {p99:.1f}ms, {errors} errors"
+            )
+
+    @staticmethod
+    def worker(rng, deadline, write_share, class_groups, student_ids, results):
+        outcomes = []
+        while time.perf_counter() < deadline:
+            kind = 'write' if rng.random() < write_share else 'read'
+            started = time.perf_counter()
+            error = None
+            try:
+                if kind == 'read':
+                    list(Student.objects.filter(class_group=rng.choice(class_groups)).order_by('pk').values(
+                        'pk', 'student_id', 'first_name', 'last_name', 'city',
+                    )[:50])
+                else:
+                    with write_atomic():
+                        Student.objects.filter(pk=rng.choice(student_ids)).update(
+                            phone=f"9{rng.randrange(10 ** 9):09d}",
+                        )
+                        TableVersion.bump(Student)
+            except DatabaseError as exc:  # "database is locked" under contention
+                error = exc
+            outcomes.append((kind, time.perf_counter() - started, error))
+            # End of "request": closes the connection unless CONN_MAX_AGE keeps it
+            close_old_connections()
+        connection.close()
+        results.extend(outcomes)
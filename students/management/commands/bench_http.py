@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent-request throughput of a running server: keeps --concurrency GET requests "
+        "in flight against each URL and reports requests/s and latency percentiles. Compare "
+        "the WSGI deployment (/api/students/) with the ASGI one (/api/async/students/)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+', help="Absolute URLs, e.g. http://127.0.0.1:8000/api/students/")
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per URL.")
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def handle(self, *args, **options):
+        try:
+            import httpx
+        except ImportError:
+            raise CommandError("bench_http needs httpx (pip install httpx).")
+        for url in options['urls']:
+            latencies, failures, elapsed = asyncio.run(
+                self.run(httpx, url, options['concurrency'], options['requests'], options['timeout'])
+            )
+            if not latencies:
+                self.stdout.write(f"{url}: every request failed ({failures})")
+                continue
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+            self.stdout.write(
+                f"{url}: {len(latencies) / elapsed:.0f} req/s at concurrency {options['concurrency']}, "
+                f"p50 {p50:.1f}ms, p99 {p99:.1f}ms, {failures} failed"
+            )
+
+    @staticmethod
+    async def run(httpx, url, concurrency, total, timeout):
+        latencies = []
+        failures = 0
+        remaining = iter(range(total))
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=0)
+
+        async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+            async def worker():
+                nonlocal failures
+                for _ in remaining:
+                    started = time.perf_counter()
+                    try:
+                        response = await client.get(url)
+                        ok = response.status_code == 200
+                    except httpx.HTTPError:
+                        ok = False
+                    if ok:
+                        latencies.append(time.perf_counter() - started)
+                    else:
+                        failures += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, failures, time.perf_counter() - started
@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from students.fieldsets import ValuesPlan, restrict_fields
+from students.models import Student, Teacher
+from students.serializers import StudentSerializer, TeacherSerializer
+
+TARGETS = {
+    'students': (Student, StudentSerializer),
+    'teachers': (Teacher, TeacherSerializer),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the per-row cost of list serialization: ModelSerializer over model instances "
+        "against the values() fast path, with every field and with a sparse fieldset. "
+        "Run it against a seeded database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', nargs='?', choices=sorted(TARGETS), default='students')
+        parser.add_argument('--rows', type=int, default=1000, help="Rows per run, like one large page.")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per case; the best one is reported.")
+        parser.add_argument('--fields', default=None,
+                            help="Sparse fieldset to compare, e.g. 'student_id,first_name'. "
+                                 "Defaults to the id and name fields.")
+
+    def handle(self, *args, **options):
+        model, serializer_class = TARGETS[options['target']]
+        queryset = model.objects.order_by('pk')[:options['rows']]
+        rows = queryset.count()
+        if not rows:
+            raise CommandError(f"No {options['target']} found; run seed_institution first.")
+
+        id_field = 'student_id' if model is Student else 'teacher_id'
+        sparse = [name.strip() for name in (options['fields'] or f"{id_field},first_name,last_name").split(',')]
+        try:
+            restrict_fields(serializer_class(), sparse)
+        except ValidationError as exc:
+            raise CommandError(exc.detail['fields'][0])
+
+        self.stdout.write(f"{rows} {options['target']}, best of {options['repeat']} runs (fetch + render):")
+        for label, fields in (('all fields', None), (f"fields={','.join(sparse)}", sparse)):
+            baseline = self.measure(options['repeat'], lambda: self.model_serializer(serializer_class, queryset, fields))
+            fast = self.measure(options['repeat'], lambda: self.values_path(serializer_class, queryset, fields))
+            self.stdout.write(
+                f"  {label}: ModelSerializer {baseline / rows * 1e6:.1f} us/row, "
+                f"values() {fast / rows * 1e6:.1f} us/row ({baseline / fast:.1f}x)"
+            )
+
+    @staticmethod
+    def measure(repeat, run):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    @staticmethod
+    def model_serializer(serializer_class, queryset, fields):
+        serializer = serializer_class(queryset, many=True)
+        if fields:
+            restrict_fields(serializer, fields)
+        return serializer.data
+
+    @staticmethod
+    def values_path(serializer_class, queryset, fields):
+        plan = ValuesPlan.for_serializer_class(serializer_class, fields)
+        return plan.render(queryset.values(*plan.columns))
@@ -0,0 +1,90 @@
+import logging
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+
+from students.models import Assignment, ClassGroup, Student
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the submission intake path with a deadline-minute spike: every student of a "
+        "class group submits at once, and a share of them retries. Run it against a seeded database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--class-group', type=int, help="Defaults to the class group with the most students.")
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--retry-rate', type=float, default=0.2,
+                            help="Share of students that submit a second time.")
+        parser.add_argument('--file-size', type=int, default=64 * 1024, help="Upload size in bytes.")
+
+    def handle(self, *args, **options):
+        class_group = self.pick_class_group(options['class_group'])
+        student_ids = list(Student.objects.filter(class_group=class_group).values_list('pk', flat=True))
+        if not student_ids:
+            raise CommandError("The class group has no students; run seed_institution first.")
+
+        retries = student_ids[:int(len(student_ids) * options['retry_rate'])]
+        payload = b'%PDF-1.4\n' + b'0' * max(options['file_size'] - 9, 0)
+        assignment = Assignment.objects.create(
+            title="Deadline spike benchmark", description="Created by bench_submissions",
+            due_date=date.today() + timedelta(days=1), class_group=class_group,
+        )
+        url = '/api/submissions/'
+
+        def submit(student_id):
+            client = Client()
+            started = time.perf_counter()
+            response = client.post(url, {
+                'student': student_id,
+                'assignment': assignment.pk,
+                'file': SimpleUploadedFile('answer.pdf', payload, content_type='application/pdf'),
+            })
+            elapsed = time.perf_counter() - started
+            connection.close()
+            return response.status_code, elapsed
+
+        # Every retry is an expected 409; don't log each one as a warning.
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        try:
+            with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                    results = list(pool.map(submit, student_ids + retries))
+                wall_time = time.perf_counter() - started
+        finally:
+            assignment.delete()
+
+        statuses = {}
+        for status_code, _ in results:
+            statuses[status_code] = statuses.get(status_code, 0) + 1
+        latencies = sorted(elapsed for _, elapsed in results)
+
+        self.stdout.write(f"{len(results)} requests ({len(retries)} retries) on {options['threads']} threads "
+                          f"in {wall_time:.2f}s: {len(results) / wall_time:.1f} req/s")
+        self.stdout.write(f"statuses: {dict(sorted(statuses.items()))}")
+        self.stdout.write(
+            f"latency ms: p50 {statistics.median(latencies) * 1000:.1f}, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}, "
+            f"max {latencies[-1] * 1000:.1f}"
+        )
+
+    def pick_class_group(self, pk):
+        if pk is not None:
+            try:
+                return ClassGroup.objects.get(pk=pk)
+            except ClassGroup.DoesNotExist:
+                raise CommandError(f"Class group {pk} does not exist.")
+        class_group = ClassGroup.objects.annotate(student_count=Count('student')).order_by('-student_count').first()
+        if class_group is None:
+            raise CommandError("No class groups found; run seed_institution first.")
+        return class_group
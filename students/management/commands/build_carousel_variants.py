@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from students.models import CarouselImage
+
+
+class Command(BaseCommand):
+    help = "Renders the resized variants for carousel images uploaded before variants existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Rebuild variants for every image.")
+
+    def handle(self, *args, **options):
+        images = CarouselImage.objects.all() if options['all'] else CarouselImage.objects.filter(variants={})
+        built = 0
+        for image in images.iterator():
+            if not image.image.storage.exists(image.image.name):
+                self.stderr.write(f"Skipping {image.pk}: {image.image.name} is missing.")
+                continue
+            image.build_variants()
+            built += 1
+        self.stdout.write(self.style.SUCCESS(f"Built variants for {built} carousel images."))
@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from students.importers import DEFAULT_CHUNK_SIZE, detect_format, import_students
+
+
+class Command(BaseCommand):
+    help = "Bulk-imports students from a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or NDJSON file with one student per row.")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="Defaults to the file extension.")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be a positive integer.")
+        try:
+            fmt = detect_format(options['path'], options['format'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        with open(options['path'], 'rb') as stream:
+            report = import_students(stream, fmt, chunk_size=options['chunk_size'])
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} students, {report['failed']} rows failed."
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from students.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Re-fills the full-text search index from the Student and Teacher tables."
+
+    def handle(self, *args, **options):
+        if not rebuild_search_index():
+            raise CommandError("This database has no FTS5 search index; /api/search/ uses the ORM fallback.")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from students.jobs import claim, heartbeat, requeue_stale, run_in_worker, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs queued background jobs (promotions, graduations, imports, rebuilds) in a pool of "
+        "worker processes. The Job table is the queue, so no broker is needed and several of "
+        "these commands can share it. SIGTERM stops claiming jobs and waits for the running ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.JOB_WORKERS,
+                            help="Worker processes; 0 runs the jobs one by one in this process.")
+        parser.add_argument('--poll-interval', type=float, default=settings.JOB_POLL_INTERVAL,
+                            help="Seconds between looks at the queue.")
+        parser.add_argument('--burst', action='store_true',
+                            help="Exit once no job is due instead of waiting for new ones.")
+
+    def handle(self, *args, **options):
+        if options['processes'] < 0:
+            raise CommandError("--processes can't be negative.")
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        try:
+            if options['processes'] == 0:
+                self.run_inline(worker, options['poll_interval'], options['burst'])
+            else:
+                self.run_pool(worker, options['processes'], options['poll_interval'], options['burst'])
+        except KeyboardInterrupt:
+            pass
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def report(self, job_id, status):
+        self.stdout.write(f"Job {job_id}: {status}")
+
+    def poll_failed(self, exc):
+        # SQLite: another process holds the write lock past busy_timeout. The
+        # queue is polled again after the next interval.
+        self.stderr.write(f"Polling the job queue failed: {exc}")
+
+    def run_inline(self, worker, poll_interval, burst):
+        while not self.stopping:
+            try:
+                requeue_stale()
+                job_id = claim(worker)
+            except DatabaseError as exc:
+                self.poll_failed(exc)
+                time.sleep(poll_interval)
+                continue
+            if job_id is not None:
+                self.report(job_id, run_job(job_id))
+            elif burst:
+                break
+            else:
+                time.sleep(poll_interval)
+
+    def run_pool(self, worker, processes, poll_interval, burst):
+        running = {}  # future -> job id
+        # Spawned processes inherit no database connections or locks. The
+        # initializer must not be in a module that imports models.
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(processes, mp_context=context, initializer=django.setup) as pool:
+            while not (self.stopping and not running):
+                polled = False
+                if not self.stopping:
+                    try:
+                        # Our own jobs are alive even if a heartbeat was lost to a locked database
+                        requeue_stale(exclude=running.values())
+                        while len(running) < processes:
+                            job_id = claim(worker)
+                            if job_id is None:
+                                break
+                            running[pool.submit(run_in_worker, job_id)] = job_id
+                        polled = True
+                    except DatabaseError as exc:
+                        self.poll_failed(exc)
+                if not running:
+                    if burst and polled:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        self.report(job_id, future.result())
+                    except BrokenProcessPool:
+                        # A worker process died (e.g. killed for memory). Its job is
+                        # requeued by requeue_stale() once its heartbeat is missing.
+                        raise CommandError(f"A worker process died while running job {job_id}.")
+                    except Exception as exc:
+                        # Recording the outcome failed; the job is recovered as stale.
+                        self.stderr.write(f"Job {job_id}: {exc!r}")
+                heartbeat(running.values())
+
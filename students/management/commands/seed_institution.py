@@ -0,0 +1,261 @@
+import random
+from collections import Counter
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from students.analytics import rebuild_summaries
+from students.caching import VERSIONED_MODELS, record_changes
+from students.database import write_atomic
+from students.models import (
+    HOD, Assignment, ClassGroup, Course, Degree, Department, DepartmentCourse, IdSequence, Role,
+    RoleAssignment, Student, Submission, SubmissionBlob, Teacher,
+)
+
+FIRST_NAMES = [
+    'Aarav', 'Aditi', 'Ananya', 'Arjun', 'Diya', 'Ishaan', 'Kavya', 'Krishna', 'Meera', 'Neha',
+    'Priya', 'Rahul', 'Riya', 'Rohan', 'Saanvi', 'Sai', 'Sneha', 'Vihaan', 'Vivaan', 'Zara',
+]
+LAST_NAMES = [
+    'Agarwal', 'Bhat', 'Chopra', 'Das', 'Gupta', 'Iyer', 'Joshi', 'Kapoor', 'Khan', 'Kumar',
+    'Mehta', 'Nair', 'Patel', 'Rao', 'Reddy', 'Sharma', 'Singh', 'Verma', 'Yadav', 'Zaidi',
+]
+PLACES = [
+    ('Pune', 'Maharashtra', '411'), ('Jaipur', 'Rajasthan', '302'), ('Lucknow', 'Uttar Pradesh', '226'),
+    ('Indore', 'Madhya Pradesh', '452'), ('Kochi', 'Kerala', '682'), ('Patna', 'Bihar', '800'),
+    ('Shimla', 'Himachal Pradesh', '171'), ('Mysuru', 'Karnataka', '570'),
+]
+DEGREES = [
+    ('Bachelor of Technology', 'BT', 4), ('Master of Technology', 'MT', 2), ('Bachelor of Science', 'BS', 3),
+    ('Master of Science', 'MS', 2), ('Bachelor of Arts', 'BA', 3), ('Master of Business Administration', 'MBA', 2),
+]
+DESIGNATIONS = ['Professor', 'Associate Professor', 'Assistant Professor', 'Lecturer']
+QUALIFICATIONS = ['PhD', 'M.Tech', 'M.Sc', 'MBA', 'M.Phil']
+ROLES = [
+    'Sports In-Charge', 'Club In-Charge', 'TPO', 'Hostel Warden', 'Exam Coordinator', 'Library In-Charge',
+    'Cultural Coordinator', 'NSS Coordinator', 'Anti-Ragging Officer', 'Alumni Coordinator',
+]
+# Batches, birth dates and due dates are counted back from this day, so a
+# seed gives the same dataset whenever it is run.
+REFERENCE_DATE = date(2025, 8, 1)
+
+
+class Command(BaseCommand):
+    help = "Generates a synthetic institution (departments through submissions) for benchmarks and load tests."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=5)
+        parser.add_argument('--degrees', type=int, default=2, help="Degrees per department.")
+        parser.add_argument('--courses', type=int, default=5, help="Courses per degree and year of study.")
+        parser.add_argument('--teachers', type=int, default=20, help="Teachers per department.")
+        parser.add_argument('--sections', type=int, default=1, help="Class groups per degree and batch.")
+        parser.add_argument('--students', type=int, default=1000, help="Total number of students.")
+        parser.add_argument('--assignments', type=int, default=3, help="Assignments per class group.")
+        parser.add_argument('--submission-rate', type=float, default=0.8,
+                            help="Share of a class group that submits each assignment.")
+        parser.add_argument('--roles', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--reference-date', type=date.fromisoformat, default=REFERENCE_DATE,
+                            help="The dataset's \"today\" (YYYY-MM-DD): the newest batch enrolls in its year.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if Department.objects.exists():
+            raise CommandError("The database already has departments; seed an empty database.")
+        if not 0 <= options['submission_rate'] <= 1:
+            raise CommandError("--submission-rate must be between 0 and 1.")
+        if options['roles'] > len(ROLES):
+            raise CommandError(f"--roles can be at most {len(ROLES)}.")
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.today = options['reference_date']
+
+        with write_atomic():
+            departments = self.create_departments(options['departments'])
+            degrees = self.create_degrees(departments, options['degrees'])
+            courses = self.create_courses(degrees, options['courses'])
+            teachers = self.create_teachers(departments, options['teachers'])
+            self.create_hods_and_roles(departments, teachers, options['roles'])
+            class_groups = self.create_class_groups(degrees, courses, teachers, options['sections'])
+            students = self.create_students(
+                class_groups, options['students'], options['assignments'], options['submission_rate'],
+            )
+            # bulk_create sends no signals, so the change counters are bumped by hand.
+            record_changes(VERSIONED_MODELS)
+            rebuild_summaries()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(departments)} departments, {len(degrees)} degrees, {len(courses)} courses, "
+            f"{sum(len(group) for group in teachers.values())} teachers, {len(class_groups)} class groups "
+            f"and {students} students."
+        ))
+
+    def person(self):
+        first_name = self.rng.choice(FIRST_NAMES)
+        last_name = self.rng.choice(LAST_NAMES)
+        city, state, pin_prefix = self.rng.choice(PLACES)
+        return {
+            'first_name': first_name,
+            'last_name': last_name,
+            'email': f"{first_name}.{last_name}{self.rng.randrange(10 ** 6)}@example.com".lower(),
+            'phone': f"9{self.rng.randrange(10 ** 9):09d}",
+            'village': f"{city} Rural",
+            'city': city,
+            'state': state,
+            'pin_code': f"{pin_prefix}{self.rng.randrange(1000):03d}",
+            'gender': self.rng.choice('MFO'),
+        }
+
+    def create_departments(self, count):
+        return Department.objects.bulk_create(
+            Department(name=f"Department {i}", description=f"Synthetic department {i}", code=f"D{i:02d}")
+            for i in range(1, count + 1)
+        )
+
+    def create_degrees(self, departments, per_department):
+        degrees = []
+        for department in departments:
+            for name, abbreviation, duration in self.rng.sample(DEGREES, min(per_department, len(DEGREES))):
+                degrees.append(Degree(
+                    name=f"{name} ({department.code})", duration=duration,
+                    department=department, abbreviation=abbreviation,
+                ))
+        return Degree.objects.bulk_create(degrees)
+
+    def create_courses(self, degrees, per_year):
+        courses = Course.objects.bulk_create(
+            Course(
+                name=f"{degree.abbreviation} Course {year}.{i}", description="Synthetic course",
+                credits=self.rng.randint(2, 5), degree=degree, year=year,
+            )
+            for degree in degrees
+            for year in range(1, degree.duration + 1)
+            for i in range(1, per_year + 1)
+        )
+
+        # bulk_create skips DepartmentCourse.save(), so reserve the codes in one block per department.
+        by_department = {}
+        for course in courses:
+            by_department.setdefault(course.degree.department, []).append(course)
+        department_courses = []
+        for department, group in by_department.items():
+            numbers = IdSequence.reserve(f"course:{department.code.upper()}", count=len(group))
+            department_courses.extend(
+                DepartmentCourse(course=course, department=department, course_code=f"{department.code.upper()}{number:03d}")
+                for course, number in zip(group, numbers)
+            )
+        DepartmentCourse.objects.bulk_create(department_courses, batch_size=self.batch_size)
+        return courses
+
+    def create_teachers(self, departments, per_department):
+        teachers = []
+        for department in departments:
+            for _ in range(per_department):
+                teachers.append(Teacher(
+                    department=department,
+                    dob=self.today - timedelta(days=self.rng.randint(30 * 365, 60 * 365)),
+                    joining_date=self.today - timedelta(days=self.rng.randint(0, 20 * 365)),
+                    designation=self.rng.choice(DESIGNATIONS),
+                    qualification=self.rng.choice(QUALIFICATIONS),
+                    **self.person(),
+                ))
+        Teacher.assign_teacher_ids(teachers)
+        Teacher.objects.bulk_create(teachers, batch_size=self.batch_size)
+
+        by_department = {}
+        for teacher in teachers:
+            by_department.setdefault(teacher.department_id, []).append(teacher)
+        return by_department
+
+    def create_hods_and_roles(self, departments, teachers, role_count):
+        HOD.objects.bulk_create(
+            HOD(teacher=teachers[department.pk][0], department=department)
+            for department in departments
+            if teachers.get(department.pk)
+        )
+
+        roles = Role.objects.bulk_create(Role(name=name, description=f"{name} duties") for name in ROLES[:role_count])
+        assignments = []
+        for department in departments:
+            candidates = teachers.get(department.pk, [])
+            for role, teacher in zip(roles, self.rng.sample(candidates, min(len(roles), len(candidates)))):
+                assignments.append(RoleAssignment(role=role, teacher=teacher, department=department))
+        RoleAssignment.objects.bulk_create(assignments)
+
+    def create_class_groups(self, degrees, courses, teachers, sections):
+        courses_by_year = {}
+        for course in courses:
+            courses_by_year.setdefault((course.degree_id, course.year), []).append(course)
+
+        class_groups = []
+        for degree in degrees:
+            for current_year in range(1, degree.duration + 1):
+                enrollment_year = self.today.year - current_year + 1
+                for section in range(1, sections + 1):
+                    class_groups.append(ClassGroup(
+                        name=f"{degree.abbreviation} {enrollment_year} {chr(64 + section)}",
+                        degree=degree, enrollment_year=enrollment_year, current_year=current_year,
+                        class_incharge=self.rng.choice(teachers[degree.department_id]) if teachers.get(degree.department_id) else None,
+                    ))
+        class_groups = ClassGroup.objects.bulk_create(class_groups)
+
+        Through = ClassGroup.courses.through
+        Through.objects.bulk_create(
+            (
+                Through(classgroup_id=class_group.pk, course_id=course.pk)
+                for class_group in class_groups
+                for course in courses_by_year.get((class_group.degree_id, class_group.current_year), [])
+            ),
+            batch_size=self.batch_size,
+        )
+        return class_groups
+
+    def create_students(self, class_groups, total, assignments_per_group, submission_rate):
+        if not class_groups:
+            return 0
+
+        created = 0
+        for index, class_group in enumerate(class_groups):
+            # Spread students evenly; the first groups take the remainder.
+            count = total // len(class_groups) + (1 if index < total % len(class_groups) else 0)
+            if not count:
+                continue
+
+            age = self.today.year - class_group.enrollment_year + 18
+            students = [
+                Student(
+                    father_name=f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}",
+                    dob=date(self.today.year - age, 1, 1) + timedelta(days=self.rng.randrange(365)),
+                    degree=class_group.degree, class_group=class_group,
+                    enrollment_year=class_group.enrollment_year,
+                    **self.person(),
+                )
+                for _ in range(count)
+            ]
+            Student.assign_student_ids(students)
+            students = Student.objects.bulk_create(students, batch_size=self.batch_size)
+            created += len(students)
+
+            assignments = Assignment.objects.bulk_create(
+                Assignment(
+                    title=f"{class_group.name} Assignment {i}", description="Synthetic assignment",
+                    due_date=self.today + timedelta(days=self.rng.randint(-30, 30)), class_group=class_group,
+                )
+                for i in range(1, assignments_per_group + 1)
+            )
+            submissions = (
+                Submission(student=student, assignment=assignment, file=f"submissions/{assignment.pk}_{student.pk}.pdf")
+                for assignment in assignments
+                for student in students
+                if self.rng.random() < submission_rate
+            )
+            submissions = Submission.objects.bulk_create(submissions, batch_size=self.batch_size)
+            # bulk_create skips the signal that counts references to a file
+            SubmissionBlob.objects.bulk_create(
+                (SubmissionBlob(name=name, ref_count=count)
+                 for name, count in Counter(submission.file.name for submission in submissions).items()),
+                batch_size=self.batch_size,
+            )
+
+        return created
@@ -0,0 +1,269 @@
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+
+from . import instrumentation
+
+# Seconds; Prometheus' default buckets stretched to the 30s gunicorn timeout
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests by route, method and status code.', None),
+    'http_request_duration_seconds': ('histogram', 'Request latency by route and method.', LATENCY_BUCKETS),
+    'db_queries_per_request': (
+        'histogram', 'Database queries per sampled request (REQUEST_TIMING_SAMPLE_RATE), by route and method.',
+        QUERY_COUNT_BUCKETS,
+    ),
+    'db_query_duration_seconds_total': (
+        'counter', 'Time spent executing database queries in sampled requests, by route and method.', None,
+    ),
+    'cache_requests_total': ('counter', 'Cache lookups by cache, namespace and result (hit or miss).', None),
+}
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class ValueFile:
+    """
+    The metric values of one process in a memory-mapped file, which any process can read.
+
+    Layout: the number of bytes in use (8 bytes), then one entry per key: the
+    key's length (4 bytes), the UTF-8 key padded to a multiple of 8 bytes and
+    the value (an 8-byte double). Only the owning process writes, and the
+    size in use is updated after an entry is complete, so a reader never
+    sees half of one.
+    """
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        self.file = open(path, 'a+b')
+        size = os.fstat(self.file.fileno()).st_size
+        if size == 0:
+            size = self.INITIAL_SIZE
+            self.file.truncate(size)
+        self.map = mmap.mmap(self.file.fileno(), size)
+        self.used = struct.unpack_from('<Q', self.map, 0)[0] or 8
+        # A file left by an earlier process with this pid is continued, not reset
+        self.positions = {key: position for key, position, _ in read_entries(self.map, self.used)}
+
+    def increment(self, key, amount):
+        position = self.positions.get(key)
+        if position is None:
+            position = self.add(key)
+        struct.pack_into('<d', self.map, position, struct.unpack_from('<d', self.map, position)[0] + amount)
+
+    def add(self, key):
+        encoded = key.encode()
+        header = 4 + len(encoded)
+        header += -header % 8
+        if self.used + header + 8 > len(self.map):
+            size = len(self.map)
+            while self.used + header + 8 > size:
+                size *= 2
+            self.map.close()
+            self.file.truncate(size)
+            self.map = mmap.mmap(self.file.fileno(), size)
+        struct.pack_into(f'<I{header - 4}sd', self.map, self.used, len(encoded), encoded, 0.0)
+        position = self.used + header
+        self.used = position + 8
+        struct.pack_into('<Q', self.map, 0, self.used)
+        self.positions[key] = position
+        return position
+
+
+def read_entries(data, used=None):
+    """Yields ``(key, value position, value)`` for every entry of a ValueFile's content."""
+    if used is None:
+        used = struct.unpack_from('<Q', data, 0)[0] if len(data) >= 8 else 0
+    position = 8
+    while position < used:
+        length = struct.unpack_from('<I', data, position)[0]
+        key = bytes(data[position + 4:position + 4 + length]).decode()
+        header = 4 + length
+        position += header + -header % 8
+        yield key, position, struct.unpack_from('<d', data, position)[0]
+        position += 8
+
+
+class Registry:
+    """
+    Counters and histograms shared by every worker process through METRICS_DIR.
+
+    Each process adds to its own ValueFile (``<pid>.db``); a scrape sums the
+    files of all processes, including ones that have exited, so counters
+    never go backwards when gunicorn replaces a worker. Empty the directory
+    before the server starts to reset everything.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.owner = None
+        self.values = None
+
+    def value_file(self):
+        owner = (os.getpid(), settings.METRICS_DIR)
+        if self.owner != owner:
+            # First use in this process, e.g. after gunicorn forked the worker
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            self.values = ValueFile(os.path.join(settings.METRICS_DIR, f'{owner[0]}.db'))
+            self.owner = owner
+        return self.values
+
+    def increment(self, name, labels, amount=1):
+        key = json.dumps([name, labels], sort_keys=True)
+        with self.lock:
+            self.value_file().increment(key, amount)
+
+    def observe(self, name, labels, value):
+        """Counts ``value`` in its bucket of histogram ``name`` and adds it to the sum."""
+        bound = next((bound for bound in METRICS[name][2] if value <= bound), math.inf)
+        keys = [
+            json.dumps([f'{name}_bucket', {**labels, 'le': bound}], sort_keys=True),
+            json.dumps([f'{name}_sum', labels], sort_keys=True),
+            json.dumps([f'{name}_count', labels], sort_keys=True),
+        ]
+        with self.lock:
+            values = self.value_file()
+            for key, amount in zip(keys, (1, value, 1)):
+                values.increment(key, amount)
+
+    def collect(self):
+        """``{key: value}`` summed over the files of every process."""
+        totals = {}
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.db')):
+            with open(path, 'rb') as file:
+                data = file.read()
+            for key, _, value in read_entries(data):
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+
+registry = Registry()
+
+
+def record_request(request, response, timing, duration):
+    match = request.resolver_match
+    labels = {'route': match.view_name if match else 'unmatched', 'method': request.method}
+    registry.increment('http_requests_total', {**labels, 'status': str(response.status_code)})
+    registry.observe('http_request_duration_seconds', labels, duration)
+    if timing is not None:
+        registry.observe('db_queries_per_request', labels, timing.queries)
+        registry.increment('db_query_duration_seconds_total', labels, timing.sql_time)
+
+
+def record_cache_lookup(cache, namespace, hit):
+    registry.increment('cache_requests_total', {'cache': cache, 'namespace': namespace, 'result': 'hit' if hit else 'miss'})
+
+
+def format_labels(labels):
+    def escape(value):
+        return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+    def bound(value):
+        return '+Inf' if value == math.inf else repr(float(value))
+
+    pairs = [
+        f'{name}="{escape(bound(value) if name == "le" else value)}"' for name, value in sorted(labels.items())
+    ]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def exposition(totals):
+    """Renders summed registry values in the Prometheus text format."""
+    samples = {}
+    for key, value in totals.items():
+        name, labels = json.loads(key)
+        samples.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        if kind != 'histogram':
+            for labels, value in sorted(samples.get(name, []), key=lambda sample: sorted(sample[0].items())):
+                lines.append(f'{name}{format_labels(labels)} {format_value(value)}')
+            continue
+
+        # Buckets are stored per bound and made cumulative here
+        series = {}
+        for labels, value in samples.get(f'{name}_bucket', []):
+            le = labels.pop('le')
+            series.setdefault(tuple(sorted(labels.items())), {})[le] = value
+        sums = {tuple(sorted(labels.items())): value for labels, value in samples.get(f'{name}_sum', [])}
+        for key in sorted(series):
+            labels = dict(key)
+            count = 0
+            for bound in (*buckets, math.inf):
+                count += series[key].get(bound, 0)
+                lines.append(f'{name}_bucket{format_labels({**labels, "le": bound})} {format_value(count)}')
+            lines.append(f'{name}_sum{format_labels(labels)} {format_value(sums.get(key, 0))}')
+            lines.append(f'{name}_count{format_labels(labels)} {format_value(count)}')
+
+    # Derived for dashboards; alerts should use rate() over cache_requests_total
+    caches = {}
+    for labels, value in samples.get('cache_requests_total', []):
+        key = (labels['cache'], labels['namespace'])
+        caches.setdefault(key, {'hit': 0, 'miss': 0})[labels['result']] += value
+    lines += ['# HELP cache_hit_ratio Cache hits over lookups since the counters started.', '# TYPE cache_hit_ratio gauge']
+    for (cache, namespace), counts in sorted(caches.items()):
+        ratio = counts['hit'] / (counts['hit'] + counts['miss'])
+        lines.append(f'cache_hit_ratio{format_labels({"cache": cache, "namespace": namespace})} {format_value(ratio)}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """``GET /metrics``: every worker's metrics in the Prometheus text format."""
+    return HttpResponse(exposition(registry.collect()), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+class MetricsMiddleware:
+    """
+    Records every request in the registry: count by status and latency per route.
+
+    A route is the URL name of the view (``student-list``, ``analytics``),
+    so labels stay few however many ids appear in paths. Database queries
+    are only counted for the requests REQUEST_TIMING_SAMPLE_RATE samples.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        timing, token = instrumentation.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.stop(token)
+        record_request(request, response, timing, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        timing, token = instrumentation.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.stop(token)
+        record_request(request, response, timing, time.perf_counter() - started)
+        return response
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.6 on 2024-10-24 17:11
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='student',
+            name='user',
+        ),
+        migrations.RemoveField(
+            model_name='teacher',
+            name='user',
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:20
+
+from django.db import migrations, models
+
+
+def _number(generated_id, prefix):
+    suffix = generated_id[len(prefix):] if generated_id.upper().startswith(prefix) else generated_id[-3:]
+    return int(suffix) if suffix.isdigit() else 0
+
+
+def seed_sequences(apps, schema_editor):
+    IdSequence = apps.get_model('students', 'IdSequence')
+    Student = apps.get_model('students', 'Student')
+    Teacher = apps.get_model('students', 'Teacher')
+    DepartmentCourse = apps.get_model('students', 'DepartmentCourse')
+
+    counters = {}
+
+    def seen(prefix, year, number):
+        counters[(prefix, year)] = max(counters.get((prefix, year), 0), number)
+
+    students = Student.objects.values_list('student_id', 'degree__abbreviation', 'enrollment_year')
+    for student_id, abbreviation, enrollment_year in students.iterator():
+        code = abbreviation.upper()
+        seen(f"student:{code}", enrollment_year, _number(student_id, f"{code}{enrollment_year}"))
+
+    for teacher_id, code in Teacher.objects.values_list('teacher_id', 'department__code').iterator():
+        code = code.upper()
+        seen(f"teacher:{code}", 0, _number(teacher_id, code))
+
+    for course_code, code in DepartmentCourse.objects.values_list('course_code', 'department__code').iterator():
+        code = code.upper()
+        seen(f"course:{code}", 0, _number(course_code, code))
+
+    IdSequence.objects.bulk_create(
+        IdSequence(prefix=prefix, year=year, last_value=last_value)
+        for (prefix, year), last_value in counters.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_remove_student_user_remove_teacher_user_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=30)),
+                ('year', models.IntegerField(default=0)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('prefix', 'year')},
+            },
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
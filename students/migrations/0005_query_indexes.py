@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_idsequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='classgroup',
+            index=models.Index(fields=['degree', 'enrollment_year', 'current_year'], name='classgroup_promotion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['degree', 'enrollment_year', 'id'], name='student_batch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(condition=models.Q(('is_graduated', False)), fields=['class_group'], name='student_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['student', 'assignment'], name='submission_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['department', 'id'], name='teacher_department_idx'),
+        ),
+    ]
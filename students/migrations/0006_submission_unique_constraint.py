@@ -0,0 +1,57 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:27
+
+import json
+import logging
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+DUPLICATES_MANIFEST = 'submissions/duplicates-0006.json'
+
+
+def set_aside_duplicate_submissions(apps, schema_editor):
+    # Keep the newest submission of each (student, assignment); older ones
+    # could only exist because two requests raced past the old exists() check.
+    # Their rows are written to a manifest next to the uploads and their
+    # files are left in place, so nothing is lost that can't be restored.
+    Submission = apps.get_model('students', 'Submission')
+    newest_ids = (
+        Submission.objects.values('student', 'assignment')
+        .annotate(newest_id=models.Max('id'))
+        .values('newest_id')
+    )
+    duplicates = Submission.objects.exclude(id__in=newest_ids)
+    rows = list(duplicates.values('id', 'student', 'assignment', 'file', 'submitted_at').order_by('id'))
+    if not rows:
+        return
+    name = default_storage.save(
+        DUPLICATES_MANIFEST, ContentFile(json.dumps(rows, cls=DjangoJSONEncoder, indent=2).encode()),
+    )
+    duplicates.delete()
+    logger.warning(
+        "Removed %d duplicate submissions (kept the newest of each student and assignment); "
+        "their rows are listed in %s and their files were kept.", len(rows), name,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0005_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_aside_duplicate_submissions, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='submission',
+            name='submission_student_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='submission',
+            constraint=models.UniqueConstraint(fields=('student', 'assignment'), name='unique_submission_per_student', violation_error_message='You have already submitted this assignment.'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:29
+
+import students.storage
+from django.db import migrations, models
+
+
+def count_references(apps, schema_editor):
+    Submission = apps.get_model('students', 'Submission')
+    SubmissionBlob = apps.get_model('students', 'SubmissionBlob')
+    references = Submission.objects.exclude(file='').values('file').annotate(ref_count=models.Count('id'))
+    SubmissionBlob.objects.bulk_create(
+        (SubmissionBlob(name=row['file'], ref_count=row['ref_count']) for row in references.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0006_submission_unique_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='file',
+            field=models.FileField(storage=students.storage.submission_storage, upload_to='submissions/'),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:31
+
+import students.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0007_submission_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carouselimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='carouselimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='carouselimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='carouselimage',
+            name='image',
+            field=models.ImageField(storage=students.storage.carousel_storage, upload_to='carousel_images/'),
+        ),
+    ]
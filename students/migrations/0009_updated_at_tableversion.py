@@ -0,0 +1,44 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+VERSIONED_MODELS = [
+    'department', 'degree', 'course', 'classgroup', 'departmentcourse', 'student', 'teacher', 'hod',
+    'carouselimage', 'assignment', 'submission', 'role', 'roleassignment',
+]
+
+
+def create_counters(apps, schema_editor):
+    # One row per table up front, so bumping a counter is always a single UPDATE.
+    TableVersion = apps.get_model('students', 'TableVersion')
+    TableVersion.objects.bulk_create(
+        [TableVersion(table=f"students.{model_name}") for model_name in VERSIONED_MODELS],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0008_carousel_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=100, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        *[
+            migrations.AddField(
+                model_name=model_name,
+                name='updated_at',
+                field=models.DateTimeField(auto_now=True),
+            )
+            for model_name in VERSIONED_MODELS
+        ],
+        migrations.RunPython(create_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,108 @@
+from django.db import migrations
+
+# Students and teachers share one FTS5 table. The rowid encodes the source
+# row (2 * id for a student, 2 * id + 1 for a teacher), so the triggers touch
+# a single index entry instead of searching for it.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE students_search USING fts5(
+        kind, code, name, father_name, phone, city,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    INSERT INTO students_search (rowid, kind, code, name, father_name, phone, city)
+    SELECT 2 * id, 'student', student_id, first_name || ' ' || last_name, father_name, phone, city
+    FROM students_student
+    """,
+    """
+    INSERT INTO students_search (rowid, kind, code, name, father_name, phone, city)
+    SELECT 2 * id + 1, 'teacher', teacher_id, first_name || ' ' || last_name, '', phone, city
+    FROM students_teacher
+    """,
+    """
+    CREATE TRIGGER students_search_student_insert AFTER INSERT ON students_student BEGIN
+        INSERT INTO students_search (rowid, kind, code, name, father_name, phone, city)
+        VALUES (2 * new.id, 'student', new.student_id, new.first_name || ' ' || new.last_name,
+                new.father_name, new.phone, new.city);
+    END
+    """,
+    """
+    CREATE TRIGGER students_search_student_update
+    AFTER UPDATE OF student_id, first_name, last_name, father_name, phone, city ON students_student BEGIN
+        UPDATE students_search
+        SET code = new.student_id, name = new.first_name || ' ' || new.last_name,
+            father_name = new.father_name, phone = new.phone, city = new.city
+        WHERE rowid = 2 * new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER students_search_student_delete AFTER DELETE ON students_student BEGIN
+        DELETE FROM students_search WHERE rowid = 2 * old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER students_search_teacher_insert AFTER INSERT ON students_teacher BEGIN
+        INSERT INTO students_search (rowid, kind, code, name, father_name, phone, city)
+        VALUES (2 * new.id + 1, 'teacher', new.teacher_id, new.first_name || ' ' || new.last_name,
+                '', new.phone, new.city);
+    END
+    """,
+    """
+    CREATE TRIGGER students_search_teacher_update
+    AFTER UPDATE OF teacher_id, first_name, last_name, phone, city ON students_teacher BEGIN
+        UPDATE students_search
+        SET code = new.teacher_id, name = new.first_name || ' ' || new.last_name,
+            phone = new.phone, city = new.city
+        WHERE rowid = 2 * new.id + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER students_search_teacher_delete AFTER DELETE ON students_teacher BEGIN
+        DELETE FROM students_search WHERE rowid = 2 * old.id + 1;
+    END
+    """,
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS students_search_student_insert',
+    'DROP TRIGGER IF EXISTS students_search_student_update',
+    'DROP TRIGGER IF EXISTS students_search_student_delete',
+    'DROP TRIGGER IF EXISTS students_search_teacher_insert',
+    'DROP TRIGGER IF EXISTS students_search_teacher_update',
+    'DROP TRIGGER IF EXISTS students_search_teacher_delete',
+    'DROP TABLE IF EXISTS students_search',
+]
+
+
+def has_fts5(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_search_index(apps, schema_editor):
+    # Other databases (and SQLite builds without FTS5) use the ORM fallback in students/search.py.
+    if has_fts5(schema_editor.connection):
+        for statement in CREATE_SQL:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in DROP_SQL:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0009_updated_at_tableversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_summaries(apps, schema_editor):
+    Student = apps.get_model('students', 'Student')
+    Submission = apps.get_model('students', 'Submission')
+    StudentSummary = apps.get_model('students', 'StudentSummary')
+    AssignmentSummary = apps.get_model('students', 'AssignmentSummary')
+    key_fields = ('class_group_id', 'degree_id', 'enrollment_year', 'gender', 'is_graduated')
+    StudentSummary.objects.bulk_create(
+        [
+            StudentSummary(**{field: row[field] for field in key_fields}, count=row['count'])
+            for row in Student.objects.values(*key_fields).annotate(count=models.Count('pk')).order_by()
+        ],
+        batch_size=1000,
+    )
+    AssignmentSummary.objects.bulk_create(
+        [
+            AssignmentSummary(assignment_id=row['assignment_id'], submitted=row['count'])
+            for row in Submission.objects.values('assignment_id').annotate(count=models.Count('pk')).order_by()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0011_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssignmentSummary',
+            fields=[
+                ('assignment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='students.assignment')),
+                ('submitted', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrollment_year', models.IntegerField()),
+                ('gender', models.CharField(max_length=1)),
+                ('is_graduated', models.BooleanField()),
+                ('count', models.IntegerField(default=0)),
+                ('class_group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='students.classgroup')),
+                ('degree', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='students.degree')),
+            ],
+            options={
+                'unique_together': {('class_group', 'degree', 'enrollment_year', 'gender', 'is_graduated')},
+            },
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
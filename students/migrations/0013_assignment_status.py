@@ -0,0 +1,30 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:58
+
+from django.db import migrations, models
+
+
+def count_late_submissions(apps, schema_editor):
+    Submission = apps.get_model('students', 'Submission')
+    AssignmentSummary = apps.get_model('students', 'AssignmentSummary')
+    late = (
+        Submission.objects.filter(submitted_at__date__gt=models.F('assignment__due_date'))
+        .values('assignment_id').annotate(count=models.Count('pk')).order_by()
+    )
+    for row in late:
+        AssignmentSummary.objects.filter(assignment_id=row['assignment_id']).update(late=row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0012_analytics_summaries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignmentsummary',
+            name='late',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_late_submissions, migrations.RunPython.noop),
+    ]
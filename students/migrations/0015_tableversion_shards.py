@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:50
+
+from django.db import migrations, models
+
+SHARDS = 8
+
+
+def create_shards(apps, schema_editor):
+    # Every shard up front, so bumping a counter stays a single UPDATE.
+    TableVersion = apps.get_model('students', 'TableVersion')
+    tables = TableVersion.objects.values_list('table', flat=True).distinct()
+    TableVersion.objects.bulk_create(
+        [TableVersion(table=table, shard=shard) for table in tables for shard in range(1, SHARDS)],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0014_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tableversion',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='tableversion',
+            name='table',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AddConstraint(
+            model_name='tableversion',
+            constraint=models.UniqueConstraint(fields=('table', 'shard'), name='tableversion_table_shard_uniq'),
+        ),
+        migrations.RunPython(create_shards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+def recount_member_submissions(apps, schema_editor):
+    # Only students still in the assignment's class group are counted now
+    Submission = apps.get_model('students', 'Submission')
+    AssignmentSummary = apps.get_model('students', 'AssignmentSummary')
+    AssignmentSummary.objects.all().delete()
+    rows = (
+        Submission.objects.filter(student__class_group=models.F('assignment__class_group'))
+        .values('assignment_id').annotate(
+            submitted=models.Count('pk'),
+            late=models.Count('pk', filter=models.Q(submitted_at__date__gt=models.F('assignment__due_date'))),
+        ).order_by()
+    )
+    AssignmentSummary.objects.bulk_create(
+        [AssignmentSummary(assignment_id=row['assignment_id'], submitted=row['submitted'], late=row['late']) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0015_tableversion_shards'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_member_submissions, migrations.RunPython.noop),
+    ]
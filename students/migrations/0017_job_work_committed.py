@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0016_assignment_summary_members'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='work_committed',
+            field=models.BooleanField(default=False),
+        ),
+    ]
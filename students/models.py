@@ -1,9 +1,24 @@
-from django.db import models
+import functools
+import operator
+import random
+
+from django.db import IntegrityError, models, transaction
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from datetime import date
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
+from .database import write_atomic
+from .images import build_variants
+from .storage import carousel_storage, submission_storage
+
+class ClassGroupQuerySet(models.QuerySet):
+    def with_related(self):
+        # What ClassGroupSerializer renders: the course ids. Foreign keys are rendered as ids too.
+        return self.prefetch_related(models.Prefetch('courses', queryset=Course.objects.only('pk')))
+
+
 # Assignment Model
 class Assignment(models.Model):
     title = models.CharField(max_length=255, help_text="Enter the title of the assignment.")
@@ -11,6 +26,21 @@ class Assignment(models.Model):
     due_date = models.DateField()
     class_group = models.ForeignKey('ClassGroup', on_delete=models.CASCADE, related_name='assignments')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # AssignmentFilter's due-date range; class_group uses the foreign key index
+            models.Index(fields=['due_date'], name='assignment_due_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        assignment = super().from_db(db, field_names, values)
+        # Remembered so moving the due date or the class group recounts the submissions
+        assignment._loaded_due_date = assignment.__dict__.get('due_date')
+        assignment._loaded_class_group_id = assignment.__dict__.get('class_group_id')
+        return assignment
 
     def clean(self):
         # Validate that due_date is in the future
@@ -24,27 +54,225 @@ class Assignment(models.Model):
 class Submission(models.Model):
     student = models.ForeignKey('Student', on_delete=models.CASCADE, related_name='submissions')
     assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name='submissions')
-    file = models.FileField(upload_to='submissions/')
+    file = models.FileField(upload_to='submissions/', storage=submission_storage)
     submitted_at = models.DateTimeField(auto_now_add=True)
-
-    def clean(self):
-        if Submission.objects.filter(student=self.student, assignment=self.assignment).exists():
-            raise ValidationError("You have already submitted this assignment.")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        submission = super().from_db(db, field_names, values)
+        # Remembered so a replaced file can release its blob reference on save
+        submission._loaded_file_name = submission.__dict__.get('file')
+        submission._loaded_assignment_id = submission.__dict__.get('assignment_id')
+        submission._loaded_student_id = submission.__dict__.get('student_id')
+        return submission
+
+    @staticmethod
+    def late_condition(prefix=''):
+        """Q for submissions made after the day their assignment was due, in the current time zone."""
+        return models.Q(**{f"{prefix}submitted_at__date__gt": models.F(f"{prefix}assignment__due_date")})
+
+    @staticmethod
+    def member_condition(prefix=''):
+        """Q for submissions whose student is still in the assignment's class group."""
+        return models.Q(**{f"{prefix}student__class_group": models.F(f"{prefix}assignment__class_group")})
+
+    @property
+    def is_late(self):
+        return timezone.localdate(self.submitted_at) > self.assignment.due_date
 
     def save(self, *args, **kwargs):
-        self.clean()  # Call clean to validate the submission
-        super().save(*args, **kwargs)
+        # The storage locks the file's SubmissionBlob row; hold it until the reference is taken
+        with write_atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+    @property
+    def is_by_member(self):
+        return self.student.class_group_id == self.assignment.class_group_id
+
+    class Meta:
+        indexes = [
+            # SubmissionFilter's submitted_at range
+            models.Index(fields=['submitted_at'], name='submission_submitted_idx'),
+        ]
+        constraints = [
+            # One submission per student and assignment, enforced by the insert itself
+            models.UniqueConstraint(
+                fields=['student', 'assignment'],
+                name='unique_submission_per_student',
+                violation_error_message="You have already submitted this assignment.",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.assignment.title}"
 
 
+# SubmissionBlob Model
+class SubmissionBlob(models.Model):
+    """
+    Reference count for a stored submission file.
+
+    With content-addressed storage several submissions can share one file;
+    the file is deleted only when the last of them goes away.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def acquire(cls, name):
+        blob = cls.objects.filter(name=name)
+        if not blob.update(ref_count=models.F('ref_count') + 1):
+            try:
+                with transaction.atomic():
+                    cls.objects.create(name=name, ref_count=1)
+            except IntegrityError:
+                # Another upload of the same content created the row first.
+                blob.update(ref_count=models.F('ref_count') + 1)
+
+    @classmethod
+    def release(cls, name, storage):
+        """Drops one reference; the file is deleted once dropping the last one has committed."""
+        blob = cls.objects.filter(name=name)
+        blob.filter(ref_count__gt=0).update(ref_count=models.F('ref_count') - 1)
+        unused, _ = blob.filter(ref_count=0).delete()
+        if unused:
+            # A rollback brings the rows referencing the file back, so it must stay until then
+            transaction.on_commit(functools.partial(cls.delete_unused, name, storage))
+
+    @classmethod
+    def lock(cls, name):
+        """
+        Locks the row of ``name`` until the transaction ends, creating it unreferenced if needed.
+
+        Taken before a file is reused or deleted, so an upload of the same
+        content and the deletion of its last reference never interleave.
+        """
+        while True:
+            try:
+                with transaction.atomic():
+                    return cls.objects.create(name=name)
+            except IntegrityError:
+                pass
+            blob = cls.objects.select_for_update().filter(name=name).first()
+            if blob is not None:
+                return blob
+
+    @classmethod
+    def delete_unused(cls, name, storage):
+        # An upload of the same content may have reused the name since the release
+        with write_atomic():
+            blob = cls.lock(name)
+            if not blob.ref_count:
+                storage.delete(name)
+                blob.delete()
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+
+
+# IdSequence Model
+class IdSequence(models.Model):
+    """
+    Counter behind the generated Student, Teacher and DepartmentCourse IDs.
+
+    One row per (prefix, year), e.g. ('student:BT', 2022) or ('teacher:CSE', 0).
+    The counter is bumped with a single UPDATE, so concurrent inserts never
+    hand out the same number and no ordered scan of the target table is needed.
+    """
+    prefix = models.CharField(max_length=30)
+    year = models.IntegerField(default=0)  # 0 for sequences that don't restart every year
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('prefix', 'year')
+
+    @classmethod
+    def reserve(cls, prefix, year=0, count=1):
+        """Atomically claims the next ``count`` numbers and returns them as a range."""
+        with write_atomic():
+            sequence = cls.objects.filter(prefix=prefix, year=year)
+            if not sequence.update(last_value=models.F('last_value') + count):
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(prefix=prefix, year=year, last_value=count)
+                    return range(1, count + 1)
+                except IntegrityError:
+                    # Another worker created the row first; bump it like any other.
+                    sequence.update(last_value=models.F('last_value') + count)
+            last_value = sequence.values_list('last_value', flat=True).get()
+        return range(last_value - count + 1, last_value + 1)
+
+    def __str__(self):
+        return f"{self.prefix} {self.year}: {self.last_value}"
+
+
+# TableVersion Model
+class TableVersion(models.Model):
+    """
+    Change counter of one table, e.g. ('students.student', 42).
+
+    Bumped by signals on every save/delete and explicitly by the set-based
+    updates and bulk inserts that skip signals. A list endpoint's ETag is
+    built from it, so a poll that changed nothing is answered with one
+    indexed lookup instead of the list query and the serializer.
+
+    A table's counter is spread over SHARDS rows and a bump increments a
+    random one, so concurrent writers rarely wait on each other's row lock
+    until commit. The version is their sum, which still grows on every bump.
+    """
+    SHARDS = 8
+
+    table = models.CharField(max_length=100)  # Model label, lower case
+    shard = models.PositiveSmallIntegerField(default=0)
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['table', 'shard'], name='tableversion_table_shard_uniq')]
+
+    @classmethod
+    def bump(cls, *models_or_labels):
+        tables = sorted({
+            model.lower() if isinstance(model, str) else model._meta.label_lower for model in models_or_labels
+        })
+        shard = random.randrange(cls.SHARDS)
+        now = timezone.now()
+        rows = cls.objects.filter(table__in=tables, shard=shard)
+        if rows.update(version=models.F('version') + 1, changed_at=now) < len(tables):
+            for table in tables:
+                try:
+                    with transaction.atomic():
+                        cls.objects.get_or_create(table=table, shard=shard, defaults={'version': 1, 'changed_at': now})
+                except IntegrityError:
+                    # Created by a concurrent bump, which already counts as a change.
+                    pass
+
+    @classmethod
+    def current(cls, model):
+        """Returns ``(version, changed_at)`` of ``model``'s table, or ``(0, None)`` if it never changed."""
+        row = cls.objects.filter(table=model._meta.label_lower).aggregate(
+            version=models.Sum('version'), changed_at=models.Max('changed_at'),
+        )
+        return (row['version'] or 0, row['changed_at'])
+
+    @classmethod
+    async def acurrent(cls, model):
+        row = await cls.objects.filter(table=model._meta.label_lower).aaggregate(
+            version=models.Sum('version'), changed_at=models.Max('changed_at'),
+        )
+        return (row['version'] or 0, row['changed_at'])
+
+    def __str__(self):
+        return f"{self.table}: {self.version}"
 
 # Department Model
 class Department(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField()
     code = models.CharField(max_length=10, unique=True)  # Example: 'CSE', 'ECE'
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -55,6 +283,7 @@ class Degree(models.Model):
     duration = models.IntegerField()  # Duration in years (e.g., 4 for B.Tech)
     department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='degrees')
     abbreviation = models.CharField(max_length=5)  # e.g., B.Tech, M.Sc, etc.
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -67,6 +296,7 @@ class Course(models.Model):
     credits = models.IntegerField()
     degree = models.ForeignKey(Degree, on_delete=models.CASCADE, related_name='courses')
     year = models.IntegerField()  # Year for which the course is assigned (1 for 1st year, etc.)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('name', 'degree', 'year')
@@ -82,6 +312,15 @@ class ClassGroup(models.Model):
     current_year = models.IntegerField(default=1)  # 1 for 1st year, 2 for 2nd year, etc.
     class_incharge = models.ForeignKey('Teacher', on_delete=models.SET_NULL, null=True, blank=True, related_name='incharge_classes')
     courses = models.ManyToManyField(Course, related_name='class_groups', blank=True)  # Relationship to courses
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ClassGroupQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Promotion looks up the next class group by (degree, enrollment_year, current_year)
+            models.Index(fields=['degree', 'enrollment_year', 'current_year'], name='classgroup_promotion_idx'),
+        ]
 
     def __str__(self):
         return f"{self.degree.name} - Batch {self.enrollment_year} (Year {self.current_year})"
@@ -102,11 +341,13 @@ class DepartmentCourse(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='department_courses')
     department = models.ForeignKey(Department, on_delete=models.CASCADE)
     course_code = models.CharField(max_length=10, unique=True, editable=False)  # auto-generated
+    updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         if not self.course_code:
             department_code = self.department.code.upper()
-            self.course_code = f"{department_code}{self.course.id:03d}"  # 'CSE101' if id is 1
+            number = IdSequence.reserve(f"course:{department_code}")[0]
+            self.course_code = f"{department_code}{number:03d}"  # 'CSE001' for the first course
         super().save(*args, **kwargs)
 
     class Meta:
@@ -139,32 +380,81 @@ class Student(models.Model):
     class_group = models.ForeignKey(ClassGroup, on_delete=models.CASCADE)
     enrollment_year = models.IntegerField()
     is_graduated = models.BooleanField(default=False)  # Graduation status
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Students of a batch in cursor-pagination order (by_class)
+            models.Index(fields=['degree', 'enrollment_year', 'id'], name='student_batch_idx'),
+            # Only students still studying are promoted/graduated; graduates pile up over the years
+            models.Index(fields=['class_group'], condition=models.Q(is_graduated=False), name='student_active_idx'),
+            # StudentFilter: one (column, id) index per filter that no index above leads with
+            models.Index(fields=['enrollment_year', 'id'], name='student_year_idx'),
+            models.Index(fields=['is_graduated', 'id'], name='student_graduated_idx'),
+            models.Index(fields=['gender', 'id'], name='student_gender_idx'),
+            models.Index(fields=['state', 'id'], name='student_state_idx'),
+        ]
 
     def clean(self):
         # Custom validation to ensure dob is in the past
         if self.dob >= date.today():
             raise ValidationError("Date of birth must be in the past.")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        student = super().from_db(db, field_names, values)
+        # Remembered so a save can move the student between StudentSummary rows
+        student._loaded_summary_key = student.summary_key()
+        return student
+
+    def summary_key(self):
+        """The StudentSummary row this student is counted in."""
+        fields = self.__dict__
+        return (
+            fields.get('class_group_id'), fields.get('degree_id'), fields.get('enrollment_year'),
+            fields.get('gender'), fields.get('is_graduated'),
+        )
+
     def save(self, *args, **kwargs):
         if not self.student_id:
-            degree_code = self.degree.abbreviation.upper()
-            enrollment_year = str(self.enrollment_year)
-
-            last_student = Student.objects.filter(
-                degree=self.degree,
-                enrollment_year=self.enrollment_year
-            ).order_by('student_id').last()
-
-            if last_student:
-                last_number = int(last_student.student_id[-3:])
-                new_number = last_number + 1
-            else:
-                new_number = 1
-
-            self.student_id = f"{degree_code}{enrollment_year}{new_number:03d}"
+            Student.assign_student_ids([self])
 
         super().save(*args, **kwargs)
 
+    @classmethod
+    def assign_student_ids(cls, students):
+        """
+        Fills in ``student_id`` for every student that doesn't have one yet.
+
+        IDs are reserved in one block per (degree, enrollment year), so a bulk
+        insert of N students costs a couple of queries instead of N scans.
+        """
+        pending = [student for student in students if not student.student_id]
+        if not pending:
+            return
+
+        degree_codes = {
+            student.degree_id: student.degree.abbreviation.upper()
+            for student in pending
+            if cls.degree.is_cached(student)
+        }
+        missing = {student.degree_id for student in pending} - degree_codes.keys()
+        if missing:
+            degree_codes.update(
+                (pk, abbreviation.upper())
+                for pk, abbreviation in Degree.objects.filter(pk__in=missing).values_list('pk', 'abbreviation')
+            )
+
+        groups = {}
+        for student in pending:
+            key = (degree_codes[student.degree_id], student.enrollment_year)
+            groups.setdefault(key, []).append(student)
+
+        for (degree_code, enrollment_year), group in groups.items():
+            numbers = IdSequence.reserve(f"student:{degree_code}", enrollment_year, len(group))
+            for student, number in zip(group, numbers):
+                student.student_id = f"{degree_code}{enrollment_year}{number:03d}"
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
@@ -190,6 +480,14 @@ class Teacher(models.Model):
     state = models.CharField(max_length=50)
     pin_code = models.CharField(max_length=10)
     gender = models.CharField(max_length=1, choices=GENDER_CHOICES)  # New gender field
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Teachers of a department in cursor-pagination order
+            models.Index(fields=['department', 'id'], name='teacher_department_idx'),
+            models.Index(fields=['designation', 'id'], name='teacher_designation_idx'),
+        ]
 
     def clean(self):
         # Custom validation to ensure dob is in the past
@@ -198,19 +496,38 @@ class Teacher(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.teacher_id:
-            department_code = self.department.code.upper()
-            last_teacher = Teacher.objects.filter(department=self.department).order_by('teacher_id').last()
-
-            if last_teacher:
-                last_number = int(last_teacher.teacher_id[-3:])
-                new_number = last_number + 1
-            else:
-                new_number = 1
-
-            self.teacher_id = f"{department_code}{new_number:03d}"
+            Teacher.assign_teacher_ids([self])
 
         super().save(*args, **kwargs)
 
+    @classmethod
+    def assign_teacher_ids(cls, teachers):
+        """Fills in ``teacher_id`` for every teacher that doesn't have one, one reserved block per department."""
+        pending = [teacher for teacher in teachers if not teacher.teacher_id]
+        if not pending:
+            return
+
+        department_codes = {
+            teacher.department_id: teacher.department.code.upper()
+            for teacher in pending
+            if cls.department.is_cached(teacher)
+        }
+        missing = {teacher.department_id for teacher in pending} - department_codes.keys()
+        if missing:
+            department_codes.update(
+                (pk, code.upper())
+                for pk, code in Department.objects.filter(pk__in=missing).values_list('pk', 'code')
+            )
+
+        groups = {}
+        for teacher in pending:
+            groups.setdefault(department_codes[teacher.department_id], []).append(teacher)
+
+        for department_code, group in groups.items():
+            numbers = IdSequence.reserve(f"teacher:{department_code}", count=len(group))
+            for teacher, number in zip(group, numbers):
+                teacher.teacher_id = f"{department_code}{number:03d}"
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
@@ -218,53 +535,182 @@ class Teacher(models.Model):
 class HOD(models.Model):
     teacher = models.OneToOneField(Teacher, on_delete=models.CASCADE)  # HOD is a teacher
     department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='hods')
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.teacher.first_name} {self.teacher.last_name} ({self.department.name})"
 
 # Function for Promotion Logic
-def promote_students():
-    current_year = date.today().year
-
-    # Loop through all class groups
-    for class_group in ClassGroup.objects.all():
-        # Get the current year of study for the class group
-        if class_group.current_year < class_group.degree.duration:
-            # Promote class group to the next year
-            class_group.current_year += 1
-            class_group.save()
-
-            # Promote all students in this class group
-            students_in_class = Student.objects.filter(class_group=class_group)
-            for student in students_in_class:
-                # Find the next class group for the student
-                next_class_group = ClassGroup.objects.filter(
-                    degree=student.degree,
-                    enrollment_year=student.enrollment_year,
-                    current_year=class_group.current_year
-                ).first()
-
-                if next_class_group:
-                    student.class_group = next_class_group
-                    student.save()
-                else:
-                    print(f"No next class group found for {student}.")
-
+PROMOTION_CASE_BATCH_SIZE = 500
+
+
+def plan_promotions(class_groups=None):
+    """
+    Works out the whole promotion in a handful of queries, without changing anything.
+
+    Returns a dict describing which class groups move up a year, where each
+    (class_group, degree, enrollment_year) bucket of students is sent, which
+    buckets have no next class group, and which class groups graduate.
+    Pass ``class_groups`` (a queryset or iterable of ClassGroup/ids) to limit
+    the promotion to those groups; by default every class group is promoted.
+    """
+    all_groups = list(
+        ClassGroup.objects.order_by('pk').values(
+            'pk', 'degree_id', 'enrollment_year', 'current_year', 'degree__duration'
+        )
+    )
+
+    if class_groups is None:
+        scope = {group['pk'] for group in all_groups}
+    else:
+        scope = {getattr(group, 'pk', group) for group in class_groups}
+
+    promoted = {}
+    graduating = []
+    for group in all_groups:
+        if group['pk'] not in scope:
+            continue
+        if group['current_year'] < group['degree__duration']:
+            promoted[group['pk']] = group['current_year'] + 1
         else:
-            graduate_students(class_group)
-
-def graduate_students(class_group):
-    graduating_students = Student.objects.filter(class_group=class_group)
-
-    for student in graduating_students:
-        if not student.is_graduated:  # Check if the student is not already graduated
-            student.is_graduated = True
-            student.save()
+            graduating.append(group['pk'])
+
+    # Lowest pk wins, like the ``.first()`` lookup this replaces, but matched
+    # against the class group years as they will be after the promotion.
+    next_group = {}
+    for group in all_groups:
+        year = promoted.get(group['pk'], group['current_year'])
+        next_group.setdefault((group['degree_id'], group['enrollment_year'], year), group['pk'])
+
+    buckets = (
+        Student.objects.filter(class_group__in=list(promoted))
+        .values('class_group_id', 'degree_id', 'enrollment_year')
+        .annotate(count=models.Count('pk'))
+        .order_by('class_group_id', 'degree_id', 'enrollment_year')
+    )
+
+    moves = []
+    unmatched = []
+    for bucket in buckets:
+        target = next_group.get(
+            (bucket['degree_id'], bucket['enrollment_year'], promoted[bucket['class_group_id']])
+        )
+        entry = {
+            'class_group': bucket['class_group_id'],
+            'degree': bucket['degree_id'],
+            'enrollment_year': bucket['enrollment_year'],
+            'students': bucket['count'],
+        }
+        if target is None:
+            unmatched.append(entry)
+        else:
+            entry['next_class_group'] = target
+            moves.append(entry)
+
+    return {
+        'promoted_class_groups': [
+            {'class_group': pk, 'current_year': year} for pk, year in promoted.items()
+        ],
+        'moves': moves,
+        'unmatched': unmatched,
+        'graduating_class_groups': graduating,
+    }
+
+
+def promote_students(class_groups=None, dry_run=False):
+    """
+    Promotes every class group (or only ``class_groups``) by one year.
+
+    Students are moved to their next class group and final-year groups are
+    graduated with a few set-based UPDATE statements inside one transaction.
+    The planned moves are returned; with ``dry_run=True`` nothing is written.
+    """
+    with write_atomic():
+        plan = plan_promotions(class_groups)
+        if dry_run:
+            return plan
+
+        # Every student is moved based on the snapshot taken by the plan, so
+        # students are never promoted twice in the same run.
+        moves = [move for move in plan['moves'] if move['next_class_group'] != move['class_group']]
+        for i in range(0, len(moves), PROMOTION_CASE_BATCH_SIZE):
+            conditions = []
+            whens = []
+            for move in moves[i:i + PROMOTION_CASE_BATCH_SIZE]:
+                condition = models.Q(
+                    class_group_id=move['class_group'],
+                    degree_id=move['degree'],
+                    enrollment_year=move['enrollment_year'],
+                )
+                conditions.append(condition)
+                whens.append(models.When(condition, then=models.Value(move['next_class_group'])))
+            Student.objects.filter(functools.reduce(operator.or_, conditions)).update(
+                class_group=models.Case(*whens, output_field=models.BigIntegerField()),
+                updated_at=timezone.now(),
+            )
+
+        ClassGroup.objects.filter(
+            pk__in=[entry['class_group'] for entry in plan['promoted_class_groups']]
+        ).update(current_year=models.F('current_year') + 1, updated_at=timezone.now())
+        # Set-based updates send no signals
+        TableVersion.bump(Student, ClassGroup)
+        moved = {class_group for move in moves for class_group in (move['class_group'], move['next_class_group'])}
+        StudentSummary.refresh(moved)
+        AssignmentSummary.refresh_class_groups(moved)
+
+        if plan['graduating_class_groups']:
+            plan['graduation'] = graduate_students(class_group=plan['graduating_class_groups'])
+
+    return plan
+
+def graduate_students(class_group=None, degree=None, enrollment_year=None):
+    """
+    Graduates a class group, a degree, an enrollment year, or any combination of them.
+
+    ``class_group`` may be a ClassGroup, its id, or a list/queryset of either.
+    Everyone in scope is graduated with a single UPDATE; returns the number of
+    students graduated now and the number that were already graduated.
+    """
+    if class_group is None and degree is None and enrollment_year is None:
+        raise ValueError("Provide a class group, a degree or an enrollment year to graduate.")
+
+    students = Student.objects.all()
+    if isinstance(class_group, (list, tuple, set, models.QuerySet)):
+        students = students.filter(class_group__in=class_group)
+    elif class_group is not None:
+        students = students.filter(class_group=class_group)
+    if degree is not None:
+        students = students.filter(degree=degree)
+    if enrollment_year is not None:
+        students = students.filter(enrollment_year=enrollment_year)
+
+    with write_atomic():
+        already_graduated = students.filter(is_graduated=True).count()
+        graduated = students.filter(is_graduated=False).update(is_graduated=True, updated_at=timezone.now())
+        TableVersion.bump(Student)
+        StudentSummary.refresh(students.values_list('class_group_id', flat=True).distinct().order_by())
+
+    return {'graduated': graduated, 'already_graduated': already_graduated}
 
 
 class CarouselImage(models.Model):
-    image = models.ImageField(upload_to='carousel_images/')
+    image = models.ImageField(upload_to='carousel_images/', storage=carousel_storage)
     is_active = models.BooleanField(default=True)
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    variants = models.JSONField(default=dict, blank=True, editable=False)  # {'webp': {'480': name, ...}, ...}
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def save(self, *args, **kwargs):
+        new_upload = not getattr(self.image, '_committed', True)
+        super().save(*args, **kwargs)
+        if new_upload:
+            self.build_variants()
+
+    def build_variants(self):
+        """Renders the resized variants of the current image and records them."""
+        self.width, self.height, self.variants = build_variants(self.image)
+        self.save(update_fields=['width', 'height', 'variants', 'updated_at'])
 
     def __str__(self):
         return self.image.name
@@ -274,6 +720,7 @@ class Role(models.Model):
     role_id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=50)  # e.g., Sports In-Charge, Club In-Charge, TPO
     description = models.TextField(null=True, blank=True)  # Optional description of the role
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['name']  # Order by name
@@ -288,6 +735,7 @@ class RoleAssignment(models.Model):
     role = models.ForeignKey(Role, on_delete=models.CASCADE, related_name='assignments')
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='role_assignments')  # Allow one teacher to have multiple roles
     department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='role_assignments')  # Optional, depending on your use case
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('role', 'teacher')  # Prevent assigning the same role to a teacher multiple times
@@ -295,4 +743,184 @@ class RoleAssignment(models.Model):
         verbose_name_plural = 'Role Assignments'
 
     def __str__(self):
-        return f"{self.teacher} - {self.role}"
\ No newline at end of file
+        return f"{self.teacher} - {self.role}"
+
+
+def _adjust_counters(model, lookup, **deltas):
+    # A decrement never creates a row: a missing row means its class group or
+    # assignment is being deleted together with the summary.
+    rows = model.objects.filter(**lookup)
+    increments = {field: models.F(field) + delta for field, delta in deltas.items()}
+    if rows.update(**increments) or max(deltas.values()) <= 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Another writer created the row first; count on top of it.
+        rows.update(**increments)
+
+
+# StudentSummary Model
+class StudentSummary(models.Model):
+    """
+    Student headcount per class group, degree, batch, gender and graduation status.
+
+    Kept current by signals and explicitly by the set-based updates and bulk
+    inserts that skip them. /api/analytics/ reads only the summary tables, so
+    its cost follows the number of class groups, not of students.
+    """
+    class_group = models.ForeignKey(ClassGroup, on_delete=models.CASCADE, related_name='+')
+    degree = models.ForeignKey(Degree, on_delete=models.CASCADE, related_name='+')
+    enrollment_year = models.IntegerField()
+    gender = models.CharField(max_length=1)
+    is_graduated = models.BooleanField()
+    count = models.IntegerField(default=0)
+
+    KEY_FIELDS = ('class_group_id', 'degree_id', 'enrollment_year', 'gender', 'is_graduated')
+
+    class Meta:
+        unique_together = ('class_group', 'degree', 'enrollment_year', 'gender', 'is_graduated')
+
+    @classmethod
+    def adjust(cls, key, delta):
+        """Adds ``delta`` to the row of ``key`` (a ``Student.summary_key()``), creating it on first use."""
+        if None in key:
+            return
+        _adjust_counters(cls, dict(zip(cls.KEY_FIELDS, key)), count=delta)
+
+    @classmethod
+    def add(cls, students):
+        """Counts students inserted with ``bulk_create``, one UPDATE per row touched."""
+        totals = {}
+        for student in students:
+            key = student.summary_key()
+            totals[key] = totals.get(key, 0) + 1
+        for key, count in totals.items():
+            cls.adjust(key, count)
+
+    @classmethod
+    def rows_for(cls, students):
+        """Unsaved summary rows counting the students of a queryset, with one GROUP BY."""
+        return [
+            cls(**{field: row[field] for field in cls.KEY_FIELDS}, count=row['count'])
+            for row in students.values(*cls.KEY_FIELDS).annotate(count=models.Count('pk')).order_by()
+        ]
+
+    @classmethod
+    def refresh(cls, class_groups):
+        """
+        Recounts the rows of the given class groups from Student.
+
+        For the set-based updates that move students without signals; only
+        those class groups' students are read.
+        """
+        class_groups = list(class_groups)
+        if class_groups:
+            with transaction.atomic(savepoint=False):
+                cls.objects.filter(class_group__in=class_groups).delete()
+                cls.objects.bulk_create(cls.rows_for(Student.objects.filter(class_group__in=class_groups)))
+
+    def __str__(self):
+        return f"{self.class_group_id}/{self.degree_id}/{self.enrollment_year}/{self.gender}: {self.count}"
+
+
+# AssignmentSummary Model
+class AssignmentSummary(models.Model):
+    """
+    Submission counters of one assignment, maintained like StudentSummary.
+
+    Only students still in the assignment's class group are counted, the same
+    students its status board lists, so the students still missing are the
+    class group's headcount minus ``submitted``. Moving a student or the
+    assignment to another class group recounts. ``late`` counts submissions
+    made after the due date.
+    """
+    assignment = models.OneToOneField(Assignment, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    submitted = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+
+    @classmethod
+    def adjust(cls, assignment_id, delta, late=False):
+        if assignment_id is not None:
+            _adjust_counters(cls, {'assignment_id': assignment_id}, submitted=delta, late=delta if late else 0)
+
+    @classmethod
+    def rows_for(cls, submissions):
+        """Unsaved counter rows for the submissions of a queryset, with one GROUP BY."""
+        return [
+            cls(assignment_id=row['assignment_id'], submitted=row['submitted'], late=row['late'])
+            for row in submissions.filter(Submission.member_condition()).values('assignment_id').annotate(
+                submitted=models.Count('pk'), late=models.Count('pk', filter=Submission.late_condition()),
+            ).order_by()
+        ]
+
+    @classmethod
+    def refresh(cls, assignments):
+        """Recounts the given assignments, e.g. after their due date moved."""
+        assignments = list(assignments)
+        if assignments:
+            with transaction.atomic(savepoint=False):
+                cls.objects.filter(assignment__in=assignments).delete()
+                cls.objects.bulk_create(cls.rows_for(Submission.objects.filter(assignment__in=assignments)))
+
+    @classmethod
+    def refresh_class_groups(cls, class_groups):
+        """Recounts the assignments of the given class groups, e.g. after students moved between them."""
+        cls.refresh(Assignment.objects.filter(class_group__in=class_groups).values_list('pk', flat=True))
+
+    def __str__(self):
+        return f"{self.assignment_id}: {self.submitted}"
+
+
+# Job Model
+class Job(models.Model):
+    """
+    A unit of background work: promotions, graduations, imports and rebuilds.
+
+    Rows are queued by the API and claimed by ``manage.py run_workers`` with a
+    conditional UPDATE, so the table itself is the queue and any number of
+    worker processes can share it without a broker. The task functions live in
+    students/jobs.py.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+        (CANCELLED, 'Cancelled'),
+    ]
+    FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(null=True, blank=True)  # None while the size is unknown
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    cancel_requested = models.BooleanField(default=False)
+    # Set by a task together with work that must not run twice; the job is never retried after that
+    work_committed = models.BooleanField(default=False)
+    run_after = models.DateTimeField(default=timezone.now)  # Pushed back between retries
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Also the heartbeat of a running job
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk}: {self.status}"
@@ -0,0 +1,15 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class StableCursorPagination(CursorPagination):
+    """
+    Cursor pagination over the primary key.
+
+    The cursor seeks straight to ``pk > last seen`` on the primary key index,
+    so page 1000 costs the same as page 1, and rows inserted while a client
+    walks the list never shift pages underneath it.
+    """
+    ordering = 'pk'
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
@@ -0,0 +1,152 @@
+import functools
+import operator
+import re
+
+from django.db import connection, models
+
+from .models import Student, Teacher
+
+SEARCH_TABLE = 'students_search'
+KINDS = ('student', 'teacher')
+MAX_TERMS = 8
+MIN_QUERY_LENGTH = 2
+# bm25 weights, in column order: kind, code, name, father_name, phone, city
+RANK_WEIGHTS = (0.0, 10.0, 5.0, 2.0, 4.0, 1.0)
+SEARCHED_COLUMNS = '{code name father_name phone city}'
+RANKED_CANDIDATES = 1000
+
+_fts_tables = {}
+
+
+def search_terms(query):
+    """Splits a query into the words the FTS tokenizer would produce."""
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+def fts_available():
+    """True when the current database has the FTS5 index; checked once per database."""
+    name = connection.settings_dict['NAME']
+    if name not in _fts_tables:
+        _fts_tables[name] = (
+            connection.vendor == 'sqlite' and SEARCH_TABLE in connection.introspection.table_names()
+        )
+    return _fts_tables[name]
+
+
+def match_expression(terms, kind=None):
+    """
+    Builds an FTS5 MATCH expression: every term must prefix-match a searched column.
+
+    Terms are quoted, so user input can't inject FTS5 operators.
+    """
+    prefixes = ' AND '.join(f'"{term}"*' for term in terms)
+    expression = f"{SEARCHED_COLUMNS}: ({prefixes})"
+    if kind:
+        expression = f'kind: "{kind}" AND {expression}'
+    return expression
+
+
+def search_fts(terms, kind=None, limit=20, offset=0):
+    """
+    Runs the query against the FTS5 table, best bm25 score first.
+
+    Scoring has to visit every match, which for a broad query ("pune" on a
+    million rows) costs far more than the lookup itself. Queries matching
+    more than RANKED_CANDIDATES rows are therefore returned in index order
+    without a score; anything more specific is fully ranked.
+    """
+    match = match_expression(terms, kind)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT count(*) FROM (SELECT 1 FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s LIMIT %s)",
+            [match, RANKED_CANDIDATES + 1],
+        )
+        if cursor.fetchone()[0] > RANKED_CANDIDATES:
+            score_sql, order = 'NULL', 'rowid'
+        else:
+            score_sql = f"bm25({SEARCH_TABLE}, {', '.join(str(weight) for weight in RANK_WEIGHTS)})"
+            order = 'score, rowid'
+        cursor.execute(
+            f"SELECT rowid, kind, code, name, father_name, phone, city, {score_sql} AS score "
+            f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s ORDER BY {order} LIMIT %s OFFSET %s",
+            [match, limit, offset],
+        )
+        return [
+            {
+                'type': row_kind, 'id': rowid // 2, 'code': code, 'name': name, 'father_name': father_name or None,
+                'phone': phone, 'city': city, 'score': None if score is None else round(-score, 4),
+            }
+            for rowid, row_kind, code, name, father_name, phone, city, score in cursor.fetchall()
+        ]
+
+
+def _orm_rows(model, kind, code_field, fields, terms, limit):
+    conditions = [
+        functools.reduce(operator.or_, [models.Q(**{f"{code_field}__istartswith": term})] + [
+            models.Q(**{f"{field}__icontains": term}) for field in fields
+        ])
+        for term in terms
+    ]
+    rows = model.objects.filter(*conditions).order_by('pk').values(
+        'pk', code_field, 'first_name', 'last_name', 'phone', 'city', *(['father_name'] if kind == 'student' else []),
+    )[:limit]
+    return [
+        {
+            'type': kind, 'id': row['pk'], 'code': row[code_field], 'name': f"{row['first_name']} {row['last_name']}",
+            'father_name': row.get('father_name'), 'phone': row['phone'], 'city': row['city'], 'score': None,
+        }
+        for row in rows
+    ]
+
+
+def search_orm(terms, kind=None, limit=20, offset=0):
+    """
+    Fallback for databases without the FTS5 index: ``icontains`` filters, students before teachers.
+
+    It scans both tables, so it is only meant for small installations and tests.
+    """
+    wanted = offset + limit
+    results = []
+    if kind in (None, 'student'):
+        results += _orm_rows(
+            Student, 'student', 'student_id', ['first_name', 'last_name', 'father_name', 'phone', 'city'], terms, wanted,
+        )
+    if kind in (None, 'teacher') and len(results) < wanted:
+        results += _orm_rows(
+            Teacher, 'teacher', 'teacher_id', ['first_name', 'last_name', 'phone', 'city'], terms, wanted - len(results),
+        )
+    return results[offset:wanted]
+
+
+def search(query, kind=None, limit=20, offset=0):
+    """
+    Ranked prefix search over students and teachers by ID, name, father's name, phone and city.
+
+    Returns ``(backend, results)``; ask for ``limit + 1`` rows to find out
+    whether there is a next page.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return None, []
+    if fts_available():
+        return 'fts5', search_fts(terms, kind, limit, offset)
+    return 'orm', search_orm(terms, kind, limit, offset)
+
+
+def rebuild_search_index():
+    """Re-fills the FTS5 table from Student and Teacher, e.g. after restoring a dump taken without it."""
+    if not fts_available():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, kind, code, name, father_name, phone, city) "
+            "SELECT 2 * id, 'student', student_id, first_name || ' ' || last_name, father_name, phone, city "
+            "FROM students_student"
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, kind, code, name, father_name, phone, city) "
+            "SELECT 2 * id + 1, 'teacher', teacher_id, first_name || ' ' || last_name, '', phone, city "
+            "FROM students_teacher"
+        )
+    return True
@@ -1,9 +1,33 @@
-from rest_framework import serializers
+from rest_framework import exceptions, serializers, status
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError
 from django.utils import timezone
+from .database import write_atomic
 from .models import (
     Department, Degree, Course, ClassGroup, DepartmentCourse,
     Student, Teacher, HOD, CarouselImage, Assignment, Submission
-,Role,RoleAssignment)
+,Role,RoleAssignment, Job)
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves pks from ``context['prefetched'][Model]`` instead of one query per value.
+
+    Falls back to the regular lookup when the serializer is used without that context.
+    """
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched', {}).get(self.queryset.model)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = self.queryset.model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in prefetched:
+            self.fail('does_not_exist', pk_value=data)
+        return prefetched[pk]
 
 # Department Serializer
 class DepartmentSerializer(serializers.ModelSerializer):
@@ -47,6 +71,10 @@ class StudentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Enrollment year must be after 2000.")
         return attrs
 
+# Student import Serializer: same rules, related objects resolved per chunk
+class StudentImportSerializer(StudentSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+
 # Teacher Serializer
 class TeacherSerializer(serializers.ModelSerializer):
     class Meta:
@@ -63,7 +91,21 @@ class HODSerializer(serializers.ModelSerializer):
 class CarouselImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = CarouselImage
-        fields = ['id', 'image', 'is_active']
+        fields = ['id', 'image', 'is_active', 'width', 'height', 'variants']
+
+    variants = serializers.SerializerMethodField()
+
+    def get_variants(self, obj):
+        """``{format: {width: url}}``, absolute when serialized for a request."""
+        storage = CarouselImage._meta.get_field('image').storage
+        request = self.context.get('request')
+        return {
+            fmt: {
+                width: request.build_absolute_uri(storage.url(name)) if request else storage.url(name)
+                for width, name in sizes.items()
+            }
+            for fmt, sizes in obj.variants.items()
+        }
 
 # Assignment Serializer
 class AssignmentSerializer(serializers.ModelSerializer):
@@ -77,17 +119,42 @@ class AssignmentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Due date must be in the future.")
         return attrs
 
+class DuplicateSubmission(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "You have already submitted this assignment."
+    default_code = 'duplicate_submission'
+
 # Submission Serializer
 class SubmissionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Submission
         fields = '__all__'
-
-    def validate(self, attrs):
-        # Example: Ensure a student can only submit once per assignment
-        if Submission.objects.filter(student=attrs['student'], assignment=attrs['assignment']).exists():
-            raise serializers.ValidationError("You have already submitted this assignment.")
-        return attrs
+        # The unique constraint is checked by the INSERT itself, not by a SELECT beforehand
+        validators = []
+
+    def create(self, validated_data):
+        return self._save(Submission(**validated_data), new_file=True)
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        return self._save(instance, new_file='file' in validated_data)
+
+    def _save(self, submission, new_file):
+        try:
+            with write_atomic():
+                submission.save()
+        except IntegrityError:
+            # The upload was already written to storage by the time the insert failed
+            if new_file and submission.file:
+                submission.file.delete(save=False)
+            # Backends name the violated constraint differently; the row that wins it is the same everywhere
+            if Submission.objects.filter(
+                student=submission.student_id, assignment=submission.assignment_id,
+            ).exclude(pk=submission.pk).exists():
+                raise DuplicateSubmission()
+            raise
+        return submission
 
 
 class RoleSerializer(serializers.ModelSerializer):
@@ -98,4 +165,10 @@ class RoleSerializer(serializers.ModelSerializer):
 class RoleAssignmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = RoleAssignment
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = '__all__'
+        read_only_fields = [field.name for field in Job._meta.fields]
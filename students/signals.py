@@ -0,0 +1,143 @@
+from django.apps import apps
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .caching import REFERENCE_MODELS, VERSIONED_MODELS, record_changes
+from .models import (
+    Assignment, AssignmentSummary, ClassGroup, Course, Student, StudentSummary, Submission, SubmissionBlob, Teacher,
+)
+
+
+@receiver(post_save, sender=Submission)
+def track_submission_blob(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    name = instance.file.name
+    previous = None if created else getattr(instance, '_loaded_file_name', None)
+    if name != previous:
+        if name:
+            SubmissionBlob.acquire(name)
+        if previous:
+            SubmissionBlob.release(previous, instance.file.storage)
+    instance._loaded_file_name = name
+
+
+@receiver(post_delete, sender=Submission)
+def release_submission_blob(sender, instance, **kwargs):
+    if instance.file.name:
+        SubmissionBlob.release(instance.file.name, instance.file.storage)
+
+
+def model_changed(sender, **kwargs):
+    record_changes([sender._meta.label])
+
+
+def reference_relation_changed(sender, instance, model, action, **kwargs):
+    if action.startswith('post_'):
+        record_changes([label for label in (type(instance)._meta.label, model._meta.label) if label in REFERENCE_MODELS])
+
+
+for label in VERSIONED_MODELS:
+    post_save.connect(model_changed, sender=label)
+    post_delete.connect(model_changed, sender=label)
+
+# Only relations declared on a reference model appear in its payload. A listener
+# also disables Django's fast path for ``add()``, so none is attached elsewhere.
+for label in REFERENCE_MODELS:
+    for field in apps.get_model(label)._meta.many_to_many:
+        m2m_changed.connect(reference_relation_changed, sender=field.remote_field.through)
+
+
+@receiver(m2m_changed, sender=ClassGroup.courses.through)
+def class_group_courses_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # The course ids are part of a class group's payload, so adding or removing
+    # one is a change to the class group row.
+    if reverse:
+        if action == 'pre_clear':
+            groups = ClassGroup.objects.filter(courses=instance)
+        elif action in ('post_add', 'post_remove'):
+            groups = ClassGroup.objects.filter(pk__in=pk_set)
+        else:
+            return
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        groups = ClassGroup.objects.filter(pk=instance.pk)
+    else:
+        return
+    groups.update(updated_at=timezone.now())
+    record_changes([ClassGroup._meta.label])
+
+
+@receiver(pre_delete, sender=Teacher)
+def teacher_deleted(sender, instance, **kwargs):
+    # class_incharge is cleared by SET_NULL, an UPDATE that sends no signals,
+    # and it is part of a class group's payload.
+    if ClassGroup.objects.filter(class_incharge=instance).update(updated_at=timezone.now()):
+        record_changes([ClassGroup._meta.label])
+
+
+@receiver(pre_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    # Its rows in the courses through table go in a cascade that sends no
+    # m2m_changed, and the course ids are part of a class group's payload.
+    if ClassGroup.objects.filter(courses=instance).update(updated_at=timezone.now()):
+        record_changes([ClassGroup._meta.label])
+
+
+@receiver(post_save, sender=Student)
+def student_counted(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    key = instance.summary_key()
+    previous = None if created else getattr(instance, '_loaded_summary_key', None)
+    if key != previous:
+        if previous is not None and None in previous:
+            # Loaded with deferred fields: where it was counted before is unknown.
+            StudentSummary.refresh([instance.class_group_id])
+            AssignmentSummary.refresh_class_groups([instance.class_group_id])
+        else:
+            StudentSummary.adjust(key, 1)
+            if previous is not None:
+                StudentSummary.adjust(previous, -1)
+                if previous[0] != key[0]:
+                    # Their submissions count for the assignments of their class group only
+                    AssignmentSummary.refresh_class_groups({previous[0], key[0]} - {None})
+    instance._loaded_summary_key = key
+
+
+@receiver(post_delete, sender=Student)
+def student_uncounted(sender, instance, **kwargs):
+    StudentSummary.adjust(getattr(instance, '_loaded_summary_key', None) or instance.summary_key(), -1)
+
+
+@receiver(post_save, sender=Submission)
+def submission_counted(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_loaded_assignment_id', None)
+    if created:
+        if instance.is_by_member:
+            AssignmentSummary.adjust(instance.assignment_id, 1, late=instance.is_late)
+    elif instance.assignment_id != previous or instance.student_id != getattr(instance, '_loaded_student_id', None):
+        AssignmentSummary.refresh({instance.assignment_id, previous} - {None})
+    instance._loaded_assignment_id = instance.assignment_id
+    instance._loaded_student_id = instance.student_id
+
+
+@receiver(post_delete, sender=Submission)
+def submission_uncounted(sender, instance, **kwargs):
+    try:
+        late, counted = instance.is_late, instance.is_by_member
+    except Assignment.DoesNotExist:
+        return  # Deleted with its assignment, which took the counters along
+    if counted:
+        AssignmentSummary.adjust(instance.assignment_id, -1, late=late)
+
+
+@receiver(post_save, sender=Assignment)
+def assignment_changed(sender, instance, created, raw=False, **kwargs):
+    previous = (getattr(instance, '_loaded_due_date', None), getattr(instance, '_loaded_class_group_id', None))
+    if not (raw or created) and None not in previous and previous != (instance.due_date, instance.class_group_id):
+        AssignmentSummary.refresh([instance.pk])
+    instance._loaded_due_date = instance.due_date
+    instance._loaded_class_group_id = instance.class_group_id
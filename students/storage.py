@@ -0,0 +1,153 @@
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import parse_etags
+
+DIGEST_NAME = re.compile(r'(?:^|/)([0-9a-f]{64})(?:\.[^/]*)?$')
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every upload once, under the SHA-256 of its content.
+
+    Files are hashed while they are streamed to disk in chunks, so
+    byte-identical resubmissions end up as a single blob
+    (``submissions/ab/abcd...ef.pdf``). Blobs are only removed when no
+    Submission references them any more; see SubmissionBlob. With
+    ``reference_counted`` a save locks the blob's SubmissionBlob row before
+    it reuses or writes the file.
+    """
+
+    def __init__(self, prefix='submissions', reference_counted=False, **kwargs):
+        self.prefix = prefix
+        self.reference_counted = reference_counted
+        super().__init__(**kwargs)
+
+    def get_available_name(self, name, max_length=None):
+        # Same content, same name: an existing blob is reused, never renamed.
+        return name
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()[:10]
+        directory = self.path(self.prefix)
+        os.makedirs(directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(descriptor, 'wb') as temp_file:
+                for chunk in content.chunks(CHUNK_SIZE):
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            hexdigest = digest.hexdigest()
+            blob_name = f"{self.prefix}/{hexdigest[:2]}/{hexdigest}{extension}"
+            blob_path = self.path(blob_name)
+            if self.reference_counted:
+                from .models import SubmissionBlob
+
+                # Before deciding to reuse the file: deleting it takes the same lock
+                SubmissionBlob.lock(blob_name)
+            if os.path.exists(blob_path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temp_path, self.file_permissions_mode)
+                os.replace(temp_path, blob_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return blob_name
+
+    def delete(self, name):
+        from .models import SubmissionBlob
+
+        if SubmissionBlob.objects.filter(name=name, ref_count__gt=0).exists():
+            return
+        super().delete(name)
+
+
+def submission_storage():
+    return ContentAddressedStorage(reference_counted=True)
+
+
+def carousel_storage():
+    return ContentAddressedStorage(prefix='carousel_images')
+
+
+def file_etag(storage, name):
+    """Strong ETag for content-addressed blobs, weak size/mtime ETag for anything else."""
+    match = DIGEST_NAME.search(name)
+    if match:
+        return f'"{match.group(1)}"'
+    return f'W/"{storage.size(name)}-{int(storage.get_modified_time(name).timestamp())}"'
+
+
+def _iter_range(file, start, length):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def file_response(request, storage, name):
+    """
+    Serves a stored file with ETag, If-None-Match and single byte-range support.
+
+    Returns 304 when the client's copy is current, 206 for a satisfiable
+    ``Range: bytes=`` request and 416 for an unsatisfiable one.
+    """
+    etag = file_etag(storage, name)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')) or request.headers.get('If-None-Match') == '*':
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    size = storage.size(name)
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    range_header = request.headers.get('Range', '')
+    if_range = request.headers.get('If-Range')
+    match = RANGE_HEADER.match(range_header.strip())
+    # A changed file (If-Range mismatch) or a weak validator gets the whole body.
+    if match and (if_range is None or (if_range == etag and not etag.startswith('W/'))):
+        first, last = match.groups()
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        elif last:
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start, end = size, size - 1
+        end = min(end, size - 1)
+        if start > end or start >= size:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            response['ETag'] = etag
+            return response
+
+        response = StreamingHttpResponse(
+            _iter_range(storage.open(name, 'rb'), start, end - start + 1),
+            status=206, content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        response = FileResponse(storage.open(name, 'rb'), content_type=content_type)
+
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    return response
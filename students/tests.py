@@ -1,3 +1,1774 @@
-from django.test import TestCase
+import csv
+import io
+import itertools
+import json
+import os
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, OperationalError, connection, connections, models, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import features
+from rest_framework.test import APITestCase
+
+from .analytics import rebuild_summaries, submission_board
+from .backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from .caching import CAROUSEL_MODEL, bump_model_version
+from .database import sqlite_pragma_statements, sqlite_pragma_values, write_atomic
+from .filters import AssignmentFilter, StudentFilter, SubmissionFilter, TeacherFilter
+from .images import variant_formats
+from .importers import import_students
+from .metrics import ValueFile, registry
+from .pagination import StableCursorPagination
+from .urls import router
+from .jobs import TASKS, claim, enqueue, requeue_stale, run_job, task
+from .models import (
+    PROMOTION_CASE_BATCH_SIZE, Assignment, AssignmentSummary, CarouselImage, ClassGroup, Course, Degree, Department,
+    DepartmentCourse, HOD, IdSequence, Job, Role, RoleAssignment, Student, StudentSummary, Submission,
+    SubmissionBlob, TableVersion, Teacher, graduate_students, promote_students,
+)
+
+def setUpModule():
+    # No sampled timing lines in the test output (RequestTimingTests samples every
+    # request), no slow-query log file and metrics kept away from a running server's.
+    instrumentation = override_settings(
+        REQUEST_TIMING_SAMPLE_RATE=0, SLOW_QUERY_THRESHOLD_MS=None, METRICS_DIR=tempfile.mkdtemp(),
+    )
+    instrumentation.enable()
+    unittest.addModuleCleanup(instrumentation.disable)
+
+
+STUDENT = {
+    'first_name': 'Asha', 'last_name': 'Rao', 'father_name': 'Ravi Rao', 'email': 'asha@example.com',
+    'phone': '9999999999', 'village': 'Rampur', 'city': 'Pune', 'state': 'Maharashtra', 'pin_code': '411001',
+    'dob': date(2004, 5, 6), 'gender': 'F',
+}
+
+# Smallest valid GIF, for ImageField uploads
+GIF = (
+    b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00'
+    b',\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;'
+)
+
+TEACHER = {
+    'first_name': 'Vikram', 'last_name': 'Sethi', 'email': 'vikram@example.com', 'phone': '8888888888',
+    'dob': date(1980, 1, 2), 'joining_date': date(2010, 7, 1), 'designation': 'Professor',
+    'qualification': 'PhD', 'village': 'Rampur', 'city': 'Pune', 'state': 'Maharashtra', 'pin_code': '411001',
+    'gender': 'M',
+}
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN is SQLite specific")
+class QueryPlanTests(TestCase):
+    """Each hot query must be answered from an index, never by scanning the table."""
+
+    def assertUsesIndex(self, queryset, index_name, ordered=True):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        if ordered:
+            self.assertNotIn('USE TEMP B-TREE', plan)
+
+    def test_students_of_a_batch(self):
+        queryset = Student.objects.filter(degree=1, enrollment_year=2022).order_by('pk')
+        self.assertUsesIndex(queryset, 'student_batch_idx')
+
+    def test_active_students_of_a_class_group(self):
+        queryset = Student.objects.filter(class_group=1, is_graduated=False)
+        self.assertUsesIndex(queryset, 'student_active_idx')
+
+    def test_teachers_of_a_department(self):
+        queryset = Teacher.objects.filter(department=1).order_by('pk')
+        self.assertUsesIndex(queryset, 'teacher_department_idx')
+
+    def test_next_class_group_lookup(self):
+        queryset = ClassGroup.objects.filter(degree=1, enrollment_year=2022, current_year=2).order_by('pk')
+        self.assertUsesIndex(queryset, 'classgroup_promotion_idx')
+
+    def test_submissions_of_an_assignment(self):
+        queryset = Submission.objects.filter(assignment=1).order_by('pk')
+        self.assertUsesIndex(queryset, 'students_submission_assignment_id')
+
+    def test_filtersets(self):
+        cases = [
+            (StudentFilter, {'degree': 1}, 'students_student_degree_id'),
+            (StudentFilter, {'class_group': 1}, 'students_student_class_group_id'),
+            (StudentFilter, {'enrollment_year': 2022}, 'student_year_idx'),
+            (StudentFilter, {'is_graduated': 'true'}, 'student_graduated_idx'),
+            (StudentFilter, {'gender': 'F'}, 'student_gender_idx'),
+            (StudentFilter, {'state': 'Kerala'}, 'student_state_idx'),
+            (TeacherFilter, {'department': 1}, 'teacher_department_idx'),
+            (TeacherFilter, {'designation': 'Professor'}, 'teacher_designation_idx'),
+            (AssignmentFilter, {'class_group': 1}, 'students_assignment_class_group_id'),
+            (SubmissionFilter, {'assignment': 1}, 'students_submission_assignment_id'),
+            (SubmissionFilter, {'student': 1}, 'students_submission_student_id'),
+        ]
+        for filterset_class, params, index_name in cases:
+            with self.subTest(params):
+                queryset = filterset_class(params, queryset=filterset_class.Meta.model.objects.all()).qs
+                self.assertUsesIndex(queryset.order_by('pk'), index_name)
+
+    def test_range_filtersets(self):
+        # A range can't come back in pk order, but it must still be an index range scan.
+        queryset = AssignmentFilter(
+            {'due_date_after': '2026-01-01', 'due_date_before': '2026-02-01'}, queryset=Assignment.objects.all(),
+        ).qs
+        self.assertUsesIndex(queryset.order_by('pk'), 'assignment_due_idx', ordered=False)
+        queryset = SubmissionFilter(
+            {'submitted_at_after': '2026-01-01T00:00:00Z', 'submitted_at_before': '2026-02-01T00:00:00Z'},
+            queryset=Submission.objects.all(),
+        ).qs
+        self.assertUsesIndex(queryset.order_by('pk'), 'submission_submitted_idx', ordered=False)
+
+    def test_duplicate_submission_check(self):
+        queryset = Submission.objects.filter(student=1, assignment=1)
+        # SQLite backs the unique_submission_per_student constraint with an automatic index
+        self.assertUsesIndex(queryset, 'sqlite_autoindex_students_submission')
+
+    def test_submission_status_board(self):
+        assignment = Assignment(pk=1, class_group_id=1, due_date=date(2030, 1, 15))
+        for status in (None, 'missing'):
+            with self.subTest(status):
+                queryset = submission_board(assignment, status).order_by('pk')
+                self.assertUsesIndex(queryset, 'students_student_class_group_id')
+                self.assertUsesIndex(queryset, 'sqlite_autoindex_students_submission')
+
+
+class QueryBudgetTests(APITestCase):
+    """
+    Every route must run a fixed number of queries, however many rows there are.
+
+    Each endpoint is called, the dataset is grown, and the endpoint is called
+    again; both calls must stay within the same budget.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+        cls.degree = Degree.objects.create(name='B.Tech', duration=4, department=cls.department, abbreviation='BT')
+        cls.course = Course.objects.create(name='Algorithms', description='', credits=4, degree=cls.degree, year=1)
+        cls.teacher = Teacher.objects.create(department=cls.department, **TEACHER)
+        cls.class_group = ClassGroup.objects.create(
+            name='BT 2022', degree=cls.degree, enrollment_year=2022, current_year=1, class_incharge=cls.teacher,
+        )
+        cls.class_group.courses.add(cls.course)
+        cls.assignment = Assignment.objects.create(
+            title='Sorting', description='', due_date=date.today() + timedelta(days=7), class_group=cls.class_group,
+        )
+        cls.role = Role.objects.create(name='TPO')
+        cls.student = cls.make_student()
+        HOD.objects.create(teacher=cls.teacher, department=cls.department)
+        DepartmentCourse.objects.create(course=cls.course, department=cls.department)
+        RoleAssignment.objects.create(role=cls.role, teacher=cls.teacher, department=cls.department)
+        Submission.objects.create(student=cls.student, assignment=cls.assignment, file='submissions/sorting.pdf')
+        CarouselImage.objects.create(image='carousel_images/1.jpg')
+        cls.serial = itertools.count()
+
+    def setUp(self):
+        # Measure the uncached path; CachedReferenceDataTests covers the hits.
+        cache.clear()
+
+    @classmethod
+    def make_student(cls, **kwargs):
+        return Student.objects.create(
+            degree=cls.degree, class_group=cls.class_group, enrollment_year=2022, **{**STUDENT, **kwargs}
+        )
+
+    def grow(self, count=15):
+        """Adds ``count`` more rows to every table the endpoints read."""
+        tag = f"{next(self.serial)}-"
+        for i in range(count):
+            department = Department.objects.create(name=f"Dept {tag}{i}", description='', code=f"D{tag}{i}")
+            degree = Degree.objects.create(name=f"Degree {tag}{i}", duration=3, department=department, abbreviation='BS')
+            course = Course.objects.create(name=f"Course {tag}{i}", description='', credits=3, degree=degree, year=1)
+            teacher = Teacher.objects.create(department=department, **TEACHER)
+            class_group = ClassGroup.objects.create(
+                name=f"Group {tag}{i}", degree=degree, enrollment_year=2022, class_incharge=teacher,
+            )
+            class_group.courses.add(course, self.course)
+            student = self.make_student()
+            role = Role.objects.create(name=f"Role {tag}{i}")
+            HOD.objects.create(teacher=teacher, department=department)
+            DepartmentCourse.objects.create(course=course, department=department)
+            RoleAssignment.objects.create(role=role, teacher=teacher, department=department)
+            Assignment.objects.create(
+                title=f"Assignment {tag}{i}", description='', due_date=self.assignment.due_date, class_group=class_group,
+            )
+            Submission.objects.create(student=student, assignment=self.assignment, file=f"submissions/{tag}{i}.pdf")
+            CarouselImage.objects.create(image=f"carousel_images/{tag}{i}.jpg")
+
+    def query_count(self, method, url, data=None):
+        """Calls ``url``; returns the number of queries and the response, with a streamed body read into ``lines``."""
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, format='multipart' if method == 'post' else None)
+            if response.streaming:
+                response.lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertLess(response.status_code, 300, getattr(response, 'data', None))
+        return len(queries), response
+
+    def assertBudget(self, budget, method, url, data=None):
+        """
+        Calls ``url`` before and after growing the dataset; both must use the same, bounded number of queries.
+
+        Returns the second response, for the caller to check what the budget bought.
+        """
+        before, _ = self.query_count(method, url, data() if callable(data) else data)
+        self.grow()
+        after, response = self.query_count(method, url, data() if callable(data) else data)
+        self.assertLessEqual(before, budget, f"{method.upper()} {url} ran {before} queries")
+        self.assertEqual(before, after, f"{method.upper()} {url} went from {before} to {after} queries")
+        return response
+
+    @staticmethod
+    def viewset(prefix):
+        return next(viewset for registered, viewset, _ in router.registry if registered == prefix)
+
+    def assertSerialized(self, record, prefix):
+        """``record`` has exactly the fields of the serializer of the ``prefix`` route."""
+        self.assertEqual(set(record), set(self.viewset(prefix).serializer_class().fields), prefix)
+
+    def assertPage(self, data, total, prefix=None):
+        """``data`` is the first cursor page of a list of ``total`` rows."""
+        self.assertLessEqual({'next', 'previous', 'results'}, set(data))
+        self.assertEqual(len(data['results']), min(total, settings.REST_FRAMEWORK['PAGE_SIZE']))
+        self.assertIsNone(data['previous'])
+        if prefix is not None:
+            self.assertSerialized(data['results'][0], prefix)
+
+    def test_list_endpoints(self):
+        budgets = {
+            'departments': 2, 'degrees': 2, 'courses': 2, 'department-courses': 2, 'roles': 2,
+            'teachers': 2, 'hods': 2, 'class-groups': 3, 'students': 2, 'assignments': 2,
+            'submissions': 2, 'carousel': 2, 'role-assignments': 2,
+        }
+        for prefix, budget in budgets.items():
+            with self.subTest(prefix):
+                response = self.assertBudget(budget, 'get', f"/api/{prefix}/")
+                self.assertPage(response.json(), self.viewset(prefix).queryset.model.objects.count(), prefix)
+
+    def test_serializer_path_loads_only_rendered_relations(self):
+        # The serializers render foreign keys as ids: no joins, and no query per row
+        budgets = {
+            'courses': 2, 'department-courses': 2, 'hods': 2, 'class-groups': 3, 'submissions': 2,
+            'role-assignments': 2,
+        }
+        with mock.patch('students.fieldsets.ValuesPlan.for_serializer_class', return_value=None):
+            for rows in (1, 20):
+                if rows == 20:
+                    self.grow(19)
+                for prefix, budget in budgets.items():
+                    with self.subTest(prefix, rows=rows), CaptureQueriesContext(connection) as queries:
+                        response = self.client.get(f"/api/{prefix}/")
+                    self.assertEqual(len(response.json()['results']), rows)
+                    self.assertEqual(len(queries), budget)
+                    table = self.viewset(prefix).queryset.model._meta.db_table
+                    page = next(query['sql'] for query in queries if f'FROM "{table}"' in query['sql'])
+                    self.assertNotIn(' JOIN ', page)
+
+    def test_values_fast_path_matches_the_serializer(self):
+        prefixes = [
+            'departments', 'degrees', 'courses', 'department-courses', 'roles', 'teachers', 'hods',
+            'class-groups', 'students', 'assignments', 'submissions', 'carousel', 'role-assignments',
+        ]
+        for prefix in prefixes:
+            for query in ('', '?fields=id', '?fields=student_id,first_name,dob' if prefix == 'students' else '?fields='):
+                with self.subTest(prefix + query):
+                    cache.clear()
+                    fast = self.client.get(f"/api/{prefix}/{query}").json()
+                    cache.clear()
+                    with mock.patch('students.fieldsets.ValuesPlan.for_serializer_class', return_value=None):
+                        slow = self.client.get(f"/api/{prefix}/{query}").json()
+                    self.assertEqual(fast, slow)
+
+        response = self.client.get('/api/students/?fields=student_id,first_name')
+        self.assertEqual(set(response.data['results'][0]), {'student_id', 'first_name'})
+        self.assertEqual(self.client.get('/api/students/?fields=nope').status_code, 400)
+        everything = self.client.get('/api/students/').data['results']
+        self.assertEqual(self.client.get('/api/students/?fields=').data['results'], everything)
+        self.assertEqual(self.client.get('/api/students/?fields=,').data['results'], everything)
+
+    def test_retrieve_endpoints(self):
+        objects = {
+            'departments': self.department, 'degrees': self.degree, 'courses': self.course,
+            'department-courses': DepartmentCourse.objects.first(), 'roles': self.role,
+            'teachers': self.teacher, 'hods': HOD.objects.first(), 'class-groups': self.class_group,
+            'students': self.student, 'assignments': self.assignment, 'submissions': Submission.objects.first(),
+            'carousel': CarouselImage.objects.first(), 'role-assignments': RoleAssignment.objects.first(),
+        }
+        for prefix, instance in objects.items():
+            with self.subTest(prefix):
+                budget = 3 if prefix == 'class-groups' else 2
+                data = self.assertBudget(budget, 'get', f"/api/{prefix}/{instance.pk}/").json()
+                self.assertSerialized(data, prefix)
+                self.assertEqual(data[instance._meta.pk.name], instance.pk)
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_create_endpoints(self):
+        counter = iter(range(1000))
+
+        def unique(prefix):
+            return f"{prefix}{next(counter)}"
+
+        # Each budget includes the SAVEPOINT and RELEASE of the write's transaction
+        # (BEGIN and COMMIT outside a test), which its version bumps commit with.
+        payloads = {
+            'departments': (6, lambda: {'name': unique('Physics '), 'description': 'Core', 'code': unique('PH')}),
+            'degrees': (6, lambda: {
+                'name': unique('M.Sc '), 'duration': 2, 'department': self.department.pk, 'abbreviation': 'MS',
+            }),
+            'courses': (6, lambda: {
+                'name': unique('Graphs '), 'description': 'Core', 'credits': 3, 'degree': self.degree.pk, 'year': 2,
+            }),
+            'roles': (4, lambda: {'name': unique('Warden ')}),
+            'teachers': (9, lambda: {**TEACHER, 'department': self.department.pk}),
+            'class-groups': (12, lambda: {
+                'name': unique('Group '), 'degree': self.degree.pk, 'enrollment_year': 2023,
+                'courses': [self.course.pk],
+            }),
+            'students': (11, lambda: {
+                **STUDENT, 'degree': self.degree.pk, 'class_group': self.class_group.pk, 'enrollment_year': 2022,
+            }),
+            'assignments': (5, lambda: {
+                'title': unique('Essay '), 'description': 'Core', 'due_date': self.assignment.due_date,
+                'class_group': self.class_group.pk,
+            }),
+            'department-courses': (11, lambda: {
+                'course': Course.objects.create(
+                    name=unique('Networks '), description='Core', credits=3, degree=self.degree, year=3,
+                ).pk,
+                'department': self.department.pk,
+            }),
+            'hods': (7, lambda: {
+                'teacher': Teacher.objects.create(department=self.department, **TEACHER).pk,
+                'department': self.department.pk,
+            }),
+            'role-assignments': (8, lambda: {
+                'role': Role.objects.create(name=unique('Warden ')).pk,
+                'teacher': self.teacher.pk,
+                'department': self.department.pk,
+            }),
+            'submissions': (13, lambda: {
+                'student': self.make_student().pk,
+                'assignment': self.assignment.pk,
+                'file': SimpleUploadedFile('answer.pdf', unique('%PDF-1.4 ').encode()),
+            }),
+            'carousel': (6, lambda: {'image': SimpleUploadedFile('slide.gif', GIF, content_type='image/gif')}),
+        }
+        for prefix, (budget, payload) in payloads.items():
+            with self.subTest(prefix):
+                response = self.assertBudget(budget, 'post', f"/api/{prefix}/", payload)
+                self.assertEqual(response.status_code, 201)
+                self.assertSerialized(response.json(), prefix)
+                model = self.viewset(prefix).queryset.model
+                self.assertTrue(model.objects.filter(pk=response.json()[model._meta.pk.name]).exists())
+
+    def test_custom_actions(self):
+        degree, class_group, assignment = self.degree.pk, self.class_group.pk, self.assignment.pk
+        students = Student.objects.filter(degree=degree, enrollment_year=2022)
+
+        data = self.assertBudget(2, 'get', f"/api/students/by-class/{degree}/2022/").json()
+        self.assertPage(data, students.count(), 'students')
+        data = self.assertBudget(2, 'get', f"/api/submissions/by-assignment/{assignment}/").json()
+        self.assertPage(data, self.assignment.submissions.count(), 'submissions')
+
+        for prefix, fmt, model in [('students', 'csv', Student), ('teachers', 'ndjson', Teacher),
+                                   ('submissions', 'csv', Submission)]:
+            with self.subTest(prefix):
+                lines = self.assertBudget(1, 'get', f"/api/{prefix}/export/{fmt}/").lines
+                self.assertEqual(len(lines), model.objects.count() + (fmt == 'csv'))
+
+        data = self.assertBudget(
+            6, 'post', f"/api/class-groups/{class_group}/promote_students/", {'dry_run': 'true'},
+        ).json()
+        self.assertEqual(data['status'], 'promotion planned')
+        self.assertEqual(data['plan']['promoted_class_groups'], [{'class_group': class_group, 'current_year': 2}])
+        self.assertEqual(sum(move['students'] for move in data['plan']['moves']), students.count())
+
+        data = self.assertBudget(1, 'get', '/api/analytics/').json()
+        self.assertEqual(set(data), {'students', 'gender', 'departments', 'degrees', 'batches', 'years'})
+        self.assertEqual(data['students']['total'], Student.objects.count())
+        data = self.assertBudget(2, 'get', '/api/analytics/assignments/').json()
+        self.assertPage(data, Assignment.objects.count())
+        self.assertEqual(data['results'][0]['submitted'], self.assignment.submissions.count())
+
+        for status_filter, entries in [(None, students.count()), ('missing', 0)]:
+            with self.subTest(status_filter):
+                data = self.assertBudget(
+                    3, 'get', f"/api/assignments/{assignment}/status/", status_filter and {'status': status_filter},
+                ).json()
+                self.assertEqual(data['counts']['class_size'], students.count())
+                self.assertEqual(data['counts']['missing'], 0)
+                self.assertPage(data, entries)
+
+        data = self.assertBudget(11, 'post', f"/api/class-groups/{class_group}/graduate/").json()
+        self.assertEqual(data, {'graduated': 15, 'already_graduated': students.count() - 15})
+        data = self.assertBudget(10, 'post', f"/api/degrees/{degree}/graduate/", {'enrollment_year': 2022}).json()
+        self.assertEqual(data, {'graduated': 15, 'already_graduated': students.count() - 15})
+
+    def test_bulk_import(self):
+        def upload():
+            rows = [','.join(['first_name', 'last_name', 'father_name', 'email', 'phone', 'village', 'city',
+                              'state', 'pin_code', 'dob', 'gender', 'degree', 'class_group', 'enrollment_year'])]
+            rows += [
+                f"Asha,Rao,Ravi,asha{i}@example.com,9999999999,Rampur,Pune,MH,411001,2004-05-06,F,"
+                f"{self.degree.pk},{self.class_group.pk},2022"
+                for i in range(20)
+            ]
+            return {'file': SimpleUploadedFile('students.csv', '\n'.join(rows).encode())}
+
+        data = self.assertBudget(11, 'post', '/api/students/bulk-import/', upload).json()
+        self.assertEqual(data, {'created': 20, 'failed': 0, 'errors': []})
+
+
+class PromotionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+        cls.degree = Degree.objects.create(name='B.Tech', duration=3, department=department, abbreviation='BT')
+
+    def make_group(self, enrollment_year, current_year):
+        return ClassGroup.objects.create(
+            name=f"BT {enrollment_year}", degree=self.degree, enrollment_year=enrollment_year, current_year=current_year,
+        )
+
+    def make_student(self, class_group, enrollment_year=None):
+        return Student.objects.create(
+            degree=self.degree, class_group=class_group,
+            enrollment_year=enrollment_year or class_group.enrollment_year, **STUDENT,
+        )
+
+    def test_students_move_to_the_next_class_group(self):
+        # An existing second-year group of the batch takes the students of the first-year one
+        second_year = self.make_group(2023, 2)
+        first_year = self.make_group(2023, 1)
+        final_year = self.make_group(2021, 3)
+        other_batch = self.make_group(2024, 1)
+        moving = self.make_student(first_year)
+        staying = self.make_student(second_year)
+        finishing = self.make_student(final_year)
+        unaffected = self.make_student(other_batch)
+
+        plan = promote_students([first_year, final_year])
+
+        self.assertEqual(plan['moves'], [{
+            'class_group': first_year.pk, 'degree': self.degree.pk, 'enrollment_year': 2023, 'students': 1,
+            'next_class_group': second_year.pk,
+        }])
+        self.assertEqual(plan['graduation'], {'graduated': 1, 'already_graduated': 0})
+        for class_group, current_year in [(first_year, 2), (second_year, 2), (final_year, 3), (other_batch, 1)]:
+            class_group.refresh_from_db()
+            self.assertEqual(class_group.current_year, current_year)
+        for student, class_group, is_graduated in [
+            (moving, second_year, False), (staying, second_year, False),
+            (finishing, final_year, True), (unaffected, other_batch, False),
+        ]:
+            student.refresh_from_db()
+            self.assertEqual((student.class_group_id, student.is_graduated), (class_group.pk, is_graduated))
+        self.assertEqual(
+            set(StudentSummary.objects.filter(count__gt=0).values_list('class_group_id', 'count')),
+            {(second_year.pk, 2), (final_year.pk, 1), (other_batch.pk, 1)},
+        )
+
+    def test_a_class_group_without_a_next_one_moves_up_with_its_students(self):
+        class_group = self.make_group(2023, 1)
+        student = self.make_student(class_group)
+
+        plan = promote_students()
+
+        self.assertEqual(plan['moves'][0]['next_class_group'], class_group.pk)
+        class_group.refresh_from_db()
+        student.refresh_from_db()
+        self.assertEqual((class_group.current_year, student.class_group_id), (2, class_group.pk))
+
+    def test_moves_are_batched(self):
+        # One bucket per enrollment year, each with its own next class group: more than one CASE batch
+        count = PROMOTION_CASE_BATCH_SIZE + 1
+        years = range(1900, 1900 + count)
+        targets = ClassGroup.objects.bulk_create(
+            ClassGroup(name=f"BT {year}", degree=self.degree, enrollment_year=year, current_year=2) for year in years
+        )
+        repeaters = self.make_group(2023, 1)
+        Student.objects.bulk_create(
+            Student(student_id=f"R{year}", degree=self.degree, class_group=repeaters, enrollment_year=year, **STUDENT)
+            for year in years
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            plan = promote_students([repeaters])
+
+        self.assertEqual(len(plan['moves']), count)
+        moves = [query for query in queries if query['sql'].startswith('UPDATE "students_student"')]
+        self.assertEqual(len(moves), 2)
+        self.assertEqual(
+            dict(Student.objects.values_list('enrollment_year', 'class_group_id')),
+            {target.enrollment_year: target.pk for target in targets},
+        )
+
+
+class GraduationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+        cls.degree = Degree.objects.create(name='B.Tech', duration=4, department=department, abbreviation='BT')
+        other_degree = Degree.objects.create(name='M.Tech', duration=2, department=department, abbreviation='MT')
+        cls.final_year = ClassGroup.objects.create(
+            name='BT 2021', degree=cls.degree, enrollment_year=2021, current_year=4,
+        )
+        cls.first_year = ClassGroup.objects.create(name='BT 2024', degree=cls.degree, enrollment_year=2024)
+        cls.other = ClassGroup.objects.create(name='MT 2021', degree=other_degree, enrollment_year=2021, current_year=2)
+        for class_group in (cls.final_year, cls.final_year, cls.first_year, cls.other):
+            Student.objects.create(
+                degree=class_group.degree, class_group=class_group, enrollment_year=class_group.enrollment_year, **STUDENT,
+            )
+        Student.objects.create(
+            degree=cls.degree, class_group=cls.final_year, enrollment_year=2021, is_graduated=True, **STUDENT,
+        )
+
+    def graduated(self):
+        return sorted(Student.objects.filter(is_graduated=True).values_list('class_group_id', flat=True))
+
+    def test_graduate_students(self):
+        self.assertEqual(graduate_students(class_group=self.final_year), {'graduated': 2, 'already_graduated': 1})
+        self.assertEqual(graduate_students(class_group=[self.final_year.pk]), {'graduated': 0, 'already_graduated': 3})
+        self.assertEqual(self.graduated(), [self.final_year.pk] * 3)
+        self.assertEqual(StudentSummary.objects.get(class_group=self.final_year, is_graduated=True).count, 3)
+
+        self.assertEqual(graduate_students(degree=self.degree, enrollment_year=2024)['graduated'], 1)
+        self.assertEqual(self.graduated(), [self.final_year.pk] * 3 + [self.first_year.pk])
+        with self.assertRaises(ValueError):
+            graduate_students()
+
+    def test_graduate_actions(self):
+        response = self.client.post(f"/api/class-groups/{self.final_year.pk}/graduate/")
+        self.assertEqual(response.json(), {'graduated': 2, 'already_graduated': 1})
+
+        # A degree is graduated one batch at a time
+        for data in ({}, {'enrollment_year': 'last'}):
+            with self.subTest(data):
+                response = self.client.post(f"/api/degrees/{self.degree.pk}/graduate/", data)
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.graduated(), [self.final_year.pk] * 3)
+
+        response = self.client.post(f"/api/degrees/{self.degree.pk}/graduate/", {'enrollment_year': 2024})
+        self.assertEqual(response.json(), {'graduated': 1, 'already_graduated': 0})
+        self.assertEqual(self.graduated(), [self.final_year.pk] * 3 + [self.first_year.pk])
+
+
+class IdSequenceTests(TestCase):
+    def test_reserve(self):
+        self.assertEqual(IdSequence.reserve('student:BT', 2022, 3), range(1, 4))
+        self.assertEqual(IdSequence.reserve('student:BT', 2022, 2), range(4, 6))
+        self.assertEqual(IdSequence.reserve('student:BT', 2023), range(1, 2))
+        self.assertEqual(IdSequence.reserve('teacher:CSE'), range(1, 2))
+
+    def test_a_sequence_created_concurrently_is_bumped(self):
+        # Another worker creates the row between the UPDATE that found nothing and the INSERT
+        IdSequence.objects.create(prefix='student:BT', year=2022, last_value=5)
+        update = models.QuerySet.update
+        calls = itertools.count()
+
+        def racing_update(queryset, **kwargs):
+            return 0 if next(calls) == 0 else update(queryset, **kwargs)
+
+        with mock.patch.object(models.QuerySet, 'update', racing_update):
+            numbers = IdSequence.reserve('student:BT', 2022, 2)
+
+        self.assertEqual(numbers, range(6, 8))
+        self.assertEqual(IdSequence.objects.get(prefix='student:BT', year=2022).last_value, 7)
+
+    def test_generated_codes_are_numbered_per_department(self):
+        cse = Department.objects.create(name='Computer Science', description='CS', code='cse')
+        ece = Department.objects.create(name='Electronics', description='EC', code='ECE')
+        degree = Degree.objects.create(name='B.Tech', duration=4, department=cse, abbreviation='BT')
+        codes = []
+        for i, department in enumerate((cse, ece, cse)):
+            course = Course.objects.create(name=f"Course {i}", description='', credits=3, degree=degree, year=1)
+            codes.append(DepartmentCourse.objects.create(course=course, department=department).course_code)
+        self.assertEqual(codes, ['CSE001', 'ECE001', 'CSE002'])
+
+        teachers = [Teacher(department=department, **TEACHER) for department in (ece, cse, ece)]
+        Teacher.assign_teacher_ids(teachers)
+        self.assertEqual([teacher.teacher_id for teacher in teachers], ['ECE001', 'CSE001', 'ECE002'])
+
+
+class ImportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+        cls.degree = Degree.objects.create(name='B.Tech', duration=4, department=department, abbreviation='BT')
+        cls.class_group = ClassGroup.objects.create(name='BT 2022', degree=cls.degree, enrollment_year=2022)
+
+    def record(self, **fields):
+        return {
+            **STUDENT, 'dob': '2004-05-06', 'degree': self.degree.pk, 'class_group': self.class_group.pk,
+            'enrollment_year': 2022, **fields,
+        }
+
+    def csv(self, records):
+        columns = list(self.record())
+        rows = [','.join(columns)] + [','.join(str(record.get(column, '')) for column in columns) for record in records]
+        return io.BytesIO('\n'.join(rows).encode())
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        records = [
+            self.record(email='a@example.com'),
+            self.record(email='not an email'),
+            self.record(class_group=999),
+            self.record(first_name=''),
+            self.record(email='e@example.com'),
+        ]
+        report = import_students(self.csv(records), 'csv', chunk_size=2)
+
+        self.assertEqual((report['created'], report['failed']), (2, 3))
+        self.assertEqual(
+            [(error['row'], sorted(error['errors'])) for error in report['errors']],
+            [(2, ['email']), (3, ['class_group']), (4, ['first_name'])],
+        )
+        self.assertEqual(
+            list(Student.objects.order_by('pk').values_list('student_id', 'email')),
+            [('BT2022001', 'a@example.com'), ('BT2022002', 'e@example.com')],
+        )
+        self.assertEqual(StudentSummary.objects.get(class_group=self.class_group).count, 2)
+
+    def test_ndjson(self):
+        lines = [
+            json.dumps(self.record(email='a@example.com')),
+            '',
+            '{"first_name": ',
+            '["not", "an", "object"]',
+            json.dumps(self.record(email='b@example.com')),
+        ]
+        report = import_students(io.BytesIO('\n'.join(lines).encode()), 'ndjson')
+
+        self.assertEqual((report['created'], report['failed']), (2, 2))
+        self.assertEqual([error['row'] for error in report['errors']], [2, 3])
+        self.assertTrue(report['errors'][0]['errors']['non_field_errors'][0].startswith('Invalid JSON'))
+        self.assertEqual(set(Student.objects.values_list('email', flat=True)), {'a@example.com', 'b@example.com'})
+
+    def test_a_chunk_hitting_a_constraint_is_inserted_row_by_row(self):
+        save = Student.save
+
+        def save_or_conflict(student, *args, **kwargs):
+            if student.email == 'taken@example.com':
+                raise IntegrityError('UNIQUE constraint failed')
+            return save(student, *args, **kwargs)
+
+        records = [self.record(email='a@example.com'), self.record(email='taken@example.com'), self.record()]
+        with mock.patch.object(Student.objects, 'bulk_create', side_effect=IntegrityError), \
+                mock.patch.object(Student, 'save', save_or_conflict):
+            report = import_students(self.csv(records), 'csv')
+
+        self.assertEqual((report['created'], report['failed']), (2, 1))
+        self.assertEqual(report['errors'], [{'row': 2, 'errors': {'non_field_errors': ['UNIQUE constraint failed']}}])
+        # The IDs reserved for the rolled back chunk are handed out again
+        self.assertEqual(sorted(Student.objects.values_list('student_id', flat=True)), ['BT2022001', 'BT2022002'])
+
+    def test_chunk_size_is_bounded(self):
+        for chunk_size in (0, settings.MAX_IMPORT_CHUNK_SIZE + 1, 'many'):
+            with self.subTest(chunk_size):
+                upload = SimpleUploadedFile('students.csv', self.csv([self.record()]).getvalue())
+                response = self.client.post(
+                    '/api/students/bulk-import/', {'file': upload, 'chunk_size': chunk_size}, format='multipart',
+                )
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Student.objects.exists())
+
+
+class PaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+        cls.degree = Degree.objects.create(name='B.Tech', duration=4, department=department, abbreviation='BT')
+        class_group = ClassGroup.objects.create(name='BT 2022', degree=cls.degree, enrollment_year=2022)
+        cls.assignment = Assignment.objects.create(
+            title='Sorting', description='', due_date=date.today() + timedelta(days=7), class_group=class_group,
+        )
+        cls.students = [
+            Student.objects.create(
+                degree=cls.degree, class_group=class_group, enrollment_year=2021 + i % 2, **STUDENT,
+            ).pk
+            for i in range(7)
+        ]
+        cls.submissions = [
+            Submission.objects.create(student_id=pk, assignment=cls.assignment, file=f"submissions/{pk}.pdf").pk
+            for pk in cls.students
+        ]
+
+    def walk(self, url):
+        """Follows ``next`` from ``url`` to the last page; returns the pages' ids and the last response."""
+        pages = []
+        while url:
+            data = self.client.get(url).json()
+            pages.append([row['id'] for row in data['results']])
+            url, last = data['next'], data
+        return pages, last
+
+    def test_cursors_round_trip(self):
+        pages, last = self.walk('/api/students/?page_size=3')
+        self.assertEqual(pages, [self.students[:3], self.students[3:6], self.students[6:]])
+
+        previous = self.client.get(last['previous']).json()
+        self.assertEqual([row['id'] for row in previous['results']], self.students[3:6])
+        first = self.client.get(previous['previous']).json()
+        self.assertEqual([row['id'] for row in first['results']], self.students[:3])
+        self.assertIsNone(first['previous'])
+
+    def test_pages_dont_shift_when_rows_change(self):
+        first = self.client.get('/api/students/?page_size=3').json()
+        Student.objects.filter(pk=self.students[0]).delete()
+        added = Student.objects.create(
+            degree=self.degree, class_group=self.assignment.class_group, enrollment_year=2022, **STUDENT,
+        ).pk
+        pages, _ = self.walk(first['next'])
+        self.assertEqual(pages, [self.students[3:6], self.students[6:] + [added]])
+
+    def test_page_size_is_bounded(self):
+        with mock.patch.object(StableCursorPagination, 'max_page_size', 2):
+            data = self.client.get('/api/students/?page_size=100').json()
+        self.assertEqual(len(data['results']), 2)
+
+    def test_custom_actions_are_paginated(self):
+        pages, _ = self.walk(f"/api/students/by-class/{self.degree.pk}/2022/?page_size=2")
+        self.assertEqual(pages, [self.students[1::2][:2], self.students[1::2][2:]])
+        pages, _ = self.walk(f"/api/submissions/by-assignment/{self.assignment.pk}/?page_size=4")
+        self.assertEqual(pages, [self.submissions[:4], self.submissions[4:]])
+
+        # An empty first page is a 404; an empty page reached with a cursor isn't
+        self.assertEqual(self.client.get(f"/api/students/by-class/{self.degree.pk}/2030/").status_code, 404)
+        self.assertEqual(self.client.get('/api/submissions/by-assignment/999/').status_code, 404)
+        first = self.client.get(f"/api/students/by-class/{self.degree.pk}/2022/?page_size=2").json()
+        Student.objects.filter(pk__in=self.students[1::2][2:]).delete()
+        response = self.client.get(first['next'])
+        self.assertEqual((response.status_code, response.json()['results']), (200, []))
+
+
+class ExportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+        degree = Degree.objects.create(name='B.Tech', duration=4, department=department, abbreviation='BT')
+        class_group = ClassGroup.objects.create(name='BT 2022', degree=degree, enrollment_year=2022)
+        cls.students = [
+            Student.objects.create(
+                degree=degree, class_group=class_group, enrollment_year=year, **{**STUDENT, 'city': 'Pune, MH'},
+            )
+            for year in (2021, 2022, 2022)
+        ]
+        cls.teacher = Teacher.objects.create(department=department, **TEACHER)
+
+    def export(self, url):
+        response = self.client.get(url)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        response, content = self.export('/api/students/export/csv/?enrollment_year=2022')
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="student.csv"')
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(list(rows[0]), [field.name for field in Student._meta.concrete_fields])
+        self.assertEqual([row['student_id'] for row in rows], [student.student_id for student in self.students[1:]])
+        self.assertEqual(
+            (rows[0]['city'], rows[0]['dob'], rows[0]['class_group'], rows[0]['is_graduated']),
+            ('Pune, MH', '2004-05-06', str(self.students[1].class_group_id), 'False'),
+        )
+
+    def test_ndjson(self):
+        response, content = self.export('/api/teachers/export/ndjson/')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = content.splitlines()
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual(
+            {key: record[key] for key in ('id', 'teacher_id', 'department', 'dob')},
+            {'id': self.teacher.pk, 'teacher_id': 'CSE001', 'department': self.teacher.department_id,
+             'dob': '1980-01-02'},
+        )
+        self.assertEqual(self.export('/api/submissions/export/ndjson/')[1], '')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class SeedInstitutionTests(TestCase):
+    def seed(self):
+        call_command(
+            'seed_institution', departments=2, degrees=1, courses=1, teachers=2, students=30, assignments=2,
+            roles=2, stdout=io.StringIO(),
+        )
+        return {
+            'students': list(Student.objects.order_by('pk').values_list(
+                'student_id', 'first_name', 'dob', 'enrollment_year', 'class_group__name',
+            )),
+            'assignments': list(Assignment.objects.order_by('pk').values_list('title', 'due_date')),
+            'submissions': list(Submission.objects.order_by('pk').values_list('student__student_id', 'assignment__title')),
+        }
+
+    def test_seed_is_reproducible(self):
+        first = self.seed()
+        self.assertEqual(len(first['students']), 30)
+        self.assertEqual(StudentSummary.objects.aggregate(total=models.Sum('count'))['total'], 30)
+        # Every seeded file is referenced once, like an upload
+        self.assertEqual(
+            sorted(SubmissionBlob.objects.values_list('name', 'ref_count')),
+            sorted((name, 1) for name in Submission.objects.values_list('file', flat=True)),
+        )
+
+        for model in (Department, Role, IdSequence):
+            model.objects.all().delete()
+        self.assertEqual(self.seed(), first)
+
+    def test_refuses_a_seeded_database(self):
+        self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class SubmissionIntakeTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+        degree = Degree.objects.create(name='B.Tech', duration=4, department=department, abbreviation='BT')
+        class_group = ClassGroup.objects.create(name='BT 2022', degree=degree, enrollment_year=2022)
+        cls.student = Student.objects.create(degree=degree, class_group=class_group, enrollment_year=2022, **STUDENT)
+        cls.assignment = Assignment.objects.create(
+            title='Sorting', description='Core', due_date=date.today() + timedelta(days=7), class_group=class_group,
+        )
+
+    def submit(self):
+        return self.client.post('/api/submissions/', {
+            'student': self.student.pk,
+            'assignment': self.assignment.pk,
+            'file': SimpleUploadedFile('answer.pdf', b'%PDF-1.4'),
+        }, format='multipart')
+
+    def test_duplicate_submission_is_a_conflict(self):
+        self.assertEqual(self.submit().status_code, 201)
+        response = self.submit()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['detail'].code, 'duplicate_submission')
+        self.assertEqual(Submission.objects.count(), 1)
+
+    def test_other_integrity_errors_are_not_reported_as_duplicates(self):
+        error = IntegrityError('NOT NULL constraint failed: students_submission.file')
+        with mock.patch.object(Submission, 'save', side_effect=error), self.assertRaises(IntegrityError):
+            self.submit()
+        self.assertFalse(Submission.objects.exists())
+
+    def test_identical_files_share_one_blob_and_download_in_ranges(self):
+        other = Assignment.objects.create(
+            title='Graphs', description='Core', due_date=self.assignment.due_date, class_group=self.assignment.class_group,
+        )
+        first = self.submit().data
+        second = self.client.post('/api/submissions/', {
+            'student': self.student.pk,
+            'assignment': other.pk,
+            'file': SimpleUploadedFile('copy.pdf', b'%PDF-1.4'),
+        }, format='multipart').data
+        self.assertEqual(first['file'], second['file'])
+        self.assertEqual(SubmissionBlob.objects.get().ref_count, 2)
+
+        response = self.client.get(f"/api/submissions/{first['id']}/download/", HTTP_RANGE='bytes=1-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'PDF')
+        response = self.client.get(f"/api/submissions/{first['id']}/download/", HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        self.client.delete(f"/api/submissions/{first['id']}/")
+        self.assertEqual(SubmissionBlob.objects.get().ref_count, 1)
+
+    def test_a_blob_is_deleted_only_after_its_last_reference_is_committed_away(self):
+        name = self.submit().data['file'].rsplit('/media/', 1)[1]
+        storage = Submission._meta.get_field('file').storage
+        submission = Submission.objects.get()
+
+        # Rolled back: the submission comes back and so must its file
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                submission.delete()
+                raise RuntimeError()
+        self.assertEqual(callbacks, [])
+        self.assertTrue(storage.exists(name))
+        self.assertEqual(SubmissionBlob.objects.get(name=name).ref_count, 1)
+
+        # Committed, but the same content was uploaded again before the deletion ran
+        with self.captureOnCommitCallbacks() as callbacks:
+            Submission.objects.get().delete()
+        self.assertEqual(self.submit().status_code, 201)
+        for callback in callbacks:
+            callback()
+        self.assertTrue(storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Submission.objects.get().delete()
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(SubmissionBlob.objects.exists())
+
+    def test_an_upload_reuses_a_blob_only_after_locking_it(self):
+        name = self.submit().data['file'].rsplit('/media/', 1)[1]
+        storage = Submission._meta.get_field('file').storage
+        with self.captureOnCommitCallbacks() as callbacks:
+            Submission.objects.get().delete()
+        lock = SubmissionBlob.lock.__func__
+        pending = list(callbacks)
+
+        def deleted_while_waiting(cls, blob_name):
+            # The release's deletion held the lock first and removed the file
+            while pending:
+                pending.pop()()
+            return lock(cls, blob_name)
+
+        with mock.patch.object(SubmissionBlob, 'lock', classmethod(deleted_while_waiting)):
+            self.assertEqual(self.submit().status_code, 201)
+        self.assertEqual(pending, [])
+        self.assertTrue(storage.exists(name))
+        self.assertEqual(SubmissionBlob.objects.get(name=name).ref_count, 1)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class CarouselTests(APITestCase):
+    def upload(self):
+        return self.client.post('/api/carousel/', {
+            'image': SimpleUploadedFile('slide.gif', GIF, content_type='image/gif'), 'is_active': True,
+        }, format='multipart')
+
+    def test_upload_builds_variants(self):
+        data = self.upload().data
+        self.assertEqual((data['width'], data['height']), (1, 1))
+        self.assertIn('jpeg', data['variants'])
+
+    def test_supported_formats_are_checked_once_and_quietly(self):
+        # Pillow before 11.2 has no AVIF module, and features.check('avif') warns about it
+        modules = {name: module for name, module in features.modules.items() if name != 'avif'}
+        variant_formats.cache_clear()
+        self.addCleanup(variant_formats.cache_clear)
+        with mock.patch.dict(features.modules, modules, clear=True), warnings.catch_warnings():
+            warnings.simplefilter('error')
+            with mock.patch.object(features, 'check_module', wraps=features.check_module) as check_module:
+                formats = variant_formats()
+                self.assertEqual(variant_formats(), formats)
+        self.assertEqual(formats[-1], 'jpeg')
+        self.assertNotIn('avif', formats)
+        self.assertEqual(check_module.call_count, 1)  # webp
+
+    def test_active_carousel_is_cached_until_an_image_changes(self):
+        self.upload()
+        response = self.client.get('/api/carousel/active/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age', response['Cache-Control'])
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/carousel/active/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        self.upload()
+        response = self.client.get('/api/carousel/active/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_active_carousel_is_keyed_by_the_carousel_version(self):
+        self.upload()
+        response = self.client.get('/api/carousel/active/')
+        # A bump from any process makes every process render again
+        bump_model_version(CAROUSEL_MODEL)
+        with self.assertNumQueries(1):
+            cached = self.client.get('/api/carousel/active/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+
+class CachedReferenceDataTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+
+    def test_reads_are_cached_until_a_write(self):
+        url = f"/api/departments/{self.department.pk}/"
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['name'], 'Computer Science')
+
+        self.client.patch(url, {'name': 'Computing'})
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['name'], 'Computing')
+
+        self.client.get('/api/departments/')
+        Degree.objects.create(name='B.Tech', duration=4, department=self.department, abbreviation='BT')
+        self.assertEqual(self.client.get('/api/departments/')['X-Cache'], 'HIT')
+        self.department.delete()
+        self.assertEqual(self.client.get('/api/departments/').data['results'], [])
+
+    def test_each_format_has_its_own_entry(self):
+        url = f"/api/departments/{self.department.pk}/"
+        json_response = self.client.get(url)
+        browsable = self.client.get(url, HTTP_ACCEPT='text/html')
+        self.assertEqual((browsable['X-Cache'], browsable['Content-Type']), ('MISS', 'text/html; charset=utf-8'))
+        self.assertNotEqual(browsable['ETag'], json_response['ETag'])
+        response = self.client.get(url)
+        self.assertEqual((response['X-Cache'], response['ETag']), ('HIT', json_response['ETag']))
+        response = self.client.get(url, HTTP_ACCEPT='text/html', HTTP_IF_NONE_MATCH=json_response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_stats_count_hits_and_misses(self):
+        self.client.get('/api/roles/')
+        self.client.get('/api/roles/')
+        self.assertEqual(self.client.get('/api/cache-stats/').data['role'], {'hits': 1, 'misses': 1})
+
+
+class ConditionalGetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+        degree = Degree.objects.create(name='B.Tech', duration=4, department=department, abbreviation='BT')
+        cls.class_group = ClassGroup.objects.create(name='BT 2022', degree=degree, enrollment_year=2022)
+        cls.course = Course.objects.create(name='Algorithms', description='', credits=4, degree=degree, year=1)
+        cls.student = Student.objects.create(degree=degree, class_group=cls.class_group, enrollment_year=2022, **STUDENT)
+
+    def assertNotModified(self, url, response, queries=1):
+        with self.assertNumQueries(queries):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_list_is_not_modified_until_its_table_changes(self):
+        response = self.client.get('/api/students/')
+        self.assertNotModified('/api/students/', response)
+        cached = self.client.get('/api/students/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(cached.status_code, 304)
+
+        graduate_students(class_group=self.class_group)
+        self.assertEqual(self.client.get('/api/students/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_detail_follows_the_row(self):
+        url = f"/api/class-groups/{self.class_group.pk}/"
+        response = self.client.get(url)
+        self.assertNotModified(url, response)
+
+        ClassGroup.objects.create(name='BT 2023', degree=self.class_group.degree, enrollment_year=2023)
+        self.assertNotModified(url, response)
+
+        self.class_group.courses.add(self.course)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['courses'], [self.course.pk])
+
+    def test_deleting_the_class_incharge_changes_the_class_group(self):
+        teacher = Teacher.objects.create(department=self.class_group.degree.department, **TEACHER)
+        ClassGroup.objects.filter(pk=self.class_group.pk).update(class_incharge=teacher)
+        url = f"/api/class-groups/{self.class_group.pk}/"
+        detail, listing = self.client.get(url), self.client.get('/api/class-groups/')
+
+        teacher.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=detail['ETag']).status_code, 200)
+        self.assertEqual(self.client.get('/api/class-groups/', HTTP_IF_NONE_MATCH=listing['ETag']).status_code, 200)
+
+    def test_deleting_a_course_changes_its_class_groups(self):
+        self.class_group.courses.add(self.course)
+        url = f"/api/class-groups/{self.class_group.pk}/"
+        detail, listing = self.client.get(url), self.client.get('/api/class-groups/')
+
+        self.course.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.assertEqual((response.status_code, response.data['courses']), (200, []))
+        self.assertEqual(self.client.get('/api/class-groups/', HTTP_IF_NONE_MATCH=listing['ETag']).status_code, 200)
+
+    def test_a_failed_version_bump_rolls_back_the_write(self):
+        url = f"/api/courses/{self.course.pk}/"
+        response = self.client.get(url)
+        with mock.patch.object(TableVersion, 'bump', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                self.client.patch(url, {'name': 'Data Structures'})
+        self.assertEqual(Course.objects.get(pk=self.course.pk).name, 'Algorithms')
+        self.assertNotModified(url, response, queries=0)
+
+    def test_cached_reference_data_is_validated_without_a_query(self):
+        cache.clear()
+        response = self.client.get('/api/courses/')
+        self.assertNotModified('/api/courses/', response, queries=0)
+        # On a cache miss the validator query runs, and a match still skips the list query
+        cache.clear()
+        self.assertNotModified('/api/courses/', response)
+
+    def test_table_versions_are_summed_over_shards(self):
+        version, _ = TableVersion.current(Student)
+        with mock.patch('students.models.random.randrange', side_effect=[0, 1, 1]):
+            TableVersion.bump(Student)
+            TableVersion.bump(Student)
+            TableVersion.bump(Student)
+        self.assertEqual(TableVersion.current(Student)[0], version + 3)
+        self.assertEqual(TableVersion.objects.filter(table='students.student', shard__in=[0, 1]).count(), 2)
+
+
+class SearchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+        degree = Degree.objects.create(name='B.Tech', duration=4, department=department, abbreviation='BT')
+        class_group = ClassGroup.objects.create(name='BT 2022', degree=degree, enrollment_year=2022)
+        cls.student = Student.objects.create(degree=degree, class_group=class_group, enrollment_year=2022, **STUDENT)
+        cls.teacher = Teacher.objects.create(department=department, **TEACHER)
+
+    def search(self, query, **params):
+        response = self.client.get('/api/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [(row['type'], row['id']) for row in response.data['results']]
+
+    def check_search(self):
+        student, teacher = ('student', self.student.pk), ('teacher', self.teacher.pk)
+        self.assertEqual(self.search('as ra'), [student])
+        self.assertEqual(self.search('ravi'), [student])
+        self.assertEqual(self.search(self.student.student_id[:4].lower()), [student])
+        self.assertCountEqual(self.search('pune'), [student, teacher])
+        self.assertEqual(self.search('pune', type='teacher'), [teacher])
+        self.assertEqual(self.search('9999'), [student])
+        self.assertCountEqual(self.search('"pun*'), [student, teacher])
+
+        response = self.client.get('/api/search/', {'q': 'pune', 'limit': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(self.client.get(response.data['next']).data['next'], None)
+
+        Student.objects.filter(pk=self.student.pk).update(city='Nagpur')
+        self.teacher.delete()
+        self.assertEqual(self.search('pune'), [])
+        self.assertEqual(self.search('nag'), [student])
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', "FTS5 is SQLite specific")
+    def test_fts5_index_follows_the_tables(self):
+        self.assertEqual(self.client.get('/api/search/', {'q': 'pune'}).data['backend'], 'fts5')
+        self.check_search()
+
+    def test_orm_fallback(self):
+        with mock.patch('students.search.fts_available', return_value=False):
+            self.assertEqual(self.client.get('/api/search/', {'q': 'pune'}).data['backend'], 'orm')
+            self.check_search()
+
+    def test_short_queries_are_rejected(self):
+        self.assertEqual(self.client.get('/api/search/', {'q': 'a'}).status_code, 400)
+
+
+class FilterTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+        degree = Degree.objects.create(name='B.Tech', duration=4, department=department, abbreviation='BT')
+        class_group = ClassGroup.objects.create(name='BT 2022', degree=degree, enrollment_year=2022)
+        cls.kerala = Student.objects.create(
+            degree=degree, class_group=class_group, enrollment_year=2022, **{**STUDENT, 'state': 'Kerala'},
+        )
+        cls.graduate = Student.objects.create(
+            degree=degree, class_group=class_group, enrollment_year=2021, is_graduated=True, **STUDENT,
+        )
+        cls.assignment = Assignment.objects.create(
+            title='Sorting', description='', due_date=date(2030, 1, 15), class_group=class_group,
+        )
+        Assignment.objects.create(title='Graphs', description='', due_date=date(2030, 3, 1), class_group=class_group)
+
+    def ids(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [row['id'] for row in response.data['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.ids('/api/students/', {'state': 'Kerala'}), [self.kerala.pk])
+        self.assertEqual(self.ids('/api/students/', {'is_graduated': 'true'}), [self.graduate.pk])
+        self.assertEqual(self.ids('/api/students/', {'enrollment_year': 2022, 'is_graduated': 'false'}), [self.kerala.pk])
+        self.assertEqual(
+            self.ids('/api/assignments/', {'due_date_after': '2030-01-01', 'due_date_before': '2030-01-31'}),
+            [self.assignment.pk],
+        )
+        self.assertEqual(self.client.get('/api/students/', {'enrollment_year': 'soon'}).status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class AnalyticsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+        cls.degree = Degree.objects.create(name='B.Tech', duration=2, department=department, abbreviation='BT')
+        cls.first_year = ClassGroup.objects.create(name='BT 2023', degree=cls.degree, enrollment_year=2023)
+        cls.second_year = ClassGroup.objects.create(
+            name='BT 2022', degree=cls.degree, enrollment_year=2022, current_year=2,
+        )
+        cls.assignment = Assignment.objects.create(
+            title='Sorting', description='', due_date=date(2030, 1, 15), class_group=cls.first_year,
+        )
+
+    def add_student(self, class_group, **kwargs):
+        return Student.objects.create(
+            degree=self.degree, class_group=class_group, enrollment_year=class_group.enrollment_year,
+            **{**STUDENT, **kwargs},
+        )
+
+    def summaries(self):
+        return (
+            sorted(StudentSummary.objects.filter(count__gt=0).values_list(
+                'class_group', 'degree', 'enrollment_year', 'gender', 'is_graduated', 'count',
+            )),
+            sorted(AssignmentSummary.objects.filter(submitted__gt=0).values_list('assignment', 'submitted')),
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = self.summaries()
+        rebuild_summaries()
+        self.assertEqual(incremental, self.summaries())
+
+    def test_summaries_follow_every_write_path(self):
+        asha = self.add_student(self.first_year)
+        ravi = self.add_student(self.first_year, gender='M')
+        self.add_student(self.second_year)
+        self.assertMatchesRebuild()
+
+        asha.gender = 'O'
+        asha.class_group = self.second_year
+        asha.save()
+        Student.objects.only('pk', 'first_name').get(pk=ravi.pk).save()
+        self.assertMatchesRebuild()
+
+        submission = Submission.objects.create(
+            student=ravi, assignment=self.assignment, file=SimpleUploadedFile('answer.pdf', b'%PDF-1.4 answer'),
+        )
+        Submission.objects.create(
+            student=asha, assignment=self.assignment, file=SimpleUploadedFile('answer.pdf', b'%PDF-1.4 other'),
+        )
+        self.assertMatchesRebuild()
+        submission.delete()
+        asha.delete()
+        self.assertMatchesRebuild()
+
+        rows = [','.join(['first_name', 'last_name', 'father_name', 'email', 'phone', 'village', 'city',
+                          'state', 'pin_code', 'dob', 'gender', 'degree', 'class_group', 'enrollment_year'])]
+        rows += [
+            f"Asha,Rao,Ravi,asha{i}@example.com,9999999999,Rampur,Pune,MH,411001,2004-05-06,{'MF'[i % 2]},"
+            f"{self.degree.pk},{self.first_year.pk},2023"
+            for i in range(5)
+        ]
+        self.assertEqual(import_students(io.BytesIO('\n'.join(rows).encode()), 'csv')['created'], 5)
+        self.assertMatchesRebuild()
+
+        self.assignment.class_group = self.second_year
+        self.assignment.save()
+        self.assertMatchesRebuild()
+        self.assignment.class_group = self.first_year
+        self.assignment.save()
+
+        promote_students()
+        self.assertMatchesRebuild()
+        graduate_students(degree=self.degree)
+        self.assertMatchesRebuild()
+
+    def test_a_failed_summary_update_rolls_back_the_write(self):
+        asha = self.add_student(self.first_year)
+        before = self.summaries()
+        payload = {
+            **STUDENT, 'email': 'ravi@example.com', 'degree': self.degree.pk, 'class_group': self.first_year.pk,
+            'enrollment_year': 2023,
+        }
+        with mock.patch.object(StudentSummary, 'adjust', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                self.client.post('/api/students/', payload)
+            with self.assertRaises(OperationalError):
+                self.client.delete(f'/api/students/{asha.pk}/')
+        with mock.patch.object(AssignmentSummary, 'adjust', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                self.client.post('/api/submissions/', {
+                    'student': asha.pk, 'assignment': self.assignment.pk,
+                    'file': SimpleUploadedFile('answer.pdf', b'%PDF-1.4 answer'),
+                })
+        self.assertEqual(list(Student.objects.values_list('pk', flat=True)), [asha.pk])
+        self.assertFalse(Submission.objects.exists())
+        self.assertEqual(self.summaries(), before)
+        self.assertMatchesRebuild()
+
+    def test_endpoints(self):
+        self.add_student(self.first_year)
+        self.add_student(self.first_year, gender='M')
+        self.add_student(self.second_year, is_graduated=True)
+        Submission.objects.create(
+            student=Student.objects.first(), assignment=self.assignment,
+            file=SimpleUploadedFile('answer.pdf', b'%PDF-1.4 answer'),
+        )
+
+        data = self.client.get('/api/analytics/').data
+        self.assertEqual(data['students'], {'total': 3, 'active': 2, 'graduated': 1})
+        self.assertEqual(data['gender']['F'], {'count': 2, 'share': 0.6667})
+        self.assertEqual(data['years'], [{'current_year': 1, 'active': 2}])
+        self.assertEqual(
+            [(batch['enrollment_year'], batch['active'], batch['graduated']) for batch in data['batches']],
+            [(2022, 0, 1), (2023, 2, 0)],
+        )
+
+        rows = self.client.get('/api/analytics/assignments/', {'class_group': self.first_year.pk}).data['results']
+        self.assertEqual(
+            [(row['id'], row['submitted'], row['class_size'], row['submission_rate']) for row in rows],
+            [(self.assignment.pk, 1, 2, 0.5)],
+        )
+        self.assertEqual(self.client.get('/api/analytics/assignments/', {'degree': 'x'}).status_code, 400)
+
+    def test_status_board(self):
+        on_time, late, missing = (self.add_student(self.first_year, email=f"s{i}@example.com") for i in range(3))
+        self.add_student(self.second_year)
+        overdue = Assignment.objects.create(
+            title='Graphs', description='', due_date=date(2020, 1, 1), class_group=self.first_year,
+        )
+        Submission.objects.create(
+            student=on_time, assignment=self.assignment, file=SimpleUploadedFile('answer.pdf', b'%PDF-1.4 early'),
+        )
+        Submission.objects.create(
+            student=late, assignment=overdue, file=SimpleUploadedFile('answer.pdf', b'%PDF-1.4 late'),
+        )
+        Submission.objects.create(
+            student=late, assignment=self.assignment, file=SimpleUploadedFile('answer.pdf', b'%PDF-1.4 mine'),
+        )
+        self.assignment.due_date = date(2020, 1, 1)
+        self.assignment.save()
+        Submission.objects.get(student=on_time, assignment=self.assignment).delete()
+        Submission.objects.create(
+            student=on_time, assignment=self.assignment, file=SimpleUploadedFile('answer.pdf', b'%PDF-1.4 again'),
+        )
+        self.assignment.due_date = date(2030, 1, 15)
+        self.assignment.save()
+        self.assertMatchesRebuild()
+
+        def board(assignment, **params):
+            response = self.client.get(f"/api/assignments/{assignment.pk}/status/", params)
+            self.assertEqual(response.status_code, 200, response.data)
+            return response.data['counts'], {row['id']: row['status'] for row in response.data['results']}
+
+        counts, statuses = board(self.assignment)
+        self.assertEqual(
+            counts,
+            {'class_size': 3, 'submitted': 2, 'on_time': 2, 'late': 0, 'missing': 1, 'submission_rate': 0.6667},
+        )
+        self.assertEqual(statuses, {on_time.pk: 'on_time', late.pk: 'on_time', missing.pk: 'missing'})
+
+        counts, statuses = board(overdue)
+        self.assertEqual((counts['late'], counts['missing']), (1, 2))
+        self.assertEqual(statuses, {on_time.pk: 'missing', late.pk: 'late', missing.pk: 'missing'})
+        self.assertEqual(board(overdue, status='missing')[1], {on_time.pk: 'missing', missing.pk: 'missing'})
+        self.assertEqual(board(overdue, status='late')[1], {late.pk: 'late'})
+        self.assertEqual(board(overdue, status='on_time')[1], {})
+        self.assertEqual(self.client.get(f"/api/assignments/{overdue.pk}/status/", {'status': 'x'}).status_code, 400)
+
+        # A student who moved to another class group leaves the board and its counts alike
+        late.class_group = self.second_year
+        late.save()
+        self.assertMatchesRebuild()
+        counts, statuses = board(self.assignment)
+        self.assertEqual((counts['class_size'], counts['submitted'], counts['missing']), (2, 1, 1))
+        self.assertEqual(statuses, {on_time.pk: 'on_time', missing.pk: 'missing'})
+
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "The pragmas are SQLite specific")
+class DatabaseProfileTests(TestCase):
+    def test_pragmas_are_applied_to_new_connections(self):
+        # The test database lives in memory, which has no journal or mmap settings to check
+        expected = {name: settings.SQLITE_PRAGMAS[name] for name in ('busy_timeout', 'cache_size')}
+        self.assertEqual(sqlite_pragma_values(connection, expected), expected)
+
+    def test_pragmas_are_validated(self):
+        self.assertEqual(sqlite_pragma_statements({'synchronous': 'normal'}), ['PRAGMA synchronous = normal'])
+        self.assertEqual(sqlite_pragma_statements({'journal_mode': None, 'temp_store': ''}), [])
+        with self.assertRaises(ValueError):
+            sqlite_pragma_statements({'synchronous': 'normal; DROP TABLE students_student'})
+
+    def test_synchronous_normal_only_runs_under_wal(self):
+        # SQLite documents synchronous=NORMAL outside WAL as unsafe on power loss
+        with tempfile.TemporaryDirectory() as directory:
+            pragmas = SQLiteDatabaseWrapper(
+                {**connection.settings_dict, 'NAME': os.path.join(directory, 'db.sqlite3')}, 'pragmas',
+            )
+            try:
+                values = sqlite_pragma_values(pragmas, ('journal_mode', 'synchronous'))
+            finally:
+                pragmas.close()
+        levels = {'off': 0, 'normal': 1, 'full': 2, 'extra': 3}
+        self.assertEqual(values, {
+            'journal_mode': (settings.SQLITE_PRAGMAS['journal_mode'] or 'delete').lower(),
+            'synchronous': levels[settings.SQLITE_PRAGMAS['synchronous'].lower()],
+        })
+        if values['journal_mode'] != 'wal':
+            self.assertEqual(values['synchronous'], levels['full'])
+
+    def test_only_write_blocks_take_the_write_lock_up_front(self):
+        # The test database is already inside a transaction, so use a second connection to a file
+        with tempfile.TemporaryDirectory() as directory:
+            writes = SQLiteDatabaseWrapper(
+                {**connection.settings_dict, 'NAME': os.path.join(directory, 'db.sqlite3')}, 'writes',
+            )
+            connections['writes'] = writes
+            try:
+                with CaptureQueriesContext(writes) as queries:
+                    with transaction.atomic(using='writes'):
+                        writes.cursor().execute('SELECT 1')
+                    with write_atomic(using='writes'):
+                        with write_atomic(using='writes'):
+                            writes.cursor().execute('SELECT 1')
+                    with self.assertRaises(ZeroDivisionError), write_atomic(using='writes'):
+                        1 / 0
+                    with transaction.atomic(using='writes'):
+                        pass
+            finally:
+                writes.close()
+                del connections['writes']
+        begins = [query['sql'] for query in queries if query['sql'].startswith('BEGIN')]
+        self.assertEqual(begins, ['BEGIN', 'BEGIN IMMEDIATE', 'BEGIN IMMEDIATE', 'BEGIN'])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class AsyncReadTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+        degree = Degree.objects.create(name='B.Tech', duration=4, department=department, abbreviation='BT')
+        cls.class_group = ClassGroup.objects.create(name='BT 2022', degree=degree, enrollment_year=2022)
+        course = Course.objects.create(name='Graphs', description='', credits=4, degree=degree, year=1)
+        cls.class_group.courses.add(course)
+        cls.students = [
+            Student.objects.create(
+                degree=degree, class_group=cls.class_group, enrollment_year=2022,
+                **{**STUDENT, 'email': f"asha{i}@example.com", 'state': 'Kerala' if i % 2 else 'Goa'},
+            )
+            for i in range(5)
+        ]
+        assignment = Assignment.objects.create(
+            title='Sorting', description='', due_date=date(2030, 1, 15), class_group=cls.class_group,
+        )
+        Submission.objects.create(
+            student=cls.students[0], assignment=assignment, file=SimpleUploadedFile('answer.pdf', b'%PDF-1.4 a'),
+        )
+        CarouselImage.objects.create(image=SimpleUploadedFile('slide.gif', GIF, content_type='image/gif'))
+
+    def test_same_payloads_as_the_sync_endpoints(self):
+        for prefix in ('students', 'class-groups', 'assignments', 'submissions', 'carousel'):
+            with self.subTest(prefix):
+                expected = self.client.get(f"/api/{prefix}/").json()
+                self.assertEqual(self.client.get(f"/api/async/{prefix}/").json(), expected)
+                pk = expected['results'][0]['id']
+                detail = self.client.get(f"/api/async/{prefix}/{pk}/")
+                self.assertEqual(detail.json(), self.client.get(f"/api/{prefix}/{pk}/").json())
+                cached = self.client.get(f"/api/async/{prefix}/{pk}/", HTTP_IF_NONE_MATCH=detail['ETag'])
+                self.assertEqual(cached.status_code, 304)
+
+        self.assertEqual(self.client.get('/api/async/students/0/').status_code, 404)
+
+    def test_filters_fields_and_pagination(self):
+        params = {'state': 'Kerala', 'fields': 'id,state'}
+        self.assertEqual(
+            self.client.get('/api/async/students/', params).json(), self.client.get('/api/students/', params).json(),
+        )
+        self.assertEqual(self.client.get('/api/async/students/', {'fields': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/async/students/', {'enrollment_year': 'soon'}).status_code, 400)
+
+        first = self.client.get('/api/async/students/', {'page_size': 2}).json()
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        third = self.client.get(second['next']).json()
+        self.assertIsNone(third['next'])
+        pages = [[row['id'] for row in page['results']] for page in (first, second, third)]
+        self.assertEqual(sum(pages, []), [student.pk for student in self.students])
+        self.assertEqual([row['id'] for row in self.client.get(third['previous']).json()['results']], pages[1])
+
+        response = self.client.get('/api/async/students/')
+        self.assertEqual(self.client.get('/api/async/students/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.post('/api/async/students/').status_code, 405)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), JOB_RETRY_DELAY=60)
+class JobTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+        cls.degree = Degree.objects.create(name='B.Tech', duration=4, department=department, abbreviation='BT')
+        cls.class_group = ClassGroup.objects.create(name='BT 2022', degree=cls.degree, enrollment_year=2022)
+        for i in range(3):
+            Student.objects.create(
+                degree=cls.degree, class_group=cls.class_group, enrollment_year=2022,
+                **{**STUDENT, 'email': f"asha{i}@example.com"},
+            )
+
+    def run_workers(self):
+        out = io.StringIO()
+        call_command('run_workers', processes=0, burst=True, stdout=out)
+        return out.getvalue()
+
+    def test_background_graduation(self):
+        response = self.client.post(f"/api/class-groups/{self.class_group.pk}/graduate/", {'background': True})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], Job.QUEUED)
+        self.assertFalse(Student.objects.filter(is_graduated=True).exists())
+
+        self.assertIn('succeeded', self.run_workers())
+        job = self.client.get(response['Location']).json()
+        self.assertEqual(job['status'], Job.SUCCEEDED)
+        self.assertEqual(job['result'], {'graduated': 3, 'already_graduated': 0})
+        self.assertEqual((job['progress_done'], job['progress_total'], job['attempts']), (1, 1, 1))
+        self.assertEqual(Student.objects.filter(is_graduated=True).count(), 3)
+
+    def test_background_import_reports_progress(self):
+        rows = [','.join(['first_name', 'last_name', 'father_name', 'email', 'phone', 'village', 'city',
+                          'state', 'pin_code', 'dob', 'gender', 'degree', 'class_group', 'enrollment_year'])]
+        rows += [
+            f"Ravi,Rao,Ravi,ravi{i}@example.com,9999999999,Rampur,Pune,MH,411001,2004-05-06,M,"
+            f"{self.degree.pk},{self.class_group.pk},2022"
+            for i in range(5)
+        ]
+        upload = SimpleUploadedFile('students.csv', '\n'.join(rows).encode())
+        response = self.client.post(
+            '/api/students/bulk-import/', {'file': upload, 'chunk_size': 2, 'background': 'true'}, format='multipart',
+        )
+        self.assertEqual(response.status_code, 202)
+        name = Job.objects.get().params['name']
+        self.assertTrue(default_storage.exists(name))
+
+        self.run_workers()
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result['created'], 5)
+        self.assertEqual(job.progress_done, job.progress_total)
+        self.assertEqual(job.message, '5 rows read: 5 created, 0 failed.')
+        self.assertFalse(default_storage.exists(name))
+        self.assertEqual(Student.objects.count(), 8)
+
+    def test_failures_are_retried_with_backoff(self):
+        calls = []
+
+        @task('flaky', max_attempts=2)
+        def flaky(context):
+            calls.append(1)
+            raise RuntimeError('boom')
+
+        self.addCleanup(TASKS.pop, 'flaky')
+        job = enqueue('flaky')
+        self.assertEqual(run_job(claim('test')), Job.QUEUED)
+        job.refresh_from_db()
+        self.assertIn('RuntimeError: boom', job.error)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIsNone(claim('test'))  # Not due yet
+
+        Job.objects.update(run_after=timezone.now())
+        self.assertEqual(run_job(claim('test')), Job.FAILED)
+        self.assertEqual(len(calls), 2)
+
+        response = self.client.post(f"/api/jobs/{job.pk}/retry/")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual((response.json()['status'], response.json()['attempts']), (Job.QUEUED, 0))
+        self.assertEqual(self.client.post(f"/api/jobs/{job.pk}/retry/").status_code, 409)
+
+    def test_cancellation(self):
+        queued = enqueue('rebuild_analytics')
+        response = self.client.post(f"/api/jobs/{queued.pk}/cancel/")
+        self.assertEqual(response.json()['status'], Job.CANCELLED)
+        self.assertEqual(self.client.post(f"/api/jobs/{queued.pk}/cancel/").status_code, 409)
+
+        @task('long')
+        def long_task(context):
+            for done in range(10):
+                context.progress(done, 10)
+                if done == 2:
+                    self.client.post(f"/api/jobs/{context.job.pk}/cancel/")
+
+        self.addCleanup(TASKS.pop, 'long')
+        running = enqueue('long')
+        self.assertEqual(run_job(claim('test')), Job.CANCELLED)
+        running.refresh_from_db()
+        self.assertEqual((running.progress_done, running.progress_total), (2, 10))
+
+    def test_committed_work_is_finished_and_never_repeated(self):
+        ClassGroup.objects.create(name='BT 2021', degree=self.degree, enrollment_year=2021, current_year=2)
+        job = enqueue('promote_students')
+
+        def promote_then_cancel(*args, **kwargs):
+            plan = promote_students(*args, **kwargs)
+            self.client.post(f"/api/jobs/{job.pk}/cancel/")  # Arrives after the promotion
+            return plan
+
+        with mock.patch('students.jobs.promote_students', promote_then_cancel):
+            self.assertEqual(run_job(claim('test')), Job.SUCCEEDED)
+        job.refresh_from_db()
+        self.assertTrue(job.work_committed)
+        self.assertEqual(job.message, 'Students promoted.')
+
+        # However it ends, a job whose work is committed isn't run again
+        Job.objects.filter(pk=job.pk).update(status=Job.FAILED)
+        response = self.client.post(f"/api/jobs/{job.pk}/retry/")
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('committed', response.json()['message'])
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING, cancel_requested=False,
+            updated_at=timezone.now() - timedelta(seconds=settings.JOB_STALE_AFTER + 1),
+        )
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.FAILED)
+
+    def test_stale_jobs_are_requeued(self):
+        job = enqueue('rebuild_analytics')
+        claim('test')
+        self.assertEqual(requeue_stale(), 0)
+        Job.objects.update(updated_at=timezone.now() - timedelta(seconds=settings.JOB_STALE_AFTER + 1))
+        self.assertEqual(requeue_stale(exclude=[job.pk]), 0)  # Still running in the caller's pool
+        self.assertEqual(requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+
+    @override_settings(JOB_POLL_INTERVAL=0)
+    def test_a_locked_queue_is_polled_again(self):
+        job = enqueue('rebuild_analytics')
+        claims = iter([OperationalError('database is locked')])
+
+        def locked_once(worker):
+            error = next(claims, None)
+            if error:
+                raise error
+            return claim(worker)
+
+        with mock.patch('students.management.commands.run_workers.claim', locked_once):
+            out = io.StringIO()
+            call_command('run_workers', processes=0, burst=True, poll_interval=0, stdout=out, stderr=io.StringIO())
+        self.assertIn(f"Job {job.pk}: succeeded", out.getvalue())
+
+    def test_job_endpoints(self):
+        response = self.client.post('/api/jobs/', {'kind': 'rebuild_analytics'})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.client.post('/api/jobs/', {'kind': 'import_students'}).status_code, 400)
+        self.run_workers()
+        self.assertEqual(
+            self.client.get('/api/jobs/', {'status': 'succeeded', 'fields': 'id,kind,result'}).json()['results'],
+            [{'id': response.json()['id'], 'kind': 'rebuild_analytics',
+              'result': {'headcount_rows': 1, 'assignment_rows': 0}}],
+        )
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=1, REQUEST_TIMING_HEADERS=True)
+class RequestTimingTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+        degree = Degree.objects.create(name='B.Tech', duration=4, department=department, abbreviation='BT')
+        class_group = ClassGroup.objects.create(name='BT 2022', degree=degree, enrollment_year=2022)
+        Student.objects.create(degree=degree, class_group=class_group, enrollment_year=2022, **STUDENT)
+
+    def server_timing(self, response):
+        metrics = {}
+        for metric in response['Server-Timing'].split(', '):
+            name, *params = metric.split(';')
+            metrics[name] = dict(param.split('=', 1) for param in params)
+        return metrics
+
+    def test_sampled_requests_are_measured(self):
+        with self.assertLogs('students.performance', 'INFO') as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/api/students/')
+        metrics = self.server_timing(response)
+        self.assertEqual(set(metrics), {'db', 'db-slowest', 'serialize', 'render', 'total'})
+        self.assertEqual(metrics['db']['desc'], f'"{len(queries)} queries"')
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual((line['view'], line['status'], line['queries']), ('student-list', 200, len(queries)))
+        self.assertTrue(line['slowest_sql'].startswith('SELECT'))
+        self.assertGreaterEqual(line['total_ms'], line['sql_ms'])
+
+    def test_serializer_reads_are_measured(self):
+        student = Student.objects.get()
+        for path in (f'/api/students/{student.pk}/', f'/api/students/by-class/{student.degree_id}/2022/'):
+            with self.subTest(path=path), self.assertLogs('students.performance', 'INFO'):
+                self.assertIn('serialize', self.server_timing(self.client.get(path)))
+
+    def test_async_views_are_measured(self):
+        with self.assertLogs('students.performance', 'INFO'):
+            response = self.client.get('/api/async/students/')
+        self.assertNotEqual(self.server_timing(response)['db']['desc'], '"0 queries"')
+
+    def test_sampling_and_headers_are_configurable(self):
+        with self.settings(REQUEST_TIMING_SAMPLE_RATE=0), self.assertNoLogs('students.performance'):
+            self.assertNotIn('Server-Timing', self.client.get('/api/students/'))
+        with self.settings(REQUEST_TIMING_HEADERS=False), self.assertLogs('students.performance', 'INFO'):
+            self.assertNotIn('Server-Timing', self.client.get('/api/students/'))
+
+
+class MetricsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', description='CS', code='CSE')
+        degree = Degree.objects.create(name='B.Tech', duration=4, department=department, abbreviation='BT')
+        class_group = ClassGroup.objects.create(name='BT 2022', degree=degree, enrollment_year=2022)
+        cls.student = Student.objects.create(degree=degree, class_group=class_group, enrollment_year=2022, **STUDENT)
+
+    def setUp(self):
+        metrics_dir = override_settings(METRICS_DIR=tempfile.mkdtemp())
+        metrics_dir.enable()
+        self.addCleanup(metrics_dir.disable)
+
+    def scrape(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        samples = {}
+        for line in response.content.decode().splitlines():
+            if not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_requests_are_counted_per_route(self):
+        # Queries are counted for sampled requests only
+        with self.settings(REQUEST_TIMING_SAMPLE_RATE=1), self.assertLogs('students.performance', 'INFO'):
+            detail = self.client.get(f"/api/students/{self.student.pk}/")
+            self.client.get(f"/api/students/{self.student.pk}/", HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.client.get('/api/students/')
+        self.client.get('/api/students/', {'enrollment_year': 'soon'})
+        self.client.get('/api/departments/')
+        self.client.get('/api/departments/')
+
+        samples = self.scrape()
+        detail = 'method="GET",route="student-detail"'
+        self.assertEqual(samples[f'http_requests_total{{{detail},status="200"}}'], 1)
+        self.assertEqual(samples[f'http_requests_total{{{detail},status="304"}}'], 1)
+        self.assertEqual(samples['http_requests_total{method="GET",route="student-list",status="400"}'], 1)
+        self.assertEqual(samples[f'http_request_duration_seconds_count{{{detail}}}'], 2)
+        self.assertEqual(samples[f'http_request_duration_seconds_bucket{{le="+Inf",{detail}}}'], 2)
+        self.assertGreater(samples[f'http_request_duration_seconds_sum{{{detail}}}'], 0)
+        self.assertEqual(samples[f'db_queries_per_request_bucket{{le="2.0",{detail}}}'], 2)
+        # One 304 among the four student reads
+        self.assertEqual(samples['cache_hit_ratio{cache="conditional_get",namespace="student"}'], 0.25)
+        self.assertEqual(samples['cache_hit_ratio{cache="reference",namespace="department"}'], 0.5)
+
+    def test_unsampled_requests_are_not_instrumented(self):
+        with mock.patch('students.instrumentation.RequestTiming') as timing:
+            self.client.get('/api/students/')
+        timing.assert_not_called()
+        samples = self.scrape()
+        self.assertEqual(samples['http_requests_total{method="GET",route="student-list",status="200"}'], 1)
+        self.assertEqual(samples['http_request_duration_seconds_count{method="GET",route="student-list"}'], 1)
+        self.assertNotIn('db_queries_per_request_count{method="GET",route="student-list"}', samples)
+
+    def test_values_of_every_process_are_summed(self):
+        registry.increment('http_requests_total', {'route': 'analytics', 'method': 'GET', 'status': '200'})
+        # Another worker's file, large enough to have been grown
+        other = ValueFile(f"{settings.METRICS_DIR}/0.db")
+        for i in range(2000):
+            other.increment(json.dumps(['http_requests_total', {'method': 'GET', 'route': f'r{i}', 'status': '200'}]), 1)
+        other.increment(
+            json.dumps(['http_requests_total', {'method': 'GET', 'route': 'analytics', 'status': '200'}]), 2,
+        )
+
+        samples = self.scrape()
+        self.assertEqual(samples['http_requests_total{method="GET",route="analytics",status="200"}'], 3)
+        self.assertEqual(samples['http_requests_total{method="GET",route="r1999",status="200"}'], 1)
+
+    def test_slow_queries_are_logged(self):
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=0), self.assertLogs('students.slow_queries', 'WARNING') as logs:
+            self.client.get('/api/students/')
+        lines = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertEqual({line['view'] for line in lines}, {'student-list'})
+        self.assertTrue(all(line['sql'].startswith('SELECT') for line in lines))
+        with self.assertNoLogs('students.slow_queries'):
+            self.client.get('/api/students/')
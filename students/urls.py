@@ -2,6 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from django.conf import settings
 from django.conf.urls.static import static
+from .async_views import ASYNC_VIEWS
 from .views import (
     DepartmentViewSet,
     DegreeViewSet,
@@ -15,7 +16,12 @@ from .views import (
     AssignmentViewSet,
     SubmissionViewSet,
     RoleListCreateView,
-    RoleAssignmentViewSet
+    RoleAssignmentViewSet,
+    JobViewSet,
+    analytics,
+    assignment_analytics,
+    cache_stats,
+    search,
 )
 
 router = DefaultRouter()
@@ -32,11 +38,23 @@ router.register(r'assignments', AssignmentViewSet)
 router.register(r'submissions', SubmissionViewSet)
 router.register(r'carousel', CarouselImageViewSet)
 router.register(r'role-assignments', RoleAssignmentViewSet)
+router.register(r'jobs', JobViewSet)
 
 
 urlpatterns = [
+    path('analytics/', analytics, name='analytics'),
+    path('analytics/assignments/', assignment_analytics, name='assignment-analytics'),
+    path('cache-stats/', cache_stats, name='cache-stats'),
+    path('search/', search, name='search'),
     path('', include(router.urls)),  # Added API versioning
 ]
 
+# Read-only async twins of the busiest list/detail endpoints, for ASGI deployments
+for prefix, view in ASYNC_VIEWS.items():
+    urlpatterns += [
+        path(f'async/{prefix}/', view.as_view(), name=f'async-{prefix}-list'),
+        path(f'async/{prefix}/<int:pk>/', view.as_view(), name=f'async-{prefix}-detail'),
+    ]
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,9 +1,15 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
 from rest_framework import viewsets
 from rest_framework.response import Response
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view
 
 from rest_framework import status
 from rest_framework import generics
+from rest_framework.parsers import MultiPartParser
+from rest_framework.reverse import reverse
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from .models import (
     Department,
     Degree,
@@ -17,7 +23,8 @@ from .models import (
     Assignment,
     Submission
 ,
-Role,RoleAssignment)
+Role,RoleAssignment, Job,
+    promote_students, graduate_students)
 from .serializers import (
     DepartmentSerializer,
     DegreeSerializer,
@@ -30,97 +37,381 @@ from .serializers import (
     CarouselImageSerializer,
     AssignmentSerializer,
     SubmissionSerializer,
-    RoleSerializer,RoleAssignmentSerializer
+    RoleSerializer,RoleAssignmentSerializer, JobSerializer
 )
+from .importers import DEFAULT_CHUNK_SIZE, detect_format, import_students
+from . import jobs
+from .analytics import (
+    BOARD_STATUSES, assignment_rates, board_entry, class_sizes, completion, overview, submission_board,
+)
+from .exporters import streaming_export_response
+from .fieldsets import SparseFieldsetMixin
+from .pagination import StableCursorPagination
+from .filters import AssignmentFilter, StudentFilter, SubmissionFilter, TeacherFilter
+from .search import KINDS, MIN_QUERY_LENGTH, search as run_search
+from .storage import file_response
+from .database import write_atomic
+from .caching import (
+    REFERENCE_MODELS, ConditionalGetMixin, ReferenceCacheMixin, active_carousel, carousel_cache_control,
+    reference_cache_stats,
+)
+
+def is_truthy(value):
+    """Interprets a request flag such as ``?dry_run=true`` or ``{"dry_run": 1}``."""
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+def run_in_background(request):
+    """``?background=true``: queue the work as a Job instead of running it in the request."""
+    return is_truthy(request.data.get('background', request.query_params.get('background')))
+
+def job_accepted(request, job):
+    """202 with the queued job; poll the Location URL for its progress and result."""
+    location = reverse('job-detail', args=[job.pk], request=request)
+    return Response(JobSerializer(job).data, status=202, headers={'Location': location})
+
+class ExportMixin:
+    """Adds ``export/csv/`` and ``export/ndjson/`` routes that stream the filtered list."""
+
+    @action(detail=False, methods=['get'], url_path='export/(?P<export_format>csv|ndjson)', url_name='export')
+    def export(self, request, export_format):
+        queryset = self.filter_queryset(self.get_queryset())
+        return streaming_export_response(queryset, export_format, self.basename)
+
+class WriteAtomicMixin:
+    """
+    Commits every create, update and delete in one transaction with what its signals write.
+
+    The table version and cache version bumps and the summary counters then
+    commit or roll back with the row, never after it.
+    """
+
+    def perform_create(self, serializer):
+        with write_atomic():
+            super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        with write_atomic():
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with write_atomic():
+            super().perform_destroy(instance)
 
 # Department ViewSet
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(ReferenceCacheMixin, ConditionalGetMixin, SparseFieldsetMixin, WriteAtomicMixin, viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
 
 # Degree ViewSet
-class DegreeViewSet(viewsets.ModelViewSet):
+class DegreeViewSet(ReferenceCacheMixin, ConditionalGetMixin, SparseFieldsetMixin, WriteAtomicMixin, viewsets.ModelViewSet):
     queryset = Degree.objects.all()
     serializer_class = DegreeSerializer
 
+    @action(detail=True, methods=['post'])
+    def graduate(self, request, pk=None):
+        # One batch at a time: a degree alone would graduate every cohort still studying
+        degree = self.get_object()
+        enrollment_year = request.data.get('enrollment_year', request.query_params.get('enrollment_year'))
+        try:
+            enrollment_year = int(enrollment_year)
+        except (TypeError, ValueError):
+            return Response({'message': 'enrollment_year is required and must be an integer.'}, status=400)
+
+        if run_in_background(request):
+            return job_accepted(request, jobs.enqueue(
+                'graduate_students', {'degree': degree.pk, 'enrollment_year': enrollment_year},
+            ))
+        report = graduate_students(degree=degree, enrollment_year=enrollment_year)
+        return Response(report, status=200)
+
 # Course ViewSet
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ReferenceCacheMixin, ConditionalGetMixin, SparseFieldsetMixin, WriteAtomicMixin, viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
 
 # DepartmentCourse ViewSet
-class DepartmentCourseViewSet(viewsets.ModelViewSet):
+class DepartmentCourseViewSet(ReferenceCacheMixin, ConditionalGetMixin, SparseFieldsetMixin, WriteAtomicMixin, viewsets.ModelViewSet):
     queryset = DepartmentCourse.objects.all()
     serializer_class = DepartmentCourseSerializer
 
 # Teacher ViewSet
-class TeacherViewSet(viewsets.ModelViewSet):
+class TeacherViewSet(ConditionalGetMixin, ExportMixin, SparseFieldsetMixin, WriteAtomicMixin, viewsets.ModelViewSet):
     queryset = Teacher.objects.all()
     serializer_class = TeacherSerializer
+    filterset_class = TeacherFilter
 
 # HOD ViewSet
-class HODViewSet(viewsets.ModelViewSet):
+class HODViewSet(ConditionalGetMixin, SparseFieldsetMixin, WriteAtomicMixin, viewsets.ModelViewSet):
     queryset = HOD.objects.all()
     serializer_class = HODSerializer
 
 # ClassGroup ViewSet
-class ClassGroupViewSet(viewsets.ModelViewSet):
-    queryset = ClassGroup.objects.all()
+class ClassGroupViewSet(ConditionalGetMixin, SparseFieldsetMixin, WriteAtomicMixin, viewsets.ModelViewSet):
+    queryset = ClassGroup.objects.with_related()
     serializer_class = ClassGroupSerializer
 
     @action(detail=True, methods=['post'])
     def promote_students(self, request, pk=None):
         class_group = self.get_object()
-        # Ensure promote_students function is defined and imported
-        promote_students(class_group)  
-        return Response({'status': 'students promoted'}, status=200)
+        dry_run = is_truthy(request.data.get('dry_run', request.query_params.get('dry_run')))
+        if run_in_background(request):
+            return job_accepted(request, jobs.enqueue(
+                'promote_students', {'class_groups': [class_group.pk], 'dry_run': dry_run},
+            ))
+        plan = promote_students([class_group], dry_run=dry_run)
+        return Response({
+            'status': 'promotion planned' if dry_run else 'students promoted',
+            'plan': plan,
+        }, status=200)
+
+    @action(detail=True, methods=['post'])
+    def graduate(self, request, pk=None):
+        class_group = self.get_object()
+        if run_in_background(request):
+            return job_accepted(request, jobs.enqueue('graduate_students', {'class_group': class_group.pk}))
+        report = graduate_students(class_group=class_group)
+        return Response(report, status=200)
 
 # Student ViewSet
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(ConditionalGetMixin, ExportMixin, SparseFieldsetMixin, WriteAtomicMixin, viewsets.ModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
+    filterset_class = StudentFilter
 
     @action(detail=False, methods=['get'], url_path='by-class/(?P<degree_id>[^/.]+)/(?P<enrollment_year>[^/.]+)', url_name='by_class')
     def by_class(self, request, degree_id, enrollment_year):
-        students = self.queryset.filter(degree=degree_id, enrollment_year=enrollment_year)
-        serializer = self.get_serializer(students, many=True)
-        
-        if students:
-            return Response(serializer.data, status=200)
-        else:
-            return Response({'message': 'No students found.'}, status=404)
+        def render():
+            students = self.get_queryset().filter(degree=degree_id, enrollment_year=enrollment_year)
+            page = self.paginate_queryset(students)
+
+            if page or self.paginator.cursor_query_param in request.query_params:
+                return self.get_paginated_response(self.serialized(self.get_serializer(page, many=True)))
+            else:
+                return Response({'message': 'No students found.'}, status=404)
+
+        return self.conditional_response(request, self.list_validators, render)
+
+    @action(detail=False, methods=['post'], url_path='bulk-import', url_name='bulk_import', parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'message': 'Upload a CSV or NDJSON file in the "file" field.'}, status=400)
+
+        try:
+            fmt = detect_format(upload.name, request.data.get('format'))
+            chunk_size = int(request.data.get('chunk_size', DEFAULT_CHUNK_SIZE))
+        except ValueError as exc:
+            return Response({'message': str(exc)}, status=400)
+        if not 1 <= chunk_size <= settings.MAX_IMPORT_CHUNK_SIZE:
+            return Response(
+                {'message': f'chunk_size must be between 1 and {settings.MAX_IMPORT_CHUNK_SIZE}.'}, status=400,
+            )
+
+        if run_in_background(request):
+            return job_accepted(request, jobs.enqueue_import(upload, fmt, chunk_size))
+        report = import_students(upload, fmt, chunk_size=chunk_size)
+        return Response(report, status=201 if report['created'] else 400)
 
 # CarouselImage ViewSet
-class CarouselImageViewSet(viewsets.ModelViewSet):
+class CarouselImageViewSet(ConditionalGetMixin, SparseFieldsetMixin, WriteAtomicMixin, viewsets.ModelViewSet):
     queryset = CarouselImage.objects.all()
     serializer_class = CarouselImageSerializer
 
+    @action(detail=False, methods=['get'])
+    def active(self, request):
+        body, etag = active_carousel()
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = carousel_cache_control()
+        return response
+
 # Assignment ViewSet
-class AssignmentViewSet(viewsets.ModelViewSet):
+class AssignmentViewSet(ConditionalGetMixin, SparseFieldsetMixin, WriteAtomicMixin, viewsets.ModelViewSet):
     queryset = Assignment.objects.all()
     serializer_class = AssignmentSerializer
+    filterset_class = AssignmentFilter
+
+    @action(detail=True, methods=['get'], url_path='status', url_name='status')
+    def status_board(self, request, pk=None):
+        """
+        Who in the class group has submitted, on time or late, and who hasn't: ``?status=missing``.
+
+        The counts come from the assignment's counters; the students are one
+        cursor-paginated anti-join.
+        """
+        assignment = generics.get_object_or_404(self.get_queryset().select_related('summary'), pk=pk)
+        status_filter = request.query_params.get('status') or None
+        if status_filter is not None and status_filter not in BOARD_STATUSES:
+            return Response({'message': f"status must be one of: {', '.join(BOARD_STATUSES)}."}, status=400)
+
+        summary = getattr(assignment, 'summary', None)
+        counts = completion(
+            summary.submitted if summary else 0, summary.late if summary else 0,
+            class_sizes([assignment.class_group_id]).get(assignment.class_group_id, 0),
+        )
+        page = self.paginate_queryset(submission_board(assignment, status_filter))
+        response = self.get_paginated_response([board_entry(row, assignment.due_date) for row in page])
+        response.data = {
+            'assignment': assignment.pk, 'class_group': assignment.class_group_id, 'due_date': assignment.due_date,
+            'counts': counts, **response.data,
+        }
+        return response
 
 # Submission ViewSet
-class SubmissionViewSet(viewsets.ModelViewSet):
+class SubmissionViewSet(ConditionalGetMixin, ExportMixin, SparseFieldsetMixin, WriteAtomicMixin, viewsets.ModelViewSet):
     queryset = Submission.objects.all()
     serializer_class = SubmissionSerializer
+    filterset_class = SubmissionFilter
 
     @action(detail=False, methods=['get'], url_path='by-assignment/(?P<assignment_id>[^/.]+)', url_name='by_assignment')
     def by_assignment(self, request, assignment_id):
-        submissions = self.queryset.filter(assignment_id=assignment_id)
-        serializer = self.get_serializer(submissions, many=True)
+        def render():
+            submissions = self.get_queryset().filter(assignment_id=assignment_id)
+            page = self.paginate_queryset(submissions)
 
-        if submissions:
-            return Response(serializer.data, status=200)
-        else:
-            return Response({'message': 'No submissions found for this assignment.'}, status=404)
+            if page or self.paginator.cursor_query_param in request.query_params:
+                return self.get_paginated_response(self.serialized(self.get_serializer(page, many=True)))
+            else:
+                return Response({'message': 'No submissions found for this assignment.'}, status=404)
 
+        return self.conditional_response(request, self.list_validators, render)
 
-class RoleListCreateView(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        submission = self.get_object()
+        if not submission.file:
+            return Response({'message': 'This submission has no file.'}, status=404)
+        return file_response(request, submission.file.storage, submission.file.name)
+
+
+class RoleListCreateView(ReferenceCacheMixin, ConditionalGetMixin, SparseFieldsetMixin, WriteAtomicMixin, viewsets.ModelViewSet):
     queryset = Role.objects.all()
     serializer_class = RoleSerializer
 
-class RoleAssignmentViewSet(viewsets.ModelViewSet):
+class RoleAssignmentViewSet(ConditionalGetMixin, SparseFieldsetMixin, WriteAtomicMixin, viewsets.ModelViewSet):
     queryset = RoleAssignment.objects.all()
     serializer_class = RoleAssignmentSerializer
-    
\ No newline at end of file
+
+# Job ViewSet
+class JobViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Status, progress and result of background jobs: ``?status=running&kind=import_students``.
+
+    ``POST`` queues a rebuild (``{"kind": "rebuild_analytics"}``); the other
+    kinds are queued by their endpoints with ``?background=true``. Not cached
+    with ETags: a running job changes with every progress report.
+    """
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    filterset_fields = ['status', 'kind']
+
+    def create(self, request):
+        standalone = sorted(kind for kind, task in jobs.TASKS.items() if task.standalone)
+        kind = request.data.get('kind')
+        if kind not in standalone:
+            return Response({'message': f"kind must be one of: {', '.join(standalone)}."}, status=400)
+        return job_accepted(request, jobs.enqueue(kind))
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        job = self.get_object()
+        if not jobs.cancel(job):
+            return Response({'message': f"The job has already {job.status}."}, status=409)
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data, status=200)
+
+    @action(detail=True, methods=['post'])
+    def retry(self, request, pk=None):
+        job = self.get_object()
+        if not jobs.retry(job):
+            job.refresh_from_db()
+            if job.work_committed:
+                return Response({'message': 'The job already committed work that must not run twice.'}, status=409)
+            return Response({'message': 'Only failed or cancelled jobs can be retried.'}, status=409)
+        job.refresh_from_db()
+        return job_accepted(request, job)
+
+
+@api_view(['GET'])
+def cache_stats(request):
+    """Hit/miss counters of the reference-data cache, per model, summed over every process sharing the cache."""
+    return Response(reference_cache_stats(label.split('.')[1].lower() for label in REFERENCE_MODELS))
+
+
+@api_view(['GET'])
+def analytics(request):
+    """
+    Dashboard headcounts: by department, degree, batch and year of study, gender split and graduation counts.
+
+    Read from StudentSummary only, so the cost doesn't grow with the number of students.
+    """
+    return Response(overview())
+
+
+@api_view(['GET'])
+def assignment_analytics(request):
+    """
+    Submitted, on-time, late and missing counts and the submission rate per assignment:
+    ``?class_group=3`` or ``?degree=2``.
+
+    Cursor-paginated like the other lists; read from the summary tables.
+    """
+    assignments = Assignment.objects.all()
+    for param, lookup in (('class_group', 'class_group'), ('degree', 'class_group__degree')):
+        value = request.query_params.get(param)
+        if value is not None:
+            if not value.isdigit():
+                return Response({'message': f"{param} must be an id."}, status=400)
+            assignments = assignments.filter(**{lookup: value})
+    paginator = StableCursorPagination()
+    page = paginator.paginate_queryset(
+        assignments.values('pk', 'title', 'due_date', 'class_group_id', 'summary__submitted', 'summary__late'),
+        request,
+    )
+    return paginator.get_paginated_response([
+        {
+            'id': row['pk'], 'title': row['title'], 'due_date': row['due_date'], 'class_group': row['class_group_id'],
+            **{key: row[key] for key in ('class_size', 'submitted', 'on_time', 'late', 'missing', 'submission_rate')},
+        }
+        for row in assignment_rates(page)
+    ])
+
+SEARCH_DEFAULT_LIMIT = 20
+
+
+@api_view(['GET'])
+def search(request):
+    """
+    Ranked prefix search over students and teachers: ``?q=asha pune&type=student&limit=20&offset=0``.
+
+    Matches IDs, names, father's names, phone numbers and cities; every word
+    of the query must match the start of a word in one of them.
+    """
+    query = request.query_params.get('q', '').strip()
+    if len(query) < MIN_QUERY_LENGTH:
+        return Response({'message': f"q must be at least {MIN_QUERY_LENGTH} characters long."}, status=400)
+    kind = request.query_params.get('type') or None
+    if kind is not None and kind not in KINDS:
+        return Response({'message': f"type must be one of: {', '.join(KINDS)}."}, status=400)
+    try:
+        limit = int(request.query_params.get('limit', SEARCH_DEFAULT_LIMIT))
+        offset = int(request.query_params.get('offset', 0))
+    except ValueError:
+        return Response({'message': 'limit and offset must be integers.'}, status=400)
+    limit = min(max(limit, 1), settings.API_MAX_PAGE_SIZE)
+    offset = max(offset, 0)
+
+    backend, results = run_search(query, kind, limit=limit + 1, offset=offset)
+    url = request.build_absolute_uri()
+    previous = None
+    if offset:
+        previous = replace_query_param(url, 'offset', offset - limit) if offset > limit else remove_query_param(url, 'offset')
+    return Response({
+        'next': replace_query_param(url, 'offset', offset + limit) if len(results) > limit else None,
+        'previous': previous,
+        'backend': backend,
+        'results': results[:limit],
+    })